@@ -0,0 +1,31 @@
+// SPDX-License-Identifier: BUSL-1.1
+pragma solidity ^0.8.14;
+
+contract QuoterMulticall {
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    address public immutable quoter;
+
+    constructor(address quoter_) {
+        quoter = quoter_;
+    }
+
+    /*
+    Public
+     */
+    /// @notice runs every encoded Quoter call of calls and returns all the results, a failing
+    /// call is reported in its Result instead of reverting the whole batch
+    /// @dev not view because quoteSingle and quoteMulti are not, meant to be used through eth_call
+    function aggregate(
+        bytes[] calldata calls
+    ) public returns (Result[] memory results) {
+        results = new Result[](calls.length);
+        for (uint256 i = 0; i < calls.length; i++) {
+            (bool success, bytes memory returnData) = quoter.call(calls[i]);
+            results[i] = Result(success, returnData);
+        }
+    }
+}
@@ -0,0 +1,178 @@
+import math
+from collections import deque, namedtuple
+
+from poolPathCreator import PoolEdge, Route, sort_tokens
+
+log_q96 = 96 * math.log(2)
+
+# A profitable loop: route starts and ends at the same token, path is its swapMulti encoding
+# (the same bytes can be handed to Pool.flash as callback data to run the loop on borrowed funds)
+Cycle = namedtuple("Cycle", ["route", "path", "profit"])
+
+
+class ArbitrageScanner:
+    """Finds profitable cycles over the pool prices.
+
+    Every pool gives two directed edges weighted -log(price * (1 - fee)), so a cycle is
+    profitable when its weights add up to less than zero. Labels are kept between scans
+    (SPFA with a virtual source), which lets a scan after a batch of Swap events relax only
+    from the pools whose price changed.
+    """
+
+    def __init__(self, min_profit=0.0, epsilon=1e-12):
+        self.min_profit = min_profit
+        self.epsilon = epsilon
+        self.tokens = []
+        self.token_ids = {}
+        self.pools = []
+        # lower case pool address -> pool id, indexed logs and the factory spell addresses differently
+        self.pool_ids = {}
+        # edge 2 * pool_id goes token0 -> token1, edge 2 * pool_id + 1 goes token1 -> token0
+        self.edge_from = []
+        self.edge_to = []
+        self.edge_weight = []
+        self.out_edges = []
+        self.labels = []
+        self.parent_edge = []
+        self.pending = set()
+        self.full_scan = True
+
+    @classmethod
+    def from_created_pools(cls, tokens0, tokens1, fees, addresses, sqrt_prices_x96, min_profit=0.0):
+        scanner = cls(min_profit)
+        for token0, token1, fee, address, sqrt_price_x96 in zip(tokens0, tokens1, fees, addresses, sqrt_prices_x96):
+            scanner.add_pool(token0, token1, int(fee), address, sqrt_price_x96)
+        return scanner
+
+    def add_pool(self, token_a, token_b, fee, address, sqrt_price_x96):
+        token0, token1 = sort_tokens(token_a, token_b)
+        pool_id = len(self.pools)
+        self.pools.append(PoolEdge(token0, token1, fee, address))
+        self.pool_ids[address.lower()] = pool_id
+
+        id0 = self._token_id(token0)
+        id1 = self._token_id(token1)
+        self.edge_from += [id0, id1]
+        self.edge_to += [id1, id0]
+        self.edge_weight += [0.0, 0.0]
+        self.out_edges[id0].append(2 * pool_id)
+        self.out_edges[id1].append(2 * pool_id + 1)
+        self._set_weights(pool_id, sqrt_price_x96)
+
+    def update_price(self, address, sqrt_price_x96):
+        pool_id = self.pool_ids.get(address.lower())
+        if pool_id is not None:
+            self._set_weights(pool_id, sqrt_price_x96)
+
+    def on_swaps(self, events):
+        # events are Pool Swap logs, their address is the pool and sqrtPriceX96 the price after the swap
+        for event in events:
+            self.update_price(event.address, event["sqrtPriceX96"])
+        return self.scan()
+
+    def scan(self):
+        if self.full_scan:
+            self.labels = [0.0] * len(self.tokens)
+            self.parent_edge = [-1] * len(self.tokens)
+            sources = range(len(self.tokens))
+        else:
+            sources = sorted(self.pending)
+        self.pending = set()
+        self.full_scan = False
+
+        cycle = self._relax(sources)
+        if cycle is None:
+            return []
+        # the labels are no longer consistent, start over on the next scan
+        self.full_scan = True
+        weight = sum(self.edge_weight[edge] for edge in cycle)
+        profit = math.exp(-weight) - 1
+        if profit <= self.min_profit:
+            return []
+        route = self._route(cycle, weight)
+        return [Cycle(route, route.encode(), profit)]
+
+    def _token_id(self, token):
+        token_id = self.token_ids.get(token)
+        if token_id is None:
+            token_id = self.token_ids[token] = len(self.tokens)
+            self.tokens.append(token)
+            self.out_edges.append([])
+            self.labels.append(0.0)
+            self.parent_edge.append(-1)
+            # a new token joins with label 0, like every token on the first scan
+            self.pending.add(token_id)
+        return token_id
+
+    def _set_weights(self, pool_id, sqrt_price_x96):
+        fee = self.pools[pool_id].fee
+        # price is token1 per token0, (sqrtPriceX96 / 2**96) ** 2
+        log_price = 2 * (math.log(sqrt_price_x96) - log_q96)
+        log_fee = math.log1p(-fee / 1e6)
+        self.edge_weight[2 * pool_id] = -(log_price + log_fee)
+        self.edge_weight[2 * pool_id + 1] = -(-log_price + log_fee)
+        # only the edges that got cheaper can break the labels, relaxing both ends covers them
+        self.pending.add(self.edge_from[2 * pool_id])
+        self.pending.add(self.edge_from[2 * pool_id + 1])
+
+    def _relax(self, sources):
+        labels = self.labels
+        parent_edge = self.parent_edge
+        edge_to = self.edge_to
+        edge_weight = self.edge_weight
+        epsilon = self.epsilon
+        n = len(self.tokens)
+
+        queue = deque(sources)
+        queued = bytearray(n)
+        for token_id in sources:
+            queued[token_id] = 1
+        relaxations = [0] * n
+
+        while queue:
+            current = queue.popleft()
+            queued[current] = 0
+            current_label = labels[current]
+            for edge in self.out_edges[current]:
+                neighbor = edge_to[edge]
+                new_label = current_label + edge_weight[edge]
+                if new_label < labels[neighbor] - epsilon:
+                    labels[neighbor] = new_label
+                    parent_edge[neighbor] = edge
+                    relaxations[neighbor] += 1
+                    # a token relaxed n times means the parent pointers may loop
+                    if relaxations[neighbor] % n == 0:
+                        cycle = self._parent_cycle(neighbor)
+                        # parents kept from older scans can loop without being a negative cycle any more
+                        if cycle is not None and sum(edge_weight[edge] for edge in cycle) < 0:
+                            return cycle
+                    if not queued[neighbor]:
+                        queued[neighbor] = 1
+                        queue.append(neighbor)
+        return None
+
+    def _parent_cycle(self, token_id):
+        seen = set()
+        while token_id not in seen:
+            seen.add(token_id)
+            edge = self.parent_edge[token_id]
+            if edge == -1:
+                return None
+            token_id = self.edge_from[edge]
+
+        cycle = []
+        current = token_id
+        while True:
+            edge = self.parent_edge[current]
+            cycle.append(edge)
+            current = self.edge_from[edge]
+            if current == token_id:
+                break
+        cycle.reverse()
+        return cycle
+
+    def _route(self, cycle, weight):
+        tokens = [self.tokens[self.edge_from[edge]] for edge in cycle]
+        tokens.append(tokens[0])
+        pools = [self.pools[edge // 2] for edge in cycle]
+        return Route(tokens, pools, weight)
@@ -0,0 +1,232 @@
+import heapq
+import math
+from array import array
+
+from poolPathCreator import PoolEdge, Route, fee_cost, sort_tokens
+
+
+class CompactTokenGraph:
+    """Read-only token graph for large pool sets.
+
+    Tokens are interned to integer ids and the adjacency is kept in CSR form: the edges of
+    token t are adj_token[indptr[t]:indptr[t + 1]], going through the pools in adj_pool.
+    Pool attributes are parallel arrays indexed by pool id, so the whole graph is a handful
+    of flat arrays instead of one Python object per token and pool: the address is an index
+    into the addresses table (-1 for none) and the uint128 liquidity is split into two
+    uint64 columns, so it stays exact. Tokens are matched case-insensitively, like in
+    TokenGraph, under the first spelling seen.
+    """
+
+    def __init__(self, tokens, pool_token0, pool_token1, pool_fee, addresses=None, pool_address=None,
+                 pool_liquidity_high=None, pool_liquidity_low=None):
+        self.tokens = tokens
+        self.token_ids = {token.lower(): token_id for token_id, token in enumerate(tokens)}
+        self.pool_token0 = pool_token0
+        self.pool_token1 = pool_token1
+        self.pool_fee = pool_fee
+        self.addresses = addresses if addresses is not None else []
+        self.pool_address = pool_address if pool_address is not None else array("l", [-1]) * len(pool_fee)
+        zeros = array("Q", bytes(8 * len(pool_fee)))
+        self.pool_liquidity_high = pool_liquidity_high if pool_liquidity_high is not None else zeros
+        self.pool_liquidity_low = pool_liquidity_low if pool_liquidity_low is not None else array("Q", zeros)
+        self.pool_cost = array("d", (fee_cost(fee) for fee in pool_fee))
+
+        # CSR adjacency, every pool shows up once for each of its tokens
+        degree = array("I", bytes(4 * (len(tokens) + 1)))
+        for token_id in pool_token0:
+            degree[token_id + 1] += 1
+        for token_id in pool_token1:
+            degree[token_id + 1] += 1
+        indptr = array("I", [0]) * (len(tokens) + 1)
+        for token_id in range(len(tokens)):
+            indptr[token_id + 1] = indptr[token_id] + degree[token_id + 1]
+
+        fill = array("I", indptr)
+        adj_token = array("I", bytes(4 * 2 * len(pool_fee)))
+        adj_pool = array("I", bytes(4 * 2 * len(pool_fee)))
+        for pool_id in range(len(pool_fee)):
+            token0 = pool_token0[pool_id]
+            token1 = pool_token1[pool_id]
+            adj_token[fill[token0]] = token1
+            adj_pool[fill[token0]] = pool_id
+            fill[token0] += 1
+            adj_token[fill[token1]] = token0
+            adj_pool[fill[token1]] = pool_id
+            fill[token1] += 1
+
+        self.indptr = indptr
+        self.adj_token = adj_token
+        self.adj_pool = adj_pool
+
+    @classmethod
+    def from_created_pools(cls, tokens0, tokens1, fees, addresses=None, liquidities=None):
+        # the three arrays returned by PoolFactory.getCreatedPools(), plus optional pool addresses and liquidity
+        tokens = []
+        token_ids = {}
+        pool_token0 = array("I")
+        pool_token1 = array("I")
+        for token_a, token_b in zip(tokens0, tokens1):
+            for token, ids in zip(sort_tokens(token_a, token_b), (pool_token0, pool_token1)):
+                token_id = token_ids.get(token.lower())
+                if token_id is None:
+                    token_id = token_ids[token.lower()] = len(tokens)
+                    tokens.append(token)
+                ids.append(token_id)
+
+        pool_fee = array("I", (int(fee) for fee in fees))
+        address_table = None
+        pool_address = None
+        if addresses is not None:
+            address_table = []
+            address_ids = {}
+            pool_address = array("l")
+            for address in addresses:
+                if address is None:
+                    pool_address.append(-1)
+                    continue
+                address_id = address_ids.get(address.lower())
+                if address_id is None:
+                    address_id = address_ids[address.lower()] = len(address_table)
+                    address_table.append(address)
+                pool_address.append(address_id)
+        high = low = None
+        if liquidities is not None:
+            liquidities = [int(liquidity) for liquidity in liquidities]
+            high = array("Q", (liquidity >> 64 for liquidity in liquidities))
+            low = array("Q", (liquidity & (2**64 - 1) for liquidity in liquidities))
+        return cls(tokens, pool_token0, pool_token1, pool_fee, address_table, pool_address, high, low)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    @property
+    def pool_count(self):
+        return len(self.pool_fee)
+
+    def token_id(self, token):
+        return self.token_ids.get(token.lower())
+
+    def address(self, pool_id):
+        address_id = self.pool_address[pool_id]
+        return self.addresses[address_id] if address_id >= 0 else None
+
+    def liquidity(self, pool_id):
+        return (self.pool_liquidity_high[pool_id] << 64) | self.pool_liquidity_low[pool_id]
+
+    def pool(self, pool_id):
+        return PoolEdge(
+            self.tokens[self.pool_token0[pool_id]],
+            self.tokens[self.pool_token1[pool_id]],
+            self.pool_fee[pool_id],
+            self.address(pool_id),
+        )
+
+    def shortest_route(self, start_crypto, target_crypto, cost=None):
+        # Dijkstra on token ids, cost(pool_id) -> float defaults to the pool fee cost
+        start = self.token_id(start_crypto)
+        target = self.token_id(target_crypto)
+        if start is None or target is None:
+            return None
+        if start == target:
+            return Route([self.tokens[start]], [], 0.0)
+
+        pool_cost = self.pool_cost
+        indptr = self.indptr
+        adj_token = self.adj_token
+        adj_pool = self.adj_pool
+
+        costs = array("d", [math.inf]) * len(self.tokens)
+        parent_pool = array("l", [-1]) * len(self.tokens)
+        visited = bytearray(len(self.tokens))
+        costs[start] = 0.0
+        heap = [(0.0, start)]
+
+        while heap:
+            current_cost, current = heapq.heappop(heap)
+            if visited[current]:
+                continue
+            if current == target:
+                break
+            visited[current] = 1
+            for edge in range(indptr[current], indptr[current + 1]):
+                neighbor = adj_token[edge]
+                if visited[neighbor]:
+                    continue
+                pool_id = adj_pool[edge]
+                new_cost = current_cost + (pool_cost[pool_id] if cost is None else cost(pool_id))
+                if new_cost < costs[neighbor]:
+                    costs[neighbor] = new_cost
+                    parent_pool[neighbor] = pool_id
+                    heapq.heappush(heap, (new_cost, neighbor))
+
+        if parent_pool[target] == -1:
+            return None
+        return self._build_route(parent_pool, target, costs[target])
+
+    def bounded_route(self, start_crypto, target_crypto, max_hops, cost=None):
+        # Cheapest route using at most max_hops pools (hop limited Bellman-Ford on token ids)
+        start = self.token_id(start_crypto)
+        target = self.token_id(target_crypto)
+        if start is None or target is None:
+            return None
+        if start == target:
+            return Route([self.tokens[start]], [], 0.0)
+
+        pool_cost = self.pool_cost
+        indptr = self.indptr
+        adj_token = self.adj_token
+        adj_pool = self.adj_pool
+
+        best = {start: 0.0}
+        frontier = {start: 0.0}
+        # one parent pool map per layer, only for the tokens that improved in it
+        layers = [{}]
+        for _ in range(max_hops):
+            next_frontier = {}
+            parents = {}
+            for current, current_cost in frontier.items():
+                for edge in range(indptr[current], indptr[current + 1]):
+                    neighbor = adj_token[edge]
+                    if neighbor == start:
+                        continue
+                    pool_id = adj_pool[edge]
+                    new_cost = current_cost + (pool_cost[pool_id] if cost is None else cost(pool_id))
+                    if new_cost < best.get(neighbor, math.inf) and new_cost < next_frontier.get(neighbor, math.inf):
+                        next_frontier[neighbor] = new_cost
+                        parents[neighbor] = pool_id
+            if not next_frontier:
+                break
+            best.update(next_frontier)
+            layers.append(parents)
+            frontier = next_frontier
+
+        if target not in best:
+            return None
+
+        tokens = [target]
+        pools = []
+        layer = len(layers) - 1
+        while tokens[-1] != start:
+            while tokens[-1] not in layers[layer]:
+                layer -= 1
+            pool_id = layers[layer][tokens[-1]]
+            pools.append(pool_id)
+            tokens.append(self._other(pool_id, tokens[-1]))
+            layer -= 1
+        return self._route(tokens[::-1], pools[::-1], best[target])
+
+    def _other(self, pool_id, token_id):
+        token0 = self.pool_token0[pool_id]
+        return self.pool_token1[pool_id] if token_id == token0 else token0
+
+    def _build_route(self, parent_pool, target, cost):
+        tokens = [target]
+        pools = []
+        while parent_pool[tokens[-1]] != -1:
+            pool_id = parent_pool[tokens[-1]]
+            pools.append(pool_id)
+            tokens.append(self._other(pool_id, tokens[-1]))
+        return self._route(tokens[::-1], pools[::-1], cost)
+
+    def _route(self, token_ids, pool_ids, cost):
+        return Route([self.tokens[token_id] for token_id in token_ids], [self.pool(pool_id) for pool_id in pool_ids], cost)
@@ -0,0 +1,335 @@
+# Backfills and follows the protocol logs into SQLite: PoolCreated of the PoolFactory,
+# Mint / Burn / Swap / Collect / Flash of every pool it created and Transfer of the NFT.
+# One table per event with the event arguments as columns, so other tools can query it directly.
+import heapq
+import sqlite3
+import time
+
+# event name -> (emitting contract, signature, ((argument, type, indexed), ...)) as declared in contracts/
+EVENTS = {
+    "PoolCreated": ("factory", "PoolCreated(address,address,uint24,address)", (
+        ("token0", "address", True), ("token1", "address", True), ("fee", "uint24", True), ("pool", "address", False),
+    )),
+    "Mint": ("pool", "Mint(address,address,int24,int24,uint128,uint256,uint256)", (
+        ("sender", "address", False), ("owner", "address", True), ("tickLower", "int24", True), ("tickUpper", "int24", True),
+        ("amount", "uint128", False), ("amount0", "uint256", False), ("amount1", "uint256", False),
+    )),
+    "Burn": ("pool", "Burn(address,int24,int24,uint128,uint256,uint256)", (
+        ("owner", "address", True), ("tickLower", "int24", True), ("tickUpper", "int24", True),
+        ("amount", "uint128", False), ("amount0", "uint256", False), ("amount1", "uint256", False),
+    )),
+    "Swap": ("pool", "Swap(address,address,int256,int256,uint160,uint128,int24)", (
+        ("sender", "address", True), ("recipient", "address", True), ("amount0", "int256", False), ("amount1", "int256", False),
+        ("sqrtPriceX96", "uint160", False), ("liquidity", "uint128", False), ("tick", "int24", False),
+    )),
+    "Collect": ("pool", "Collect(address,address,int24,int24,uint256,uint256)", (
+        ("owner", "address", True), ("recipient", "address", False), ("tickLower", "int24", True), ("tickUpper", "int24", True),
+        ("amount0", "uint256", False), ("amount1", "uint256", False),
+    )),
+    "Flash": ("pool", "Flash(address,uint256,uint256)", (
+        ("recipient", "address", True), ("amount0", "uint256", False), ("amount1", "uint256", False),
+    )),
+    "Transfer": ("nft", "Transfer(address,address,uint256)", (
+        ("from", "address", True), ("to", "address", True), ("id", "uint256", True),
+    )),
+}
+
+# integer types that fit an SQLite INTEGER, the wider ones are stored as decimal TEXT
+_SMALL_INTS = ("uint24", "int24", "uint16")
+
+
+class Event(dict):
+    """A decoded log: the event arguments by name, plus where it was emitted."""
+
+    def __init__(self, name, address, block_number, log_index, transaction_hash, args):
+        super().__init__(args)
+        self.name = name
+        self.address = address
+        self.block_number = block_number
+        self.log_index = log_index
+        self.transaction_hash = transaction_hash
+
+    def __repr__(self):
+        return self.name + "(" + dict.__repr__(self) + " @" + str(self.block_number) + ":" + str(self.log_index) + ")"
+
+
+def event_topics():
+    # topic0 of every event, keccak256 of its signature
+    from eth_utils import keccak
+
+    return {name: keccak(text=signature) for name, (_, signature, _) in EVENTS.items()}
+
+
+def table_name(name):
+    # PoolCreated -> pool_created
+    return "".join("_" + c.lower() if c.isupper() and i else c.lower() for i, c in enumerate(name))
+
+
+def _bytes(value):
+    # HexBytes, bytes and hex strings as returned by the different providers
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value[:2] in ("0x", "0X") else value)
+    return bytes(value)
+
+
+def _hash(value):
+    return "0x" + _bytes(value).hex()
+
+
+def _decode_word(word, abi_type):
+    if abi_type == "address":
+        return "0x" + word[12:].hex()
+    value = int.from_bytes(word, "big")
+    if abi_type.startswith("int") and value >= 2**255:
+        value -= 2**256
+    return value
+
+
+def decode_log(name, log):
+    """Decodes a raw log of the event name (all the arguments of these events are static)."""
+    _, _, arguments = EVENTS[name]
+    topics = [_bytes(topic) for topic in log["topics"]][1:]
+    data = _bytes(log["data"])
+    args = {}
+    topic_index = 0
+    data_offset = 0
+    for argument, abi_type, indexed in arguments:
+        if indexed:
+            word = topics[topic_index]
+            topic_index += 1
+        else:
+            word = data[data_offset:data_offset + 32]
+            data_offset += 32
+        args[argument] = _decode_word(word, abi_type)
+    transaction_hash = log.get("transactionHash")
+    return Event(
+        name,
+        "0x" + _bytes(log["address"]).hex(),
+        int(log["blockNumber"]),
+        int(log["logIndex"]),
+        None if transaction_hash is None else "0x" + _bytes(transaction_hash).hex(),
+        args,
+    )
+
+
+def create_tables(db):
+    for name, (_, _, arguments) in EVENTS.items():
+        columns = ", ".join('"' + argument + '" ' + ("INTEGER" if abi_type in _SMALL_INTS else "TEXT") for argument, abi_type, _ in arguments)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS " + table_name(name) + " (block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, "
+            "transaction_hash TEXT, address TEXT NOT NULL, " + columns + ", PRIMARY KEY (block_number, log_index))"
+        )
+    db.execute("CREATE INDEX IF NOT EXISTS swap_address ON swap (address, block_number)")
+    db.execute("CREATE INDEX IF NOT EXISTS mint_address ON mint (address, block_number)")
+    db.execute("CREATE INDEX IF NOT EXISTS burn_address ON burn (address, block_number)")
+    db.execute("CREATE TABLE IF NOT EXISTS checkpoint (name TEXT PRIMARY KEY, block_number INTEGER NOT NULL)")
+    # hash of the last block of every indexed range, to notice the ranges a reorg replaced
+    db.execute("CREATE TABLE IF NOT EXISTS block_hash (block_number INTEGER PRIMARY KEY, hash TEXT NOT NULL)")
+
+
+def _row(event):
+    _, _, arguments = EVENTS[event.name]
+    values = [event.block_number, event.log_index, event.transaction_hash, event.address]
+    for argument, abi_type, _ in arguments:
+        value = event[argument]
+        values.append(value if abi_type in _SMALL_INTS or abi_type == "address" else str(value))
+    return values
+
+
+def store_events(db, events):
+    # one executemany per table, inside the caller's transaction; events already stored are ignored
+    rows = {}
+    for event in events:
+        rows.setdefault(event.name, []).append(_row(event))
+    for name, table_rows in rows.items():
+        placeholders = ", ".join("?" * len(table_rows[0]))
+        db.executemany("INSERT OR IGNORE INTO " + table_name(name) + " VALUES (" + placeholders + ")", table_rows)
+
+
+def delete_events(db, from_block):
+    # drops the stored events of from_block on, inside the caller's transaction
+    for name in EVENTS:
+        db.execute("DELETE FROM " + table_name(name) + " WHERE block_number >= ?", (from_block,))
+
+
+def read_events(db, names, from_block=0, to_block=None, address=None):
+    """The stored events of the given names in chain order, decoded back into Events.
+
+    address keeps only the events of one contract, e.g. every Mint, Burn and Swap of a pool.
+    """
+    streams = []
+    for name in names:
+        _, _, arguments = EVENTS[name]
+        query = "SELECT * FROM " + table_name(name) + " WHERE block_number >= ?"
+        params = [from_block]
+        if to_block is not None:
+            query += " AND block_number <= ?"
+            params.append(to_block)
+        if address is not None:
+            query += " AND address = ?"
+            params.append(address.lower())
+        query += " ORDER BY block_number, log_index"
+        streams.append(_events_from_rows(name, arguments, db.execute(query, params)))
+    return heapq.merge(*streams, key=lambda event: (event.block_number, event.log_index))
+
+
+def _events_from_rows(name, arguments, rows):
+    for row in rows:
+        args = {}
+        for (argument, abi_type, _), value in zip(arguments, row[4:]):
+            args[argument] = value if abi_type == "address" else int(value)
+        yield Event(name, row[3], row[0], row[1], row[2], args)
+
+
+class EventIndexer:
+    """Copies the protocol logs into an SQLite database and keeps it up to date.
+
+    get_logs(filter_params) runs eth_getLogs with a web3 style filter (w3.eth.get_logs; the
+    addresses are lower case, so checksum them first for providers that insist) and
+    block_number() returns the head block. Block ranges start at chunk_size blocks; a failing
+    query (too many results, a timeout) halves the range and retries, every range that goes
+    through grows the next one back up to max_chunk_size. Each range is written with one
+    executemany per table and the checkpoint in the same transaction, so a restart resumes
+    from the last complete range and never stores a log twice.
+
+    Only blocks with `confirmations` blocks on top of them are indexed, 12 by default, deeper
+    than the reorgs these chains see in practice: without get_block, the stored logs of a
+    block a reorg drops later would stay. With get_block(number) (e.g.
+    w3.eth.get_block) the hash of the last block of every range is stored too; when the
+    parentHash of the next range does not match it, the indexer goes back to the last stored
+    block still on the chain, deletes the events and the checkpoint after it and indexes
+    from there again. State built from the events (replicas, indexes) cannot undo them, so
+    subscribe_reorgs(callback) calls callback(block_number) with the first dropped block.
+    """
+
+    def __init__(self, db_path, get_logs, block_number, factory, nft, start_block=0, chunk_size=2000,
+                 max_chunk_size=100000, confirmations=12, topics=None, get_block=None):
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            create_tables(self.db)
+        self.get_logs = get_logs
+        self.block_number = block_number
+        self.factory = factory.lower()
+        self.nft = nft.lower()
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.confirmations = confirmations
+        self.get_block = get_block
+        self.start_block = start_block
+        topics = topics if topics is not None else event_topics()
+        self.topics = {name: _bytes(topic) for name, topic in topics.items()}
+        self.names_by_topic = {topic: name for name, topic in self.topics.items()}
+        self.pools = {row[0] for row in self.db.execute("SELECT pool FROM pool_created")}
+        self.subscribers = []
+        self.reorg_subscribers = []
+
+        row = self.db.execute("SELECT block_number FROM checkpoint WHERE name = 'events'").fetchone()
+        self.next_block = row[0] + 1 if row is not None else start_block
+
+    def subscribe(self, callback):
+        # callback(event) for every new event, in chain order, once its range is committed
+        self.subscribers.append(callback)
+
+    def subscribe_reorgs(self, callback):
+        # callback(block_number) after the events from block_number on were dropped by a reorg
+        self.reorg_subscribers.append(callback)
+
+    def close(self):
+        self.db.close()
+
+    def run(self, to_block=None):
+        """Indexes up to to_block (default: the confirmed head), returns the last indexed block."""
+        if to_block is None:
+            to_block = self.block_number() - self.confirmations
+        while self.next_block <= to_block:
+            from_block = self.next_block
+            last_block = min(from_block + self.chunk_size - 1, to_block)
+            block_hash = None
+            if self.get_block is not None:
+                if self._reorged(from_block):
+                    self._roll_back()
+                    continue
+                # read before the logs: if they come from a newer chain, the next range notices
+                block_hash = _hash(self.get_block(last_block)["hash"])
+            try:
+                events = self._fetch(from_block, last_block)
+            except Exception:
+                if last_block == from_block:
+                    raise
+                self.chunk_size = max(1, (last_block - from_block + 1) // 2)
+                continue
+            self._store(events, last_block, block_hash)
+            self.next_block = last_block + 1
+            if last_block - from_block + 1 == self.chunk_size:
+                self.chunk_size = min(self.chunk_size * 2, self.max_chunk_size)
+            for event in events:
+                for callback in self.subscribers:
+                    callback(event)
+        return self.next_block - 1
+
+    def follow(self, poll_interval=10):
+        # tails the chain forever
+        while True:
+            self.run()
+            time.sleep(poll_interval)
+
+    def _query(self, from_block, to_block, address, names):
+        return self.get_logs({
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "address": address,
+            "topics": [[self.topics[name] for name in names]],
+        })
+
+    def _decode(self, logs):
+        events = []
+        for log in logs:
+            topics = log["topics"]
+            name = self.names_by_topic.get(_bytes(topics[0])) if topics else None
+            if name is not None:
+                events.append(decode_log(name, log))
+        return events
+
+    def _fetch(self, from_block, to_block):
+        # the factory first, so the pools created in the range are queried in the same range
+        events = self._decode(self._query(from_block, to_block, self.factory, ["PoolCreated"]))
+        pools = self.pools | {event["pool"] for event in events if event.name == "PoolCreated"}
+        if pools:
+            pool_events = [name for name, (contract, _, _) in EVENTS.items() if contract == "pool"]
+            logs = self._query(from_block, to_block, sorted(pools), pool_events)
+            events += [event for event in self._decode(logs) if event.address in pools]
+        events += self._decode(self._query(from_block, to_block, self.nft, ["Transfer"]))
+        events.sort(key=lambda event: (event.block_number, event.log_index))
+        return events
+
+    def _reorged(self, block_number):
+        # whether the parent of block_number is no longer the block stored for it
+        row = self.db.execute("SELECT hash FROM block_hash WHERE block_number = ?", (block_number - 1,)).fetchone()
+        return row is not None and _hash(self.get_block(block_number)["parentHash"]) != row[0]
+
+    def _roll_back(self):
+        # back to the last stored block the chain still has (before start_block if none)
+        fork_block = self.start_block - 1
+        rows = self.db.execute("SELECT block_number, hash FROM block_hash ORDER BY block_number DESC").fetchall()
+        for block_number, block_hash in rows:
+            if _hash(self.get_block(block_number)["hash"]) == block_hash:
+                fork_block = block_number
+                break
+        with self.db:
+            delete_events(self.db, fork_block + 1)
+            self.db.execute("DELETE FROM block_hash WHERE block_number > ?", (fork_block,))
+            self.db.execute("INSERT OR REPLACE INTO checkpoint VALUES ('events', ?)", (fork_block,))
+        self.pools = {row[0] for row in self.db.execute("SELECT pool FROM pool_created")}
+        self.next_block = fork_block + 1
+        for callback in self.reorg_subscribers:
+            callback(self.next_block)
+
+    def _store(self, events, to_block, block_hash=None):
+        with self.db:
+            store_events(self.db, events)
+            self.db.execute("INSERT OR REPLACE INTO checkpoint VALUES ('events', ?)", (to_block,))
+            if block_hash is not None:
+                self.db.execute("INSERT OR REPLACE INTO block_hash VALUES (?, ?)", (to_block, block_hash))
+        self.pools.update(event["pool"] for event in events if event.name == "PoolCreated")
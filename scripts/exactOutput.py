@@ -0,0 +1,189 @@
+# Exact output quotes over local pool states: the amountIn to give SwapManager.swapSingle /
+# swapMulti so that at least a wanted amountOut comes out. The pools only swap exact inputs,
+# so every hop is inverted off-chain, walking the path backwards from the output token.
+from collections import namedtuple
+
+from liquidityMath import add_liquidity
+from pathCodec import decode_path
+from poolSimulator import NotEnoughLiquidity
+from swapMath import calc_amount0_delta, calc_amount1_delta, div_rounding_up, mul_div_rounding_up, q96
+from tickMath import MAX_SQRT_RATIO, MIN_SQRT_RATIO, get_sqrt_ratio_at_tick
+
+# amounts_in holds the input of every hop, amounts_in[0] == amount_in;
+# amount_out is what the path gives for amount_in, at least the amount asked for
+ExactOutputQuote = namedtuple("ExactOutputQuote", ["amount_in", "amounts_in", "amount_out"])
+
+_REVERTS = (NotEnoughLiquidity, ArithmeticError, ValueError)
+
+
+def get_next_sqrt_price_from_output(sqrt_price_x96, liquidity, amount_out, zero_for_one):
+    # the price after taking amount_out out of the pool, rounded so that at least amount_out is available
+    if zero_for_one:
+        quotient = div_rounding_up(amount_out * q96, liquidity)
+        if sqrt_price_x96 <= quotient:
+            raise NotEnoughLiquidity()
+        return sqrt_price_x96 - quotient
+    numerator = liquidity << 96
+    product = amount_out * sqrt_price_x96
+    if numerator <= product:
+        raise NotEnoughLiquidity()
+    return mul_div_rounding_up(numerator, sqrt_price_x96, numerator - product)
+
+
+def estimate_amount_in(state, zero_for_one, amount_out, exact=True):
+    """The Pool.swap step loop run backwards from amount_out, an estimate of the input it needs.
+
+    Full steps cost what the forward swap charges for them, the last step is inverted with the
+    price it has to reach. Every step rounds in favour of the pool, so the estimate is the
+    exact answer or a few wei off. Raises NotEnoughLiquidity when the pool runs out first.
+    """
+    sqrt_price_limit_x96 = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+    sqrt_price_x96 = state.sqrt_price_x96
+    tick = state.tick
+    liquidity = state.liquidity
+    fee = state.fee
+    if exact:
+        next_initialized_tick = state.tick_bitmap.next_initialized_tick_within_one_word
+    else:
+        next_initialized_tick = state.tick_bitmap.next_initialized_tick
+
+    remaining = amount_out
+    amount_in = 0
+    while remaining > 0:
+        if sqrt_price_x96 == sqrt_price_limit_x96:
+            raise NotEnoughLiquidity()
+        next_tick, _ = next_initialized_tick(tick, state.tick_spacing, zero_for_one)
+        sqrt_price_next_x96 = get_sqrt_ratio_at_tick(next_tick)
+        if zero_for_one:
+            target_x96 = sqrt_price_limit_x96 if sqrt_price_next_x96 < sqrt_price_limit_x96 else sqrt_price_next_x96
+            step_out = calc_amount1_delta(sqrt_price_x96, target_x96, liquidity, False)
+        else:
+            target_x96 = sqrt_price_limit_x96 if sqrt_price_next_x96 > sqrt_price_limit_x96 else sqrt_price_next_x96
+            step_out = calc_amount0_delta(sqrt_price_x96, target_x96, liquidity, False)
+
+        if remaining <= step_out:
+            sqrt_price_after_x96 = get_next_sqrt_price_from_output(sqrt_price_x96, liquidity, remaining, zero_for_one)
+            if zero_for_one:
+                step_in = calc_amount0_delta(sqrt_price_x96, sqrt_price_after_x96, liquidity, True)
+            else:
+                step_in = calc_amount1_delta(sqrt_price_x96, sqrt_price_after_x96, liquidity, True)
+            # computeSwapStep takes the fee off the remaining amount before it moves the price
+            return amount_in + mul_div_rounding_up(step_in, 10**6, 10**6 - fee)
+
+        if zero_for_one:
+            step_in = calc_amount0_delta(sqrt_price_x96, target_x96, liquidity, True)
+        else:
+            step_in = calc_amount1_delta(sqrt_price_x96, target_x96, liquidity, True)
+        amount_in += step_in + mul_div_rounding_up(step_in, fee, 10**6 - fee)
+        remaining -= step_out
+        sqrt_price_x96 = target_x96
+
+        if sqrt_price_x96 == sqrt_price_next_x96:
+            info = state.ticks.get(next_tick)
+            liquidity_net = info.liquidity_net if info is not None else 0
+            liquidity = add_liquidity(liquidity, -liquidity_net if zero_for_one else liquidity_net)
+            if liquidity == 0:
+                raise NotEnoughLiquidity()
+            tick = next_tick - 1 if zero_for_one else next_tick
+    return amount_in
+
+
+def _amount_out(state, zero_for_one, amount_in, exact):
+    # None when the exact input swap reverts, e.g. an input too small to pay more than the fee
+    if amount_in <= 0:
+        return None
+    try:
+        return state.quote(zero_for_one, amount_in, exact=exact).amount_out
+    except _REVERTS:
+        return None
+
+
+def exact_output_amount_in(state, zero_for_one, amount_out, exact=True):
+    """The smallest exact input for which state.quote gives at least amount_out.
+
+    The backwards estimate is checked with forward quotes and moved by 1, 2, 4, ... wei until
+    it brackets the answer, then bisected; usually that is one or two local quotes.
+    Raises NotEnoughLiquidity when no input gets amount_out out of the pool.
+    """
+    if amount_out <= 0:
+        raise ValueError("amount_out must be positive")
+    estimate = estimate_amount_in(state, zero_for_one, amount_out, exact)
+
+    out = _amount_out(state, zero_for_one, estimate, exact)
+    step = 1
+    if out is not None and out >= amount_out:
+        # enough: lower the estimate until it is not
+        high = estimate
+        while True:
+            low = max(high - step, 0)
+            out = _amount_out(state, zero_for_one, low, exact)
+            if out is None or out < amount_out:
+                break
+            high = low
+            step *= 2
+    else:
+        # short by rounding: raise it until it is enough
+        low = estimate
+        while True:
+            if step > estimate + 1:
+                raise NotEnoughLiquidity()
+            high = low + step
+            out = _amount_out(state, zero_for_one, high, exact)
+            if out is not None and out >= amount_out:
+                break
+            low = high
+            step *= 2
+
+    # low is not enough, high is
+    while high - low > 1:
+        middle = (low + high) // 2
+        out = _amount_out(state, zero_for_one, middle, exact)
+        if out is not None and out >= amount_out:
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def _pool_state(pools, token_in, token_out, fee):
+    zero_for_one = token_in < token_out
+    key = (token_in, token_out, fee) if zero_for_one else (token_out, token_in, fee)
+    return pools[key], zero_for_one
+
+
+def quote_exact_output(pools, path, amount_out, exact=True):
+    """The smallest amountIn for which swapMulti(path) gives at least amount_out.
+
+    pools is keyed like in quote_multi. The last hop is inverted first and each hop before it
+    has to deliver the input of the next one; the path is then quoted forwards once with the
+    result for the actual amount out.
+    """
+    hops = decode_path(path)
+    amounts_in = [0] * len(hops)
+    needed = amount_out
+    for index in range(len(hops) - 1, -1, -1):
+        state, zero_for_one = _pool_state(pools, *hops[index])
+        needed = amounts_in[index] = exact_output_amount_in(state, zero_for_one, needed, exact)
+
+    amount = amounts_in[0]
+    for hop in hops:
+        state, zero_for_one = _pool_state(pools, *hop)
+        amount = state.quote(zero_for_one, amount, exact=exact).amount_out
+    return ExactOutputQuote(amounts_in[0], amounts_in, amount)
+
+
+def route_exact_output(graph, pools, token_in, token_out, amount_out, k=5, max_hops=3, exact=True):
+    """The route of TokenGraph.k_shortest_routes that needs the least input for amount_out.
+
+    Returns (route, ExactOutputQuote), or None when no route can deliver amount_out. Routes
+    through a pool missing from pools are skipped, like the ones running out of liquidity.
+    """
+    best = None
+    for route in graph.k_shortest_routes(token_in, token_out, k, max_hops):
+        try:
+            quote = quote_exact_output(pools, route.encode(), amount_out, exact)
+        except (KeyError,) + _REVERTS:
+            continue
+        if best is None or quote.amount_in < best[1].amount_in:
+            best = (route, quote)
+    return best
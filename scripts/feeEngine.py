@@ -0,0 +1,159 @@
+# Off-chain Pool.getFees: the owed fees of every position from a local PoolState
+from pathCodec import token_bytes
+from poolSimulator import get_fee_growth_inside
+from swapMath import mul_div
+
+q128 = 2**128
+MAX_UINT128 = 2**128 - 1
+
+
+class PositionInfo:
+    """Position.Info of one (owner, lowerTick, upperTick) position of a pool."""
+
+    __slots__ = ("liquidity", "fee_growth_inside0_last_x128", "fee_growth_inside1_last_x128", "tokens_owed0", "tokens_owed1")
+
+    def __init__(self, liquidity=0, fee_growth_inside0_last_x128=0, fee_growth_inside1_last_x128=0, tokens_owed0=0, tokens_owed1=0):
+        self.liquidity = liquidity
+        self.fee_growth_inside0_last_x128 = fee_growth_inside0_last_x128
+        self.fee_growth_inside1_last_x128 = fee_growth_inside1_last_x128
+        self.tokens_owed0 = tokens_owed0
+        self.tokens_owed1 = tokens_owed1
+
+    def __repr__(self):
+        return "PositionInfo(" + ", ".join(name + "=" + repr(getattr(self, name)) for name in self.__slots__) + ")"
+
+
+def position_key(owner, lower_tick, upper_tick):
+    # keccak256(abi.encodePacked(owner, lowerTick, upperTick)), the key of Pool.positions
+    from eth_utils import keccak
+
+    return keccak(token_bytes(owner) + (lower_tick % 2**24).to_bytes(3, "big") + (upper_tick % 2**24).to_bytes(3, "big"))
+
+
+def _checked_add128(a, b):
+    if a + b > MAX_UINT128:
+        raise OverflowError("tokensOwed overflow")
+    return a + b
+
+
+def _owed(info, fee_growth_inside0_x128, fee_growth_inside1_x128):
+    # the uint128(mulDiv(feeGrowthInside - feeGrowthInsideLast, liquidity, Q128)) of Position.update
+    if fee_growth_inside0_x128 < info.fee_growth_inside0_last_x128 or fee_growth_inside1_x128 < info.fee_growth_inside1_last_x128:
+        raise OverflowError("fee growth underflow")
+    tokens_owed0 = mul_div(fee_growth_inside0_x128 - info.fee_growth_inside0_last_x128, info.liquidity, q128) & MAX_UINT128
+    tokens_owed1 = mul_div(fee_growth_inside1_x128 - info.fee_growth_inside1_last_x128, info.liquidity, q128) & MAX_UINT128
+    return tokens_owed0, tokens_owed1
+
+
+def simulate_update(info, fee_growth_inside0_x128, fee_growth_inside1_x128):
+    """Position._simulateUpdate, the (updatedTokensOwed0, updatedTokensOwed1) Pool.getFees returns.
+
+    Like the contract it only adds the stored tokensOwed when new fees accrued, so a position
+    without new fees reads (0, 0) even when it still has tokens to collect.
+    """
+    tokens_owed0, tokens_owed1 = _owed(info, fee_growth_inside0_x128, fee_growth_inside1_x128)
+    if tokens_owed0 > 0 or tokens_owed1 > 0:
+        return _checked_add128(info.tokens_owed0, tokens_owed0), _checked_add128(info.tokens_owed1, tokens_owed1)
+    return tokens_owed0, tokens_owed1
+
+
+def position_update(info, liquidity_delta, fee_growth_inside0_x128, fee_growth_inside1_x128):
+    # Position.update
+    tokens_owed0, tokens_owed1 = _owed(info, fee_growth_inside0_x128, fee_growth_inside1_x128)
+    liquidity = info.liquidity + liquidity_delta
+    if not 0 <= liquidity <= MAX_UINT128:
+        raise OverflowError("addLiquidity overflow")
+    info.liquidity = liquidity
+    info.fee_growth_inside0_last_x128 = fee_growth_inside0_x128
+    info.fee_growth_inside1_last_x128 = fee_growth_inside1_x128
+    if tokens_owed0 > 0 or tokens_owed1 > 0:
+        info.tokens_owed0 = _checked_add128(info.tokens_owed0, tokens_owed0)
+        info.tokens_owed1 = _checked_add128(info.tokens_owed1, tokens_owed1)
+
+
+class FeeEngine:
+    """Pool.getFees for all the positions of a pool, kept up to date from the pool events.
+
+    positions maps (owner, lowerTick, upperTick) to PositionInfo. Positions share their bounds
+    (every NFT position of a range belongs to the NFT contract), so the fee growth inside is
+    cached per (lowerTick, upperTick); a swap only drops the cached ranges it swept over.
+    """
+
+    def __init__(self, state, positions=None):
+        self.state = state
+        self.positions = positions if positions is not None else {}
+        self._fee_growth_inside = {}
+
+    @classmethod
+    def from_contract(cls, pool, state, positions):
+        # positions is an iterable of (owner, lowerTick, upperTick), read with Pool.positions
+        engine = cls(state)
+        for owner, lower_tick, upper_tick in positions:
+            info = pool.positions(position_key(owner, lower_tick, upper_tick))
+            engine.positions[(owner, lower_tick, upper_tick)] = PositionInfo(*(int(value) for value in info))
+        return engine
+
+    def fee_growth_inside(self, lower_tick, upper_tick):
+        bounds = (lower_tick, upper_tick)
+        fee_growth = self._fee_growth_inside.get(bounds)
+        if fee_growth is None:
+            fee_growth = self._fee_growth_inside[bounds] = self.state.fee_growth_inside(lower_tick, upper_tick)
+        return fee_growth
+
+    def fees(self, owner, lower_tick, upper_tick):
+        # Pool.getFees(lowerTick, upperTick, owner)
+        info = self.positions.get((owner, lower_tick, upper_tick)) or PositionInfo()
+        return simulate_update(info, *self.fee_growth_inside(lower_tick, upper_tick))
+
+    def all_fees(self):
+        return {key: self.fees(*key) for key in self.positions}
+
+    def on_swap(self, event):
+        tick_before = self.state.tick
+        result = self.state.replay_swap(event)
+        if result is None:
+            return
+        # fees only accrued between the two prices, and only ticks in between were crossed
+        low = min(tick_before, result.tick)
+        high = max(tick_before, result.tick) + 1
+        self._invalidate(low, high)
+
+    def on_mint(self, event):
+        self._modify(event["owner"], int(event["tickLower"]), int(event["tickUpper"]), int(event["amount"]))
+
+    def on_burn(self, event):
+        amount0, amount1 = self._modify(event["owner"], int(event["tickLower"]), int(event["tickUpper"]), -int(event["amount"]))
+        if amount0 < 0 or amount1 < 0:
+            info = self.positions[(event["owner"], int(event["tickLower"]), int(event["tickUpper"]))]
+            # uint128(amount) truncates, the addition is checked
+            info.tokens_owed0 = _checked_add128(info.tokens_owed0, -amount0 & MAX_UINT128)
+            info.tokens_owed1 = _checked_add128(info.tokens_owed1, -amount1 & MAX_UINT128)
+
+    def on_collect(self, event):
+        info = self.positions.get((event["owner"], int(event["tickLower"]), int(event["tickUpper"])))
+        if info is None:
+            return
+        # the event holds what was actually paid out, already capped at tokensOwed
+        info.tokens_owed0 -= int(event["amount0"])
+        info.tokens_owed1 -= int(event["amount1"])
+
+    def _modify(self, owner, lower_tick, upper_tick, liquidity_delta):
+        amounts = self.state.modify_position(lower_tick, upper_tick, liquidity_delta)
+        # a tick that just got initialized has new outside values, the ranges using it change
+        self._invalidate(lower_tick, lower_tick + 1)
+        self._invalidate(upper_tick, upper_tick + 1)
+
+        key = (owner, lower_tick, upper_tick)
+        info = self.positions.get(key)
+        if info is None:
+            info = self.positions[key] = PositionInfo()
+        position_update(info, liquidity_delta, *self.fee_growth_inside(lower_tick, upper_tick))
+        return amounts
+
+    def _invalidate(self, low, high):
+        # drops the cached ranges [lowerTick, upperTick] that touch [low, high)
+        self._fee_growth_inside = {
+            bounds: fee_growth
+            for bounds, fee_growth in self._fee_growth_inside.items()
+            if bounds[1] < low or bounds[0] >= high
+        }
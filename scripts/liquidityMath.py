@@ -0,0 +1,42 @@
+# Python port of contracts/lib/LiquidityMath.sol
+
+from swapMath import mul_div, q96
+
+MAX_UINT128 = 2**128 - 1
+
+
+def get_liquidity_for_amount0(sqrt_price_a_x96, sqrt_price_b_x96, amount0):
+    if sqrt_price_a_x96 > sqrt_price_b_x96:
+        sqrt_price_a_x96, sqrt_price_b_x96 = sqrt_price_b_x96, sqrt_price_a_x96
+    intermediate = mul_div(sqrt_price_a_x96, sqrt_price_b_x96, q96)
+    # the uint128 downcast truncates silently
+    return mul_div(amount0, intermediate, sqrt_price_b_x96 - sqrt_price_a_x96) & MAX_UINT128
+
+
+def get_liquidity_for_amount1(sqrt_price_a_x96, sqrt_price_b_x96, amount1):
+    if sqrt_price_a_x96 > sqrt_price_b_x96:
+        sqrt_price_a_x96, sqrt_price_b_x96 = sqrt_price_b_x96, sqrt_price_a_x96
+    return mul_div(amount1, q96, sqrt_price_b_x96 - sqrt_price_a_x96) & MAX_UINT128
+
+
+def get_liquidity_for_amounts(sqrt_price_x96, sqrt_price_a_x96, sqrt_price_b_x96, amount0, amount1):
+    if sqrt_price_a_x96 > sqrt_price_b_x96:
+        sqrt_price_a_x96, sqrt_price_b_x96 = sqrt_price_b_x96, sqrt_price_a_x96
+
+    if sqrt_price_x96 <= sqrt_price_a_x96:
+        return get_liquidity_for_amount0(sqrt_price_a_x96, sqrt_price_b_x96, amount0)
+    if sqrt_price_x96 <= sqrt_price_b_x96:
+        liquidity0 = get_liquidity_for_amount0(sqrt_price_x96, sqrt_price_b_x96, amount0)
+        liquidity1 = get_liquidity_for_amount1(sqrt_price_a_x96, sqrt_price_x96, amount1)
+        return liquidity0 if liquidity0 < liquidity1 else liquidity1
+    return get_liquidity_for_amount1(sqrt_price_a_x96, sqrt_price_b_x96, amount1)
+
+
+def add_liquidity(x, y):
+    # checked uint128 arithmetic, like the contract
+    z = x + y
+    if z < 0:
+        raise OverflowError("addLiquidity underflow")
+    if z > MAX_UINT128:
+        raise OverflowError("addLiquidity overflow")
+    return z
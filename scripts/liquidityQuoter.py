@@ -0,0 +1,100 @@
+# Client side Quoter.quoteLiqInputToken0 / quoteLiqInputToken1 from a cached slot0
+from liquidityMath import get_liquidity_for_amounts
+from swapMath import MAX_UINT256, calc_amount0_delta, calc_amount1_delta, div_rounding_up, mul_div_rounding_up, q96
+from tickMath import get_sqrt_ratio_at_tick
+
+
+def _square(amount):
+    # amount ** 2 is checked in 0.8
+    result = amount * amount
+    if result > MAX_UINT256:
+        raise OverflowError("amount ** 2 overflow")
+    return result
+
+
+def quote_liq_input_token0(sqrt_price_x96, tick, lower_tick, upper_tick, amount_in_desired):
+    # the token1 amount that goes with amount_in_desired of token0, 0 unless lowerTick < tick < upperTick
+    amount1 = 0
+    if lower_tick < tick < upper_tick:
+        amount1 = mul_div_rounding_up(sqrt_price_x96, amount_in_desired, q96)
+        liquidity = get_liquidity_for_amounts(
+            sqrt_price_x96,
+            get_sqrt_ratio_at_tick(lower_tick),
+            get_sqrt_ratio_at_tick(upper_tick),
+            amount_in_desired,
+            _square(amount1),
+        )
+        amount1 = calc_amount1_delta(get_sqrt_ratio_at_tick(lower_tick), sqrt_price_x96, liquidity, False)
+    return amount1
+
+
+def quote_liq_input_token1(sqrt_price_x96, tick, lower_tick, upper_tick, amount_in_desired):
+    # the token0 amount that goes with amount_in_desired of token1, 0 unless lowerTick < tick < upperTick
+    amount0 = 0
+    if lower_tick < tick < upper_tick:
+        amount0 = div_rounding_up(amount_in_desired, div_rounding_up(sqrt_price_x96, q96))
+        liquidity = get_liquidity_for_amounts(
+            sqrt_price_x96,
+            get_sqrt_ratio_at_tick(lower_tick),
+            get_sqrt_ratio_at_tick(upper_tick),
+            _square(amount0),
+            amount_in_desired,
+        )
+        amount0 = calc_amount0_delta(sqrt_price_x96, get_sqrt_ratio_at_tick(upper_tick), liquidity, False)
+    return amount0
+
+
+class LiquidityQuoter:
+    """quoteLiqInputToken0/1 with the same arguments as the Quoter, without an eth_call per quote.
+
+    The pool address of every (tokenIn, tokenOut, fee) and the slot0 of every pool are read
+    once through factory.pools and pool_at(address).slot0(), then kept until a Swap event of
+    that pool comes in through on_swap (or a PoolCreated one through on_pool_created).
+    """
+
+    def __init__(self, factory, pool_at):
+        self.factory = factory
+        self.pool_at = pool_at
+        self.pool_addresses = {}
+        self.slot0s = {}
+
+    def pool_address(self, token_in, token_out, fee):
+        key = (token_in, token_out, fee)
+        address = self.pool_addresses.get(key)
+        if address is None:
+            address = self.pool_addresses[key] = self.factory.pools(token_in, token_out, fee)
+        return address
+
+    def slot0(self, address):
+        # keyed in lower case: factory.pools gives checksummed addresses, indexed events lower case ones
+        slot0 = self.slot0s.get(address.lower())
+        if slot0 is None:
+            sqrt_price_x96, tick = self.pool_at(address).slot0()[:2]
+            slot0 = self.slot0s[address.lower()] = (int(sqrt_price_x96), int(tick))
+        return slot0
+
+    def on_swap(self, event):
+        # event.address is the pool that emitted the Swap
+        self.slot0s[event.address.lower()] = (int(event["sqrtPriceX96"]), int(event["tick"]))
+
+    def on_pool_created(self, event):
+        # a pool looked up before it existed is cached as the zero address
+        tokens = {event["token0"].lower(), event["token1"].lower()}
+        fee = int(event["fee"])
+        for key in [key for key in self.pool_addresses if key[2] == fee and {key[0].lower(), key[1].lower()} == tokens]:
+            del self.pool_addresses[key]
+
+    def quote_liq_input_token0(self, token_in, token_out, fee, lower_tick, upper_tick, amount_in_desired):
+        sqrt_price_x96, tick = self.slot0(self.pool_address(token_in, token_out, fee))
+        return quote_liq_input_token0(sqrt_price_x96, tick, lower_tick, upper_tick, amount_in_desired)
+
+    def quote_liq_input_token1(self, token_in, token_out, fee, lower_tick, upper_tick, amount_in_desired):
+        sqrt_price_x96, tick = self.slot0(self.pool_address(token_in, token_out, fee))
+        return quote_liq_input_token1(sqrt_price_x96, tick, lower_tick, upper_tick, amount_in_desired)
+
+    def quote_liq_input_token0_many(self, requests):
+        # requests are (tokenIn, tokenOut, fee, lowerTick, upperTick, amountInDesired) tuples
+        return [self.quote_liq_input_token0(*request) for request in requests]
+
+    def quote_liq_input_token1_many(self, requests):
+        return [self.quote_liq_input_token1(*request) for request in requests]
@@ -0,0 +1,182 @@
+# Python replica of contracts/lib/Oracle.sol and of the oracle part of Pool (observe, swap writes)
+from collections import namedtuple
+
+Observation = namedtuple("Observation", ["timestamp", "tick_cumulative", "initialized"])
+
+MAX_CARDINALITY = 65535
+_EMPTY = Observation(0, 0, False)
+
+
+def _sub32(a, b):
+    # uint32 subtraction, checked in 0.8
+    if b > a:
+        raise OverflowError("uint32 underflow")
+    return a - b
+
+
+def _int_div(a, b):
+    # Solidity signed division truncates towards zero
+    quotient = abs(a) // abs(b)
+    return quotient if (a < 0) == (b < 0) else -quotient
+
+
+def transform(last, timestamp, tick):
+    return Observation(timestamp, last.tick_cumulative + tick * _sub32(timestamp, last.timestamp), True)
+
+
+def lte(time, a, b):
+    # a <= b for timestamps that may have wrapped around 2**32, both at or before time
+    if a <= time and b <= time:
+        return a <= b
+    a_adjusted = a if a > time else a + 2**32
+    b_adjusted = b if b > time else b + 2**32
+    return a_adjusted <= b_adjusted
+
+
+def mean_tick(tick_cumulative_start, tick_cumulative_end, seconds):
+    # arithmetic mean tick over a window, rounded towards negative infinity like OracleLibrary.consult
+    return (tick_cumulative_end - tick_cumulative_start) // seconds
+
+
+class Oracle:
+    """The observations ring buffer of one pool plus the slot0 fields the pool keeps for it.
+
+    Only the first cardinality_next slots are stored, the rest of the 65535 slots of the
+    contract can never be read before increaseObservationCardinalityNext grows into them.
+    """
+
+    def __init__(self, observations, index, cardinality, cardinality_next, tick):
+        self.observations = observations
+        self.index = index
+        self.cardinality = cardinality
+        self.cardinality_next = cardinality_next
+        self.tick = tick
+
+    @classmethod
+    def initialize(cls, time, tick):
+        # Pool.initialize
+        return cls([Observation(time, 0, True)], 0, 1, 1, tick)
+
+    @classmethod
+    def from_contract(cls, pool):
+        slot0 = pool.slot0()
+        tick, index, cardinality, cardinality_next = (int(value) for value in slot0[1:5])
+        observations = [Observation(int(timestamp), int(tick_cumulative), bool(initialized))
+                        for timestamp, tick_cumulative, initialized in (pool.observations(i) for i in range(cardinality_next))]
+        return cls(observations, index, cardinality, cardinality_next, tick)
+
+    def write(self, timestamp, tick):
+        # Oracle.write for the tick the pool had before the swap
+        last = self.observations[self.index]
+        if last.timestamp == timestamp:
+            return
+        if self.cardinality_next > self.cardinality and self.index == self.cardinality - 1:
+            self.cardinality = self.cardinality_next
+        self.index = (self.index + 1) % self.cardinality
+        self.observations[self.index] = transform(last, timestamp, tick)
+
+    def grow(self, cardinality_next):
+        # Pool.increaseObservationCardinalityNext, the grown slots get timestamp 1 like in the contract
+        cardinality_next = min(cardinality_next, MAX_CARDINALITY)
+        if cardinality_next <= self.cardinality_next:
+            return
+        self.observations.extend(Observation(1, 0, False) for _ in range(cardinality_next - len(self.observations)))
+        self.cardinality_next = cardinality_next
+
+    def on_swap(self, event, timestamp):
+        # Pool.swap writes an observation with the previous tick when the tick moves
+        tick = int(event["tick"])
+        if tick != self.tick:
+            self.write(timestamp % 2**32, self.tick)
+            self.tick = tick
+
+    def on_increase_observation_cardinality_next(self, event):
+        self.grow(int(event["observationCardinalityNextNew"]))
+
+    def _get(self, i):
+        return self.observations[i] if i < len(self.observations) else _EMPTY
+
+    def _binary_search(self, time, target):
+        cardinality = self.cardinality
+        left = (self.index + 1) % cardinality  # oldest observation
+        right = left + cardinality - 1  # newest observation
+        while True:
+            i = (left + right) // 2
+            before_or_at = self._get(i % cardinality)
+            if not before_or_at.initialized:
+                left = i + 1
+                continue
+            at_or_after = self._get((i + 1) % cardinality)
+            target_at_or_after = lte(time, before_or_at.timestamp, target)
+            if target_at_or_after and lte(time, target, at_or_after.timestamp):
+                return before_or_at, at_or_after
+            if not target_at_or_after:
+                if i == 0:
+                    raise OverflowError("binarySearch underflow")
+                right = i - 1
+            else:
+                left = i + 1
+
+    def _get_surrounding_observations(self, time, target):
+        before_or_at = self.observations[self.index]
+        if lte(time, before_or_at.timestamp, target):
+            if before_or_at.timestamp == target:
+                return before_or_at, _EMPTY
+            return before_or_at, transform(before_or_at, target, self.tick)
+
+        before_or_at = self._get((self.index + 1) % self.cardinality)
+        if not before_or_at.initialized:
+            before_or_at = self.observations[0]
+        if not lte(time, before_or_at.timestamp, target):
+            raise ValueError("OLD")
+        return self._binary_search(time, target)
+
+    def observe_single(self, time, seconds_ago):
+        time %= 2**32
+        if seconds_ago == 0:
+            last = self.observations[self.index]
+            if last.timestamp != time:
+                last = transform(last, time, self.tick)
+            return last.tick_cumulative
+
+        target = _sub32(time, seconds_ago)
+        before_or_at, at_or_after = self._get_surrounding_observations(time, target)
+        if target == before_or_at.timestamp:
+            return before_or_at.tick_cumulative
+        if target == at_or_after.timestamp:
+            return at_or_after.tick_cumulative
+        observation_time_delta = _sub32(at_or_after.timestamp, before_or_at.timestamp)
+        target_delta = _sub32(target, before_or_at.timestamp)
+        # divided before multiplying, the contract loses the same precision
+        return before_or_at.tick_cumulative + _int_div(
+            at_or_after.tick_cumulative - before_or_at.tick_cumulative, observation_time_delta
+        ) * target_delta
+
+    def observe(self, time, seconds_agos):
+        # Pool.observe(secondsAgos) at block timestamp time
+        return [self.observe_single(time, seconds_ago) for seconds_ago in seconds_agos]
+
+    def twap(self, time, window):
+        tick_cumulative_start, tick_cumulative_end = self.observe(time, [window, 0])
+        return mean_tick(tick_cumulative_start, tick_cumulative_end, window)
+
+
+def twaps(oracles, time, windows):
+    """Mean ticks of many pools over many windows, one row per oracle and one column per window.
+
+    Each oracle is observed once for all the windows, with the current cumulative shared;
+    a window reaching past the oldest observation of a pool gives None.
+    """
+    rows = []
+    for oracle in oracles:
+        tick_cumulative_end = oracle.observe_single(time, 0)
+        row = []
+        for window in windows:
+            try:
+                tick_cumulative_start = oracle.observe_single(time, window)
+            except (ValueError, OverflowError):
+                row.append(None)
+                continue
+            row.append(mean_tick(tick_cumulative_start, tick_cumulative_end, window))
+        rows.append(row)
+    return rows
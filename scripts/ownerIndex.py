@@ -0,0 +1,82 @@
+# owner -> tokenIds of the position NFT from its Transfer events, instead of the
+# tokenId 0..nextTokenId scan of NFT.tokensOfOwner and the userToAllPositions* views
+from eventIndexer import read_events
+
+ZERO_ADDRESS = "0x" + "0" * 40
+
+
+class OwnerIndex:
+    """Who owns which position NFT, kept from the ERC721 Transfer events (mints and burns included).
+
+    A mint is a Transfer from the zero address and a burn one to it, so replaying the
+    Transfers in chain order gives ownerOf for every live token. Replaying the Transfers of a
+    block again, in order, ends in the same state, so catch_up can restart from the block it
+    stopped at. Addresses are lower case.
+    With nft_address set, Transfers of other contracts (ERC20 Transfers share the signature)
+    are ignored.
+    """
+
+    def __init__(self, nft_address=None):
+        self.nft_address = nft_address.lower() if nft_address is not None else None
+        self.owners = {}
+        self.tokens = {}
+        # tokenId -> (pool, lowerTick, upperTick), NFT.positions never changes while a token lives
+        self.positions = {}
+        self.block_number = 0
+
+    @classmethod
+    def from_db(cls, db, nft_address=None, to_block=None):
+        index = cls(nft_address)
+        index.catch_up(db, to_block)
+        return index
+
+    def catch_up(self, db, to_block=None):
+        # applies the Transfers the EventIndexer stored from the last block seen on
+        for event in read_events(db, ["Transfer"], self.block_number, to_block, self.nft_address):
+            self.on_transfer(event)
+
+    def on_event(self, event):
+        if event.name == "Transfer" and (self.nft_address is None or event.address.lower() == self.nft_address):
+            self.on_transfer(event)
+
+    def on_transfer(self, event):
+        recipient, token_id = event["to"].lower(), int(event["id"])
+        # the owner we know rather than the sender, so a replayed Transfer cannot leave a copy behind
+        owned = self.tokens.get(self.owners.get(token_id))
+        if owned is not None:
+            owned.discard(token_id)
+            if not owned:
+                del self.tokens[self.owners[token_id]]
+        if recipient == ZERO_ADDRESS:
+            self.owners.pop(token_id, None)
+            self.positions.pop(token_id, None)
+        else:
+            self.owners[token_id] = recipient
+            self.tokens.setdefault(recipient, set()).add(token_id)
+        block_number = getattr(event, "block_number", None)
+        if block_number is not None:
+            self.block_number = max(self.block_number, block_number)
+
+    def owner_of(self, token_id):
+        return self.owners.get(token_id)
+
+    def balance_of(self, owner):
+        return len(self.tokens.get(owner.lower(), ()))
+
+    def tokens_of_owner(self, owner):
+        # NFT.tokensOfOwner: the live tokens of owner, lowest tokenId first
+        return sorted(self.tokens.get(owner.lower(), ()))
+
+    def positions_of_owner(self, owner, nft):
+        """(tokenId, pool, lowerTick, upperTick) of every token of owner, the static part of userToAllPositionsOne.
+
+        nft.positions(tokenId) is only read for the tokens not seen before.
+        """
+        result = []
+        for token_id in self.tokens_of_owner(owner):
+            position = self.positions.get(token_id)
+            if position is None:
+                pool, lower_tick, upper_tick = nft.positions(token_id)
+                position = self.positions[token_id] = (pool, int(lower_tick), int(upper_tick))
+            result.append((token_id,) + position)
+        return result
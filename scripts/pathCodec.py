@@ -0,0 +1,100 @@
+# Python mirror of contracts/lib/Path.sol: tokenIn (20 bytes) | fee (3 bytes) | token (20 bytes) | fee | ...
+# Decoding works on memoryviews, so walking a path with skip_token never copies it.
+
+ADDR_SIZE = 20
+FEE_SIZE = 3
+NEXT_OFFSET = ADDR_SIZE + FEE_SIZE
+POP_OFFSET = NEXT_OFFSET + ADDR_SIZE
+MULTIPLE_POOLS_MIN_LENGTH = POP_OFFSET + NEXT_OFFSET
+
+
+def as_view(path):
+    # bytes, bytearray and memoryview are used in place, hex strings have to be parsed once
+    if isinstance(path, str):
+        path = bytes.fromhex(path[2:] if path[:2] in ("0x", "0X") else path)
+    return memoryview(path)
+
+
+def token_bytes(token):
+    if isinstance(token, str):
+        data = bytes.fromhex(token[2:] if token[:2] in ("0x", "0X") else token)
+    else:
+        data = bytes(token)
+    if len(data) != ADDR_SIZE:
+        raise ValueError("Token address must be 20 bytes: " + repr(token))
+    return data
+
+
+def fee_bytes(fee):
+    return int(fee).to_bytes(FEE_SIZE, "big")
+
+
+def encode_path(tokens, fees):
+    if len(tokens) != len(fees) + 1:
+        raise ValueError("A path needs one more token than fees")
+    parts = [token_bytes(tokens[0])]
+    for fee, token in zip(fees, tokens[1:]):
+        parts.append(fee_bytes(fee))
+        parts.append(token_bytes(token))
+    return b"".join(parts)
+
+
+def encode_hops(hops):
+    # [tokenIn, fee, token, fee, ..., tokenOut], the list append_hex takes
+    return encode_path(hops[::2], hops[1::2])
+
+
+def encode_paths(paths):
+    """Encodes many [token, fee, token, ...] lists at once.
+
+    Routes share tokens and fee tiers, so every address and fee is converted to bytes a
+    single time for the whole batch.
+    """
+    cache = {}
+    encoded = []
+    for hops in paths:
+        parts = []
+        for index, hop in enumerate(hops):
+            part = cache.get(hop)
+            if part is None:
+                part = cache[hop] = fee_bytes(hop) if index % 2 else token_bytes(hop)
+            parts.append(part)
+        encoded.append(b"".join(parts))
+    return encoded
+
+
+def has_multiple_pools(path):
+    return len(path) >= MULTIPLE_POOLS_MIN_LENGTH
+
+
+def num_pools(path):
+    return (len(path) - ADDR_SIZE) // NEXT_OFFSET
+
+
+def get_first_pool(path):
+    return as_view(path)[:POP_OFFSET]
+
+
+def skip_token(path):
+    return as_view(path)[NEXT_OFFSET:]
+
+
+def decode_first_pool(path):
+    view = as_view(path)
+    if len(view) < POP_OFFSET:
+        raise ValueError("Path is too short for a pool")
+    token_in = "0x" + view[:ADDR_SIZE].hex()
+    fee = int.from_bytes(view[ADDR_SIZE:NEXT_OFFSET], "big")
+    token_out = "0x" + view[NEXT_OFFSET:POP_OFFSET].hex()
+    return token_in, token_out, fee
+
+
+def decode_path(path):
+    # every (tokenIn, tokenOut, fee) of the path, walked the same way quoteMulti and swapMulti do
+    view = as_view(path)
+    pools = []
+    while True:
+        pools.append(decode_first_pool(view))
+        if not has_multiple_pools(view):
+            return pools
+        view = skip_token(view)
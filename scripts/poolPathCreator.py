@@ -1,67 +1,341 @@
-from collections import deque
-
-# Function to find the shortest path
-def find_shortest_path(trading_pairs, start_crypto, target_crypto):
-    # Create a graph using the trading pairs and weights
-    graph = {}
-    weights = {}
-    
-    for pair in trading_pairs:
-        source, destination, weight = pair.split("/")
-        if source not in graph:
-            graph[source] = []
-        if destination not in graph:
-            graph[destination] = []
-        graph[source].append(destination)
-        graph[destination].append(source)
-        weights[(source, destination)] = float(weight)
-        weights[(destination, source)] = float(weight)
-
-    # Perform BFS to find the shortest path
-    queue = deque([(start_crypto, [])])
-    visited = set()
-
-    while queue:
-        current_crypto, path = queue.popleft()
-        if current_crypto == target_crypto:
-            return path + [current_crypto]
-
-        if current_crypto in visited:
-            continue
-
-        visited.add(current_crypto)
-
-        if current_crypto not in graph:
-            continue
-
-        for neighbor in graph[current_crypto]:
-            queue.append((neighbor, path + [current_crypto]))
-
-    return None
-
-
-# Example usage
-if __name__ == "__main__":
-    # Define the trading pairs and their weights
-    trading_pairs = [
-        "ETH/USDT/3000",
-        "USDC/USDT/100",
-        "LINK/USDC/500",
-        "ETH/USDC/500",
-        "ETH/BCH/500",
-    ]
-
-    # Define the start and target cryptocurrencies
-    start_crypto = "ETH"
-    target_crypto = "LINK"
-
-    # Find the shortest path to exchange one crypto for another
-    path = find_shortest_path(trading_pairs, start_crypto, target_crypto)
-
-    if path is not None:
-        print("Shortest path:", " -> ".join(path))
-    else:
-        print("No path found.")
-
-
-        
\ No newline at end of file
+import heapq
+import math
+from collections import namedtuple
+
+from pathCodec import encode_path
+
+
+# Cost of going through a pool with the given fee (in hundredths of a bip, like the contracts).
+# Costs are -log(1 - fee) so summing them along a route ranks routes by the total fee taken.
+def fee_cost(fee):
+    return -math.log1p(-float(fee) / 1e6)
+
+
+# A concrete pool between two tokens. Several pools can connect the same pair, one per fee tier.
+class PoolEdge(namedtuple("PoolEdge", ["token0", "token1", "fee", "address"])):
+    __slots__ = ()
+
+    @property
+    def key(self):
+        return (self.token0, self.token1, self.fee)
+
+    def other(self, token):
+        return self.token1 if token == self.token0 else self.token0
+
+
+def sort_tokens(token_a, token_b):
+    # same ordering as PoolFactory.createPool (lower case hex compares like the addresses)
+    return (token_a, token_b) if token_a.lower() < token_b.lower() else (token_b, token_a)
+
+
+class Route:
+    """A path through the graph: the tokens visited and the pool used for every hop."""
+
+    __slots__ = ("tokens", "pools", "cost")
+
+    def __init__(self, tokens, pools, cost):
+        self.tokens = tokens
+        self.pools = pools
+        self.cost = cost
+
+    def __len__(self):
+        return len(self.pools)
+
+    def __eq__(self, other):
+        return isinstance(other, Route) and self.tokens == other.tokens and self.pools == other.pools
+
+    def __hash__(self):
+        return hash((tuple(self.tokens), tuple(self.pools)))
+
+    def __repr__(self):
+        return "Route(" + " -> ".join(str(hop) for hop in self.hops()) + ")"
+
+    @property
+    def fees(self):
+        return [pool.fee for pool in self.pools]
+
+    def hops(self):
+        # [tokenIn, fee, token, fee, ..., tokenOut], the layout append_hex expects
+        hops = [self.tokens[0]]
+        for pool, token in zip(self.pools, self.tokens[1:]):
+            hops.append(pool.fee)
+            hops.append(token)
+        return hops
+
+    def encode(self):
+        # hex path for SwapManager.swapMulti / Quoter.quoteMulti, lower case; the bytes of append_hex(self.hops())
+        return "0x" + encode_path(self.tokens, self.fees).hex()
+
+
+class TokenGraph:
+    """Multigraph of tokens where every edge is a pool, built once and routed on many times.
+
+    Tokens are matched case-insensitively: checksummed (brownie) and lower case (indexed
+    logs) spellings of an address are the same node, kept under the first spelling seen.
+    """
+
+    def __init__(self):
+        self.graph = {}
+        self.pools = {}
+        # lower case token -> the spelling the graph uses for it
+        self.names = {}
+
+    @classmethod
+    def from_trading_pairs(cls, trading_pairs):
+        graph = cls()
+        for pair in trading_pairs:
+            source, destination, weight = pair.split("/")
+            graph.add_pool(source, destination, int(weight))
+        return graph
+
+    @classmethod
+    def from_created_pools(cls, tokens0, tokens1, fees, addresses=None):
+        # the three arrays returned by PoolFactory.getCreatedPools()
+        graph = cls()
+        if addresses is None:
+            addresses = [None] * len(fees)
+        for token0, token1, fee, address in zip(tokens0, tokens1, fees, addresses):
+            graph.add_pool(token0, token1, int(fee), address)
+        return graph
+
+    @property
+    def tokens(self):
+        return self.graph.keys()
+
+    def token(self, token):
+        # the spelling of token used in the graph, token itself when it is not in it
+        return self.names.get(token.lower(), token)
+
+    def add_pool(self, token_a, token_b, fee, address=None):
+        token_a = self.names.setdefault(token_a.lower(), token_a)
+        token_b = self.names.setdefault(token_b.lower(), token_b)
+        token0, token1 = sort_tokens(token_a, token_b)
+        key = (token0, token1, fee)
+        existing = self.pools.get(key)
+        if existing is not None:
+            if address is None or (existing.address is not None and existing.address.lower() == address.lower()):
+                return existing
+            # same pool seen again with its address, replace it in place
+            pool = PoolEdge(token0, token1, fee, address)
+            for token in (token0, token1):
+                edges = self.graph[token]
+                edges[edges.index(existing)] = pool
+            self.pools[key] = pool
+            return pool
+
+        pool = PoolEdge(token0, token1, fee, address)
+        self.pools[key] = pool
+        self.graph.setdefault(token0, []).append(pool)
+        self.graph.setdefault(token1, []).append(pool)
+        return pool
+
+    def get_pool(self, token_a, token_b, fee):
+        return self.pools.get(sort_tokens(self.token(token_a), self.token(token_b)) + (fee,))
+
+    def edges(self, token):
+        return self.graph.get(self.token(token), ())
+
+    def shortest_route(self, start_crypto, target_crypto, cost=None):
+        # Dijkstra over the pool costs, keeping a parent pointer per token instead of a copy of the path.
+        # Parallel pools between the same tokens are separate edges, so the cheapest fee tier wins.
+        if cost is None:
+            cost = _pool_fee_cost
+        start_crypto, target_crypto = self.token(start_crypto), self.token(target_crypto)
+        if start_crypto == target_crypto:
+            return Route([start_crypto], [], 0.0)
+        if start_crypto not in self.graph or target_crypto not in self.graph:
+            return None
+
+        costs = {start_crypto: 0.0}
+        parents = {start_crypto: None}
+        heap = [(0.0, start_crypto)]
+        visited = set()
+
+        while heap:
+            current_cost, current_crypto = heapq.heappop(heap)
+            if current_crypto in visited:
+                continue
+            if current_crypto == target_crypto:
+                break
+            visited.add(current_crypto)
+
+            for pool in self.graph[current_crypto]:
+                neighbor = pool.other(current_crypto)
+                if neighbor in visited:
+                    continue
+                new_cost = current_cost + cost(pool)
+                if new_cost < costs.get(neighbor, math.inf):
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = pool
+                    heapq.heappush(heap, (new_cost, neighbor))
+
+        if target_crypto not in parents:
+            return None
+        return _build_route(parents, target_crypto, costs[target_crypto])
+
+    def bounded_routes(self, start_crypto, max_hops, cost=None, banned_tokens=(), banned_pools=()):
+        # Cheapest route to every token reachable in at most max_hops pools (hop limited Bellman-Ford).
+        # Every layer only relaxes the tokens that improved in the previous one.
+        if cost is None:
+            cost = _pool_fee_cost
+        start_crypto = self.token(start_crypto)
+        if start_crypto not in self.graph:
+            return {}
+
+        # token -> [(layer, cost, pool, previous token)], one entry per improvement
+        improvements = {start_crypto: [(0, 0.0, None, None)]}
+        best = {start_crypto: 0.0}
+        frontier = {start_crypto: 0.0}
+
+        for layer in range(1, max_hops + 1):
+            next_frontier = {}
+            for current_crypto, current_cost in frontier.items():
+                for pool in self.graph[current_crypto]:
+                    if pool in banned_pools:
+                        continue
+                    neighbor = pool.other(current_crypto)
+                    if neighbor in banned_tokens or neighbor == start_crypto:
+                        continue
+                    new_cost = current_cost + cost(pool)
+                    if new_cost < best.get(neighbor, math.inf) and new_cost < next_frontier.get(neighbor, math.inf):
+                        next_frontier[neighbor] = new_cost
+                        improvement = (layer, new_cost, pool, current_crypto)
+                        entries = improvements.setdefault(neighbor, [])
+                        if entries and entries[-1][0] == layer:
+                            entries[-1] = improvement
+                        else:
+                            entries.append(improvement)
+            if not next_frontier:
+                break
+            best.update(next_frontier)
+            frontier = next_frontier
+
+        routes = {}
+        for token in improvements:
+            if token != start_crypto:
+                routes[token] = _build_bounded_route(improvements, token, max_hops)
+        return routes
+
+    def k_shortest_routes(self, start_crypto, target_crypto, k, max_hops=3, cost=None):
+        # Yen's algorithm: the k cheapest loopless routes using at most max_hops pools, cheapest first
+        if cost is None:
+            cost = _pool_fee_cost
+        start_crypto, target_crypto = self.token(start_crypto), self.token(target_crypto)
+        if start_crypto == target_crypto:
+            return []
+        first = self.bounded_routes(start_crypto, max_hops, cost).get(target_crypto)
+        if first is None:
+            return []
+
+        routes = [first]
+        seen = {first}
+        candidates = []
+        counter = 0
+
+        while len(routes) < k:
+            last = routes[-1]
+            for spur_index in range(len(last.pools)):
+                spur_crypto = last.tokens[spur_index]
+                root_tokens = last.tokens[:spur_index + 1]
+                root_pools = last.pools[:spur_index]
+
+                # pools already used after this root by the routes we kept
+                banned_pools = {
+                    route.pools[spur_index]
+                    for route in routes
+                    if len(route.pools) > spur_index and route.pools[:spur_index] == root_pools
+                }
+                spur = self.bounded_routes(
+                    spur_crypto,
+                    max_hops - spur_index,
+                    cost,
+                    banned_tokens=set(root_tokens[:-1]),
+                    banned_pools=banned_pools,
+                ).get(target_crypto)
+                if spur is None:
+                    continue
+
+                root_cost = sum(cost(pool) for pool in root_pools)
+                candidate = Route(root_tokens[:-1] + spur.tokens, root_pools + spur.pools, root_cost + spur.cost)
+                if candidate not in seen:
+                    seen.add(candidate)
+                    counter += 1
+                    heapq.heappush(candidates, (candidate.cost, counter, candidate))
+
+            if not candidates:
+                break
+            routes.append(heapq.heappop(candidates)[2])
+
+        return routes
+
+    def shortest_path(self, start_crypto, target_crypto):
+        route = self.shortest_route(start_crypto, target_crypto)
+        return None if route is None else route.tokens
+
+
+def _pool_fee_cost(pool):
+    return fee_cost(pool.fee)
+
+
+def _build_bounded_route(improvements, target_crypto, max_hops):
+    tokens = [target_crypto]
+    pools = []
+    layer = max_hops
+    total = None
+    while True:
+        # the last improvement of this token that fits in the hops left
+        for entry_layer, entry_cost, pool, previous in reversed(improvements[tokens[-1]]):
+            if entry_layer <= layer:
+                break
+        if total is None:
+            total = entry_cost
+        if pool is None:
+            break
+        pools.append(pool)
+        tokens.append(previous)
+        layer = entry_layer - 1
+    tokens.reverse()
+    pools.reverse()
+    return Route(tokens, pools, total)
+
+
+def _build_route(parents, target_crypto, cost):
+    tokens = [target_crypto]
+    pools = []
+    pool = parents[target_crypto]
+    while pool is not None:
+        pools.append(pool)
+        tokens.append(pool.other(tokens[-1]))
+        pool = parents[tokens[-1]]
+    tokens.reverse()
+    pools.reverse()
+    return Route(tokens, pools, cost)
+
+
+# Function to find the cheapest path
+def find_shortest_path(trading_pairs, start_crypto, target_crypto):
+    return TokenGraph.from_trading_pairs(trading_pairs).shortest_path(start_crypto, target_crypto)
+
+
+# Example usage
+if __name__ == "__main__":
+    # Define the trading pairs and their weights
+    trading_pairs = [
+        "ETH/USDT/3000",
+        "USDC/USDT/100",
+        "LINK/USDC/500",
+        "ETH/USDC/500",
+        "ETH/BCH/500",
+    ]
+
+    # Define the start and target cryptocurrencies
+    start_crypto = "ETH"
+    target_crypto = "LINK"
+
+    # Find the cheapest path to exchange one crypto for another
+    route = TokenGraph.from_trading_pairs(trading_pairs).shortest_route(start_crypto, target_crypto)
+
+    if route is not None:
+        print("Shortest path:", " -> ".join(str(hop) for hop in route.hops()))
+    else:
+        print("No path found.")
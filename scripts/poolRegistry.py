@@ -0,0 +1,117 @@
+# Local copy of PoolFactory.createdPools / pools, kept up to date incrementally
+from eventIndexer import Event, read_events
+from poolPathCreator import TokenGraph
+
+ZERO_ADDRESS = "0x" + "0" * 40
+
+
+def revert_errors():
+    # what a reverted call raises with brownie and with web3, whichever are installed
+    errors = []
+    try:
+        from brownie.exceptions import VirtualMachineError
+
+        errors.append(VirtualMachineError)
+    except ImportError:
+        pass
+    try:
+        from web3.exceptions import ContractLogicError
+
+        errors.append(ContractLogicError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+class PoolRegistry:
+    """Every pool of a PoolFactory, without calling getCreatedPools again and again.
+
+    sync() only reads the createdPools(i) entries past the ones it already read (plus
+    factory.pools for their address), and on_event / on_pool_created follow PoolCreated logs
+    instead, e.g. from EventIndexer.subscribe. Addresses are kept in lower case. Every new
+    pool is announced to the subscribers as a PoolCreated event (token0, token1, fee, pool),
+    so RoutingTable.on_pool_created or LiquidityQuoter.on_pool_created can be subscribed as is.
+    reverts are the exceptions of a reverted call (default: those of brownie and web3).
+    """
+
+    def __init__(self, factory=None, address=None, reverts=None):
+        self.factory = factory
+        self.reverts = reverts if reverts is not None else revert_errors()
+        self.address = (address or getattr(factory, "address", None) or ZERO_ADDRESS).lower()
+        # (token0, token1, fee, pool) in createdPools order
+        self.created = []
+        self.by_key = {}
+        # next createdPools index to read; pools known from logs do not move it, as the logs
+        # may start after the factory was deployed and miss the first pools
+        self.synced = 0
+        self.subscribers = []
+
+    @classmethod
+    def from_db(cls, db, factory=None, address=None, reverts=None):
+        # the PoolCreated events an EventIndexer stored
+        registry = cls(factory, address, reverts)
+        for event in read_events(db, ["PoolCreated"]):
+            registry.on_pool_created(event)
+        return registry
+
+    def __len__(self):
+        return len(self.created)
+
+    def subscribe(self, callback):
+        # callback(event) for every pool added from now on
+        self.subscribers.append(callback)
+
+    def get(self, token_a, token_b, fee):
+        token_a, token_b = token_a.lower(), token_b.lower()
+        key = (token_a, token_b, fee) if token_a < token_b else (token_b, token_a, fee)
+        return self.by_key.get(key)
+
+    def pools(self, token_a, token_b, fee):
+        # same as the PoolFactory.pools getter, so the registry can stand in for the factory
+        return self.get(token_a, token_b, fee) or ZERO_ADDRESS
+
+    def sync(self):
+        """Reads the pools created since the last sync, returns the new PoolCreated events.
+
+        The factory has no getter for the length of createdPools, so entries are read until
+        one reverts. Any other error of the node is raised; the pools added before it were
+        already announced, and the next sync carries on from the entry that failed.
+        """
+        added = []
+        while True:
+            try:
+                token0, token1, fee = self.factory.createdPools(self.synced)
+            except self.reverts:
+                return added
+            fee = int(fee)
+            if self.get(token0, token1, fee) is None:
+                # else already known from the logs
+                pool = self.factory.pools(token0, token1, fee)
+                added.append(self._add(token0, token1, fee, pool))
+            self.synced += 1
+
+    def on_event(self, event):
+        if event.name == "PoolCreated":
+            self.on_pool_created(event)
+
+    def on_pool_created(self, event):
+        return self._add(event["token0"], event["token1"], int(event["fee"]), event["pool"])
+
+    def _add(self, token0, token1, fee, pool):
+        token0, token1, pool = token0.lower(), token1.lower(), pool.lower()
+        key = (token0, token1, fee)
+        if key in self.by_key:
+            return None
+        self.by_key[key] = pool
+        self.created.append((token0, token1, fee, pool))
+        event = Event("PoolCreated", self.address, None, None, None, {"token0": token0, "token1": token1, "fee": fee, "pool": pool})
+        for callback in self.subscribers:
+            callback(event)
+        return event
+
+    def graph(self):
+        # a TokenGraph of every known pool, with its address
+        graph = TokenGraph()
+        for token0, token1, fee, pool in self.created:
+            graph.add_pool(token0, token1, fee, pool)
+        return graph
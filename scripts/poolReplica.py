@@ -0,0 +1,126 @@
+# A PoolState kept in sync with the chain from the pool events alone, seeded by one storage read
+from eventIndexer import read_events
+from feeEngine import FeeEngine
+from poolSimulator import PoolState
+
+REPLICA_EVENTS = ("Mint", "Burn", "Swap", "Collect")
+
+
+class PoolReplica:
+    """A pool snapshot that follows Mint, Burn and Swap events instead of re-reading storage.
+
+    Mint and Burn go through PoolState.modify_position (tick liquidityGross / liquidityNet,
+    bitmap flips, active liquidity) and Swap through PoolState.replay_swap, which also moves
+    the fee growth and the crossed ticks. With a fee_engine the events go through it instead,
+    so it keeps the positions and their owed fees up to date too.
+
+    If a Swap does not replay (the snapshot missed something) its sqrtPriceX96, tick and
+    liquidity are taken from the payload as they are; prices and quotes stay right but the
+    fee growth does not, and in_sync turns False until the replica is seeded again.
+
+    block_number and log_index are the last event already in the state, anything at or
+    before them is skipped, so a snapshot read at block B can be fed the logs from B on.
+    """
+
+    def __init__(self, state, block_number=-1, log_index=None, fee_engine=None):
+        self.state = state
+        self.fee_engine = fee_engine
+        self.block_number = block_number
+        # None: the snapshot has the whole block
+        self.log_index = log_index
+        self.in_sync = True
+
+    @classmethod
+    def from_contract(cls, pool, block_number, min_word=None, max_word=None, positions=None):
+        # pool is read at block_number; positions (owner, lowerTick, upperTick) also follow their fees
+        state = PoolState.from_contract(pool, min_word, max_word)
+        fee_engine = FeeEngine.from_contract(pool, state, positions) if positions is not None else None
+        return cls(state, block_number, fee_engine=fee_engine)
+
+    @property
+    def address(self):
+        return self.state.address
+
+    def is_new(self, event):
+        block_number = getattr(event, "block_number", None)
+        if block_number is None:
+            # events without a position (e.g. from a transaction receipt) are always applied
+            return True
+        if block_number != self.block_number:
+            return block_number > self.block_number
+        return self.log_index is not None and event.log_index > self.log_index
+
+    def apply(self, event):
+        """Applies one event of this pool, returns False when it was skipped."""
+        if event.name not in REPLICA_EVENTS or not self.is_new(event):
+            return False
+        if event.name == "Mint":
+            self.on_mint(event)
+        elif event.name == "Burn":
+            self.on_burn(event)
+        elif event.name == "Swap":
+            self.on_swap(event)
+        elif self.fee_engine is not None:
+            self.fee_engine.on_collect(event)
+        block_number = getattr(event, "block_number", None)
+        if block_number is not None:
+            self.block_number = block_number
+            self.log_index = event.log_index
+        return True
+
+    def on_mint(self, event):
+        if self.fee_engine is not None:
+            self.fee_engine.on_mint(event)
+        else:
+            self.state.modify_position(int(event["tickLower"]), int(event["tickUpper"]), int(event["amount"]))
+
+    def on_burn(self, event):
+        if self.fee_engine is not None:
+            self.fee_engine.on_burn(event)
+        else:
+            self.state.modify_position(int(event["tickLower"]), int(event["tickUpper"]), -int(event["amount"]))
+
+    def on_swap(self, event):
+        try:
+            if self.fee_engine is not None:
+                self.fee_engine.on_swap(event)
+            else:
+                self.state.replay_swap(event)
+        except ValueError:
+            self.state.sqrt_price_x96 = int(event["sqrtPriceX96"])
+            self.state.tick = int(event["tick"])
+            self.state.liquidity = int(event["liquidity"])
+            self.in_sync = False
+
+    def catch_up(self, db, to_block=None):
+        # applies the events the indexer stored since the last one in the state, returns how many
+        if self.address is None:
+            raise ValueError("The replica needs the pool address to read its events")
+        applied = 0
+        for event in read_events(db, REPLICA_EVENTS, max(self.block_number, 0), to_block, self.address):
+            applied += self.apply(event)
+        return applied
+
+
+class PoolReplicas:
+    """The replicas of many pools, fed by one event stream (e.g. EventIndexer.subscribe)."""
+
+    def __init__(self, replicas=()):
+        self.replicas = {replica.address.lower(): replica for replica in replicas}
+
+    def __getitem__(self, address):
+        return self.replicas[address.lower()]
+
+    def add(self, replica):
+        self.replicas[replica.address.lower()] = replica
+
+    def on_event(self, event):
+        replica = self.replicas.get(event.address.lower())
+        return replica is not None and replica.apply(event)
+
+    def states(self):
+        # {(token0, token1, fee): PoolState} with lower case tokens, the pools argument of quote_multi
+        return {
+            (replica.state.token0.lower(), replica.state.token1.lower(), replica.state.fee): replica.state
+            for replica in self.replicas.values()
+        }
@@ -0,0 +1,472 @@
+# Off-chain replica of Pool.swap and of the Quoter built on top of it.
+# A PoolState is a local snapshot of slot0, liquidity, feeGrowthGlobal*X128, ticks and
+# tickBitmap; swapping it runs the same step loop as contracts/Pool.sol with the same
+# integer math, so amounts, sqrtPriceX96 and tick come out identical to the chain.
+from collections import namedtuple
+
+from liquidityMath import add_liquidity
+from pathCodec import decode_path
+from swapMath import calc_position_amounts, compute_swap_step, mul_div
+from tickBitmap import TickBitmap
+from tickMath import MAX_SQRT_RATIO, MAX_TICK, MIN_SQRT_RATIO, MIN_TICK, get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio
+
+q128 = 2**128
+MAX_UINT256 = 2**256 - 1
+
+# amount0 / amount1 are signed like the values Pool.swap returns, positive going into the pool
+SwapResult = namedtuple("SwapResult", ["amount0", "amount1", "sqrt_price_x96", "tick", "liquidity"])
+# what Quoter.quoteSingle returns
+QuoteResult = namedtuple("QuoteResult", ["amount_out", "sqrt_price_x96_after", "tick_after"])
+
+
+class InvalidPriceLimit(Exception):
+    pass
+
+
+class NotEnoughLiquidity(Exception):
+    pass
+
+
+class InvalidTickRange(Exception):
+    pass
+
+
+def _checked_sub(a, b):
+    # fee growth is plain uint256 arithmetic in the 0.8 contracts, an underflow reverts
+    if b > a:
+        raise OverflowError("fee growth underflow")
+    return a - b
+
+
+def _to_int128(value):
+    # explicit int128(...) downcast, truncates silently
+    value &= 2**128 - 1
+    return value - 2**128 if value >= 2**127 else value
+
+
+class TickInfo:
+    """Tick.Info, one initialized (or crossed) tick of the pool."""
+
+    __slots__ = ("initialized", "liquidity_gross", "liquidity_net", "fee_growth_outside0_x128", "fee_growth_outside1_x128")
+
+    def __init__(self, initialized=False, liquidity_gross=0, liquidity_net=0, fee_growth_outside0_x128=0, fee_growth_outside1_x128=0):
+        self.initialized = initialized
+        self.liquidity_gross = liquidity_gross
+        self.liquidity_net = liquidity_net
+        self.fee_growth_outside0_x128 = fee_growth_outside0_x128
+        self.fee_growth_outside1_x128 = fee_growth_outside1_x128
+
+    def copy(self):
+        return TickInfo(
+            self.initialized,
+            self.liquidity_gross,
+            self.liquidity_net,
+            self.fee_growth_outside0_x128,
+            self.fee_growth_outside1_x128,
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, TickInfo) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return "TickInfo(" + ", ".join(name + "=" + repr(getattr(self, name)) for name in self.__slots__) + ")"
+
+
+def get_fee_growth_inside(ticks, lower_tick, upper_tick, current_tick, fee_growth_global0_x128, fee_growth_global1_x128):
+    # Tick.getFeeGrowthInside, ticks that were never touched read as zero like in storage
+    lower = ticks.get(lower_tick) or TickInfo()
+    upper = ticks.get(upper_tick) or TickInfo()
+
+    if current_tick >= lower_tick:
+        below0, below1 = lower.fee_growth_outside0_x128, lower.fee_growth_outside1_x128
+    else:
+        below0 = _checked_sub(fee_growth_global0_x128, lower.fee_growth_outside0_x128)
+        below1 = _checked_sub(fee_growth_global1_x128, lower.fee_growth_outside1_x128)
+
+    if current_tick < upper_tick:
+        above0, above1 = upper.fee_growth_outside0_x128, upper.fee_growth_outside1_x128
+    else:
+        above0 = _checked_sub(fee_growth_global0_x128, upper.fee_growth_outside0_x128)
+        above1 = _checked_sub(fee_growth_global1_x128, upper.fee_growth_outside1_x128)
+
+    return (
+        _checked_sub(_checked_sub(fee_growth_global0_x128, below0), above0),
+        _checked_sub(_checked_sub(fee_growth_global1_x128, below1), above1),
+    )
+
+
+class PoolState:
+    """Local snapshot of a Pool contract that can be swapped against without a node."""
+
+    def __init__(
+        self,
+        sqrt_price_x96,
+        tick,
+        liquidity,
+        fee,
+        tick_spacing,
+        fee_growth_global0_x128=0,
+        fee_growth_global1_x128=0,
+        ticks=None,
+        tick_bitmap=None,
+        token0=None,
+        token1=None,
+        address=None,
+    ):
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.tick = tick
+        self.liquidity = liquidity
+        self.fee = fee
+        self.tick_spacing = tick_spacing
+        self.fee_growth_global0_x128 = fee_growth_global0_x128
+        self.fee_growth_global1_x128 = fee_growth_global1_x128
+        self.ticks = ticks if ticks is not None else {}
+        self.tick_bitmap = tick_bitmap if tick_bitmap is not None else TickBitmap()
+        self.token0 = token0
+        self.token1 = token1
+        self.address = address
+
+    @classmethod
+    def from_contract(cls, pool, min_word=None, max_word=None):
+        """Reads a snapshot from a deployed Pool (brownie contract or anything with the same getters).
+
+        Only the bitmap words in [min_word, max_word] are fetched, by default the whole tick range.
+        """
+        tick_spacing = int(pool.tickSpacing())
+        if min_word is None:
+            min_word = (MIN_TICK // tick_spacing) >> 8
+        if max_word is None:
+            max_word = (MAX_TICK // tick_spacing) >> 8
+
+        sqrt_price_x96, tick = pool.slot0()[:2]
+        state = cls(
+            int(sqrt_price_x96),
+            int(tick),
+            int(pool.liquidity()),
+            int(pool.fee()),
+            tick_spacing,
+            int(pool.feeGrowthGlobal0X128()),
+            int(pool.feeGrowthGlobal1X128()),
+            token0=pool.token0(),
+            token1=pool.token1(),
+            address=getattr(pool, "address", None),
+        )
+        for word_pos in range(min_word, max_word + 1):
+            word = int(pool.tickBitmap(word_pos))
+            if not word:
+                continue
+            state.tick_bitmap.words[word_pos] = word
+            for bit_pos in range(256):
+                if word >> bit_pos & 1:
+                    tick = ((word_pos << 8) + bit_pos) * tick_spacing
+                    state.ticks[tick] = TickInfo(*pool.ticks(tick))
+        return state
+
+    def copy(self):
+        return PoolState(
+            self.sqrt_price_x96,
+            self.tick,
+            self.liquidity,
+            self.fee,
+            self.tick_spacing,
+            self.fee_growth_global0_x128,
+            self.fee_growth_global1_x128,
+            {tick: info.copy() for tick, info in self.ticks.items()},
+            self.tick_bitmap.copy(),
+            self.token0,
+            self.token1,
+            self.address,
+        )
+
+    def update_tick(self, tick, liquidity_delta, upper):
+        # Tick.update, returns whether the tick flipped between initialized and not
+        info = self.ticks.get(tick)
+        if info is None:
+            info = self.ticks[tick] = TickInfo()
+
+        liquidity_before = info.liquidity_gross
+        liquidity_after = add_liquidity(liquidity_before, liquidity_delta)
+        flipped = (liquidity_after == 0) != (liquidity_before == 0)
+
+        if liquidity_before == 0:
+            # by convention, assume that all previous fees were collected below the tick
+            if tick <= self.tick:
+                info.fee_growth_outside0_x128 = self.fee_growth_global0_x128
+                info.fee_growth_outside1_x128 = self.fee_growth_global1_x128
+            info.initialized = True
+
+        info.liquidity_gross = liquidity_after
+        info.liquidity_net = _to_int128(info.liquidity_net - liquidity_delta if upper else info.liquidity_net + liquidity_delta)
+        return flipped
+
+    def modify_position(self, lower_tick, upper_tick, liquidity_delta):
+        """The tick, bitmap and liquidity part of Pool._modifyPosition, returns the signed (amount0, amount1)."""
+        if lower_tick >= upper_tick or lower_tick < MIN_TICK or upper_tick > MAX_TICK:
+            raise InvalidTickRange()
+
+        flipped_lower = self.update_tick(lower_tick, liquidity_delta, False)
+        flipped_upper = self.update_tick(upper_tick, liquidity_delta, True)
+        if flipped_lower:
+            self.tick_bitmap.flip_tick(lower_tick, self.tick_spacing)
+        if flipped_upper:
+            self.tick_bitmap.flip_tick(upper_tick, self.tick_spacing)
+
+        if lower_tick <= self.tick < upper_tick:
+            self.liquidity = add_liquidity(self.liquidity, liquidity_delta)
+        return calc_position_amounts(
+            self.sqrt_price_x96, self.tick, lower_tick, upper_tick,
+            get_sqrt_ratio_at_tick(lower_tick), get_sqrt_ratio_at_tick(upper_tick), liquidity_delta,
+        )
+
+    def fee_growth_inside(self, lower_tick, upper_tick):
+        return get_fee_growth_inside(
+            self.ticks, lower_tick, upper_tick, self.tick, self.fee_growth_global0_x128, self.fee_growth_global1_x128
+        )
+
+    def swap(self, zero_for_one, amount_specified, sqrt_price_limit_x96=0, commit=False, exact=True):
+        """Pool.swap for an exact input amount.
+
+        A sqrt_price_limit_x96 of 0 means no limit, the same MIN_SQRT_RATIO + 1 / MAX_SQRT_RATIO - 1
+        the Quoter puts in. The state is only changed when commit is True, so a failing swap
+        (InvalidPriceLimit, NotEnoughLiquidity, the ValueError of TickMath) leaves it untouched.
+
+        exact=False jumps straight to the next initialized tick instead of stopping at every
+        bitmap word (fast with a TickIndex). Each step rounds on its own, so over empty words
+        the amounts can then differ from the chain by a few wei.
+        """
+        result, crossed, fee_growth_global_x128 = self._simulate_swap(zero_for_one, amount_specified, sqrt_price_limit_x96, exact)
+        if commit:
+            self._apply_swap(zero_for_one, result, crossed, fee_growth_global_x128)
+        return result
+
+    def _simulate_swap(self, zero_for_one, amount_specified, sqrt_price_limit_x96, exact):
+        if sqrt_price_limit_x96 == 0:
+            sqrt_price_limit_x96 = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+
+        if zero_for_one:
+            if sqrt_price_limit_x96 > self.sqrt_price_x96 or sqrt_price_limit_x96 < MIN_SQRT_RATIO:
+                raise InvalidPriceLimit()
+        elif sqrt_price_limit_x96 < self.sqrt_price_x96 or sqrt_price_limit_x96 > MAX_SQRT_RATIO:
+            raise InvalidPriceLimit()
+
+        amount_remaining = amount_specified
+        amount_calculated = 0
+        sqrt_price_x96 = self.sqrt_price_x96
+        tick = self.tick
+        liquidity = self.liquidity
+        fee_growth_global_x128 = self.fee_growth_global0_x128 if zero_for_one else self.fee_growth_global1_x128
+        # tick -> (feeGrowthOutside0X128, feeGrowthOutside1X128) written by Tick.cross
+        crossed = {}
+
+        ticks = self.ticks
+        tick_spacing = self.tick_spacing
+        fee = self.fee
+        if exact:
+            next_initialized_tick = self.tick_bitmap.next_initialized_tick_within_one_word
+        else:
+            next_initialized_tick = self.tick_bitmap.next_initialized_tick
+
+        while amount_remaining > 0 and sqrt_price_x96 != sqrt_price_limit_x96:
+            sqrt_price_start_x96 = sqrt_price_x96
+            next_tick, _ = next_initialized_tick(tick, tick_spacing, zero_for_one)
+            sqrt_price_next_x96 = get_sqrt_ratio_at_tick(next_tick)
+
+            if zero_for_one:
+                target_x96 = sqrt_price_limit_x96 if sqrt_price_next_x96 < sqrt_price_limit_x96 else sqrt_price_next_x96
+            else:
+                target_x96 = sqrt_price_limit_x96 if sqrt_price_next_x96 > sqrt_price_limit_x96 else sqrt_price_next_x96
+
+            sqrt_price_x96, amount_in, amount_out, fee_amount = compute_swap_step(
+                sqrt_price_x96, target_x96, liquidity, amount_remaining, fee
+            )
+
+            amount_remaining -= amount_in + fee_amount
+            if amount_remaining < 0:
+                raise OverflowError("amountSpecifiedRemaining underflow")
+            amount_calculated += amount_out
+
+            if liquidity > 0:
+                fee_growth_global_x128 += mul_div(fee_amount, q128, liquidity)
+                if fee_growth_global_x128 > MAX_UINT256:
+                    raise OverflowError("feeGrowthGlobalX128 overflow")
+
+            if sqrt_price_x96 == sqrt_price_next_x96:
+                info = ticks.get(next_tick) or TickInfo()
+                if zero_for_one:
+                    fee_growth0, fee_growth1 = fee_growth_global_x128, self.fee_growth_global1_x128
+                else:
+                    fee_growth0, fee_growth1 = self.fee_growth_global0_x128, fee_growth_global_x128
+                crossed[next_tick] = (
+                    _checked_sub(fee_growth0, info.fee_growth_outside0_x128),
+                    _checked_sub(fee_growth1, info.fee_growth_outside1_x128),
+                )
+
+                liquidity_delta = -info.liquidity_net if zero_for_one else info.liquidity_net
+                liquidity = add_liquidity(liquidity, liquidity_delta)
+                if liquidity == 0:
+                    raise NotEnoughLiquidity()
+
+                tick = next_tick - 1 if zero_for_one else next_tick
+            elif sqrt_price_x96 != sqrt_price_start_x96:
+                tick = get_tick_at_sqrt_ratio(sqrt_price_x96)
+
+        amount_in_total = amount_specified - amount_remaining
+        if zero_for_one:
+            result = SwapResult(amount_in_total, -amount_calculated, sqrt_price_x96, tick, liquidity)
+        else:
+            result = SwapResult(-amount_calculated, amount_in_total, sqrt_price_x96, tick, liquidity)
+        return result, crossed, fee_growth_global_x128
+
+    def _apply_swap(self, zero_for_one, result, crossed, fee_growth_global_x128):
+        for crossed_tick, (fee_growth_outside0, fee_growth_outside1) in crossed.items():
+            info = self.ticks.get(crossed_tick)
+            if info is None:
+                # crossing an empty word boundary still writes to the ticks mapping
+                info = self.ticks[crossed_tick] = TickInfo()
+            info.fee_growth_outside0_x128 = fee_growth_outside0
+            info.fee_growth_outside1_x128 = fee_growth_outside1
+        self.sqrt_price_x96 = result.sqrt_price_x96
+        self.tick = result.tick
+        self.liquidity = result.liquidity
+        if zero_for_one:
+            self.fee_growth_global0_x128 = fee_growth_global_x128
+        else:
+            self.fee_growth_global1_x128 = fee_growth_global_x128
+
+    def replay_swap(self, event):
+        """Applies a Pool Swap event (amount0, amount1, sqrtPriceX96, liquidity, tick) to the state.
+
+        The event does not carry the price limit of the swap, so it is first replayed with its
+        input amount and no limit, which is what an exact input swap did; if that lands
+        elsewhere the swap stopped on its limit, and replaying the amount it used with the final
+        price as limit gives the same steps. Raises ValueError when neither matches the event,
+        i.e. the snapshot is not the state the swap ran on.
+        """
+        amount0 = int(event["amount0"])
+        amount1 = int(event["amount1"])
+        if amount0 <= 0 and amount1 <= 0:
+            # an empty swap leaves the pool as it was
+            return None
+        zero_for_one = amount0 > 0
+        amount_in = amount0 if zero_for_one else amount1
+        expected = (amount0, amount1, int(event["sqrtPriceX96"]), int(event["tick"]), int(event["liquidity"]))
+
+        for sqrt_price_limit_x96 in (0, expected[2]):
+            try:
+                swap = self._simulate_swap(zero_for_one, amount_in, sqrt_price_limit_x96, True)
+            except (InvalidPriceLimit, NotEnoughLiquidity, ArithmeticError, ValueError):
+                continue
+            if tuple(swap[0]) == expected:
+                self._apply_swap(zero_for_one, *swap)
+                return swap[0]
+        raise ValueError("Swap event does not replay on this pool state")
+
+    def quote(self, zero_for_one, amount_in, sqrt_price_limit_x96=0, exact=True):
+        # Quoter.quoteSingle: the swap result as uniswapV3SwapCallback reports it
+        result = self.swap(zero_for_one, amount_in, sqrt_price_limit_x96, exact=exact)
+        amount_out = -result.amount1 if result.amount0 > 0 else -result.amount0
+        return QuoteResult(amount_out, result.sqrt_price_x96, result.tick)
+
+    def quote_many(self, zero_for_one, amounts_in, exact=True):
+        """quote() for many input amounts in a single walk over the ticks.
+
+        A step that an amount fills completely gives the same (amountIn, amountOut, feeAmount)
+        whatever the amount is, so the full steps are computed once and shared by every amount
+        still going, and each amount only adds its own last, partial step. Results come back in
+        the order of amounts_in, None for the amounts whose quote would revert (NotEnoughLiquidity,
+        an arithmetic panic or running off the tick range).
+        """
+        sqrt_price_limit_x96 = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+        results = [None] * len(amounts_in)
+        # pending amounts, largest first so the smallest one is popped off the end
+        pending = sorted(range(len(amounts_in)), key=lambda i: amounts_in[i], reverse=True)
+
+        consumed = 0
+        amount_calculated = 0
+        sqrt_price_x96 = self.sqrt_price_x96
+        tick = self.tick
+        liquidity = self.liquidity
+        fee_growth_global_x128 = self.fee_growth_global0_x128 if zero_for_one else self.fee_growth_global1_x128
+
+        ticks = self.ticks
+        tick_spacing = self.tick_spacing
+        fee = self.fee
+        if exact:
+            next_initialized_tick = self.tick_bitmap.next_initialized_tick_within_one_word
+        else:
+            next_initialized_tick = self.tick_bitmap.next_initialized_tick
+
+        try:
+            while pending:
+                # amounts used up exactly by the previous full step, and the ones stopped by the limit
+                while pending and (amounts_in[pending[-1]] <= consumed or sqrt_price_x96 == sqrt_price_limit_x96):
+                    i = pending.pop()
+                    if amounts_in[i] >= consumed:
+                        results[i] = QuoteResult(amount_calculated, sqrt_price_x96, tick)
+                    # else the rounded up fee took the remaining amount below zero, a revert on chain
+                if not pending:
+                    break
+
+                next_tick, _ = next_initialized_tick(tick, tick_spacing, zero_for_one)
+                sqrt_price_next_x96 = get_sqrt_ratio_at_tick(next_tick)
+                if zero_for_one:
+                    target_x96 = sqrt_price_limit_x96 if sqrt_price_next_x96 < sqrt_price_limit_x96 else sqrt_price_next_x96
+                else:
+                    target_x96 = sqrt_price_limit_x96 if sqrt_price_next_x96 > sqrt_price_limit_x96 else sqrt_price_next_x96
+
+                # partial steps end the swap of the smaller amounts, a full step is shared by the rest
+                while pending:
+                    try:
+                        step = compute_swap_step(sqrt_price_x96, target_x96, liquidity, amounts_in[pending[-1]] - consumed, fee)
+                    except ArithmeticError:
+                        # a panic on chain, e.g. an input too small to pay more than the fee
+                        pending.pop()
+                        continue
+                    if step[0] == target_x96:
+                        break
+                    i = pending.pop()
+                    partial_tick = tick if step[0] == sqrt_price_x96 else get_tick_at_sqrt_ratio(step[0])
+                    results[i] = QuoteResult(amount_calculated + step[2], step[0], partial_tick)
+                if not pending:
+                    break
+
+                sqrt_price_start_x96 = sqrt_price_x96
+                sqrt_price_x96, amount_in, amount_out, fee_amount = step
+                consumed += amount_in + fee_amount
+                amount_calculated += amount_out
+                if liquidity > 0:
+                    fee_growth_global_x128 += mul_div(fee_amount, q128, liquidity)
+                    if fee_growth_global_x128 > MAX_UINT256:
+                        raise OverflowError("feeGrowthGlobalX128 overflow")
+
+                if sqrt_price_x96 == sqrt_price_next_x96:
+                    info = ticks.get(next_tick) or TickInfo()
+                    # Tick.cross reverts on a fee growth underflow, keep that behaviour
+                    _checked_sub(fee_growth_global_x128, info.fee_growth_outside0_x128 if zero_for_one else info.fee_growth_outside1_x128)
+                    liquidity = add_liquidity(liquidity, -info.liquidity_net if zero_for_one else info.liquidity_net)
+                    if liquidity == 0:
+                        raise NotEnoughLiquidity()
+                    tick = next_tick - 1 if zero_for_one else next_tick
+                elif sqrt_price_x96 != sqrt_price_start_x96:
+                    tick = get_tick_at_sqrt_ratio(sqrt_price_x96)
+        except (NotEnoughLiquidity, ArithmeticError, ValueError):
+            # every amount still pending needed the step that reverts
+            pass
+        return results
+
+
+def quote_multi(pools, path, amount_in):
+    """Quoter.quoteMulti over local pool states.
+
+    pools maps (token0, token1, fee), with lower case token addresses, to a PoolState;
+    returns (amountOut, sqrtPriceX96AfterList, tickAfterList).
+    """
+    sqrt_prices_x96_after = []
+    ticks_after = []
+    for token_in, token_out, fee in decode_path(path):
+        zero_for_one = token_in < token_out
+        key = (token_in, token_out, fee) if zero_for_one else (token_out, token_in, fee)
+        amount_in, sqrt_price_x96_after, tick_after = pools[key].quote(zero_for_one, amount_in)
+        sqrt_prices_x96_after.append(sqrt_price_x96_after)
+        ticks_after.append(tick_after)
+    return amount_in, sqrt_prices_x96_after, ticks_after
@@ -0,0 +1,204 @@
+# Binary snapshot of many PoolStates, memory-mapped on load so a service starts without
+# replaying history: read the snapshot, then catch up from the event indexer.
+#
+# Layout, all little endian:
+#   header     magic "FSNP", version u32, block i64, log index i64 (-1: whole block), pool count u32
+#   directory  one fixed size entry per pool, see _POOL
+#   data       per pool, ticks as columns of tick_count values, each 8 byte aligned:
+#              tick i32 | liquidityNet i128 | liquidityGross u128 | feeGrowthOutside0 u256 |
+#              feeGrowthOutside1 u256 | initialized u8
+import mmap
+import os
+import struct
+from array import array
+from sys import byteorder
+
+from pathCodec import token_bytes
+from poolReplica import PoolReplica, PoolReplicas
+from poolSimulator import PoolState, TickInfo
+
+SNAPSHOT_MAGIC = b"FSNP"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct("<4sIqqI")
+# address, token0, token1, fee, tickSpacing, tick, tick count, sqrtPriceX96, liquidity,
+# feeGrowthGlobal0X128, feeGrowthGlobal1X128, offset of the tick columns
+_POOL = struct.Struct("<20s20s20sIiiI20s16s32s32sQ")
+# (bytes per value, signed) of the integer tick columns after the ticks themselves
+_INT_COLUMNS = ((16, True), (16, False), (32, False), (32, False))
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _pack(values, size, signed=False):
+    return b"".join(value.to_bytes(size, "little", signed=signed) for value in values)
+
+
+def _unpack(view, offset, size, count, signed=False):
+    return [int.from_bytes(view[offset + i * size:offset + (i + 1) * size], "little", signed=signed) for i in range(count)]
+
+
+def write_snapshot(path, states, block_number, log_index=None):
+    """Writes the PoolStates (with their address, token0 and token1 set) as of block_number.
+
+    log_index is the last event of the block already in the states, None when the states
+    have the whole block. The file is written next to path and swapped in.
+    """
+    states = list(states)
+    entries = []
+    columns = []
+    offset = _align(_HEADER.size + _POOL.size * len(states))
+    for state in states:
+        ticks = sorted(state.ticks)
+        infos = [state.ticks[tick] for tick in ticks]
+        tick_column = array("i", ticks)
+        if byteorder != "little":
+            tick_column.byteswap()
+        data = [tick_column.tobytes()]
+        values = (
+            [info.liquidity_net for info in infos],
+            [info.liquidity_gross for info in infos],
+            [info.fee_growth_outside0_x128 for info in infos],
+            [info.fee_growth_outside1_x128 for info in infos],
+        )
+        for (size, signed), column in zip(_INT_COLUMNS, values):
+            data.append(_pack(column, size, signed))
+        data.append(bytes(info.initialized for info in infos))
+        entries.append(_POOL.pack(
+            token_bytes(state.address), token_bytes(state.token0), token_bytes(state.token1),
+            state.fee, state.tick_spacing, state.tick, len(ticks),
+            state.sqrt_price_x96.to_bytes(20, "little"), state.liquidity.to_bytes(16, "little"),
+            state.fee_growth_global0_x128.to_bytes(32, "little"), state.fee_growth_global1_x128.to_bytes(32, "little"),
+            offset,
+        ))
+        for column in data:
+            columns.append((offset, column))
+            offset = _align(offset + len(column))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, block_number, -1 if log_index is None else log_index, len(states)))
+        f.write(b"".join(entries))
+        for column_offset, column in columns:
+            f.write(bytes(column_offset - f.tell()))
+            f.write(column)
+        # on disk before the rename, or a crash can leave the new name on an empty file
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PoolSnapshot:
+    """A snapshot file mapped in memory; pools are only decoded when they are asked for.
+
+    Opening it reads the header and the fixed size directory, nothing else. state(address)
+    builds the PoolState of one pool from its tick columns, and tick_range looks up the
+    ticks of a range on the mapped tick column without decoding the others.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, version, block_number, log_index, pool_count = _HEADER.unpack_from(self.view)
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError("Not a pool snapshot: " + path)
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError("Unsupported pool snapshot version: " + str(version))
+        self.block_number = block_number
+        self.log_index = None if log_index < 0 else log_index
+        self.pools = {}
+        for index in range(pool_count):
+            entry = _POOL.unpack_from(self.view, _HEADER.size + index * _POOL.size)
+            self.pools["0x" + entry[0].hex()] = entry
+
+    def __len__(self):
+        return len(self.pools)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.map is not None:
+            self.view.release()
+            self.map.close()
+            self.map = None
+
+    def addresses(self):
+        return list(self.pools)
+
+    def _ticks(self, entry):
+        # the mapped tick column as int32s, no copy on little endian machines
+        count, offset = entry[6], entry[11]
+        column = self.view[offset:offset + 4 * count]
+        if byteorder == "little":
+            return column.cast("i")
+        ticks = array("i", column)
+        ticks.byteswap()
+        return ticks
+
+    def tick_range(self, address, lower_tick, upper_tick):
+        # indices [start, end) of the stored ticks in [lower_tick, upper_tick], by bisection
+        ticks = self._ticks(self.pools[address.lower()])
+        start, end = 0, len(ticks)
+        while start < end:
+            middle = (start + end) // 2
+            if ticks[middle] < lower_tick:
+                start = middle + 1
+            else:
+                end = middle
+        end = start
+        while end < len(ticks) and ticks[end] <= upper_tick:
+            end += 1
+        return start, end
+
+    def state(self, address, tick_bitmap=None):
+        """The PoolState of one pool. tick_bitmap can be an empty TickIndex instead of a TickBitmap."""
+        entry = self.pools[address.lower()]
+        (address, token0, token1, fee, tick_spacing, tick, count, sqrt_price_x96, liquidity,
+         fee_growth_global0_x128, fee_growth_global1_x128, offset) = entry
+        state = PoolState(
+            int.from_bytes(sqrt_price_x96, "little"),
+            tick,
+            int.from_bytes(liquidity, "little"),
+            fee,
+            tick_spacing,
+            int.from_bytes(fee_growth_global0_x128, "little"),
+            int.from_bytes(fee_growth_global1_x128, "little"),
+            tick_bitmap=tick_bitmap,
+            token0="0x" + token0.hex(),
+            token1="0x" + token1.hex(),
+            address="0x" + address.hex(),
+        )
+
+        ticks = list(self._ticks(entry))
+        columns = []
+        column_offset = _align(offset + 4 * count)
+        for size, signed in _INT_COLUMNS:
+            columns.append(_unpack(self.view, column_offset, size, count, signed))
+            column_offset = _align(column_offset + size * count)
+        initialized = self.view[column_offset:column_offset + count]
+
+        for i, tick in enumerate(ticks):
+            info = state.ticks[tick] = TickInfo(bool(initialized[i]), columns[1][i], columns[0][i], columns[2][i], columns[3][i])
+            if info.liquidity_gross > 0:
+                state.tick_bitmap.flip_tick(tick, tick_spacing)
+        return state
+
+    def states(self):
+        return [self.state(address) for address in self.pools]
+
+    def replicas(self, db=None):
+        """PoolReplicas for every pool, caught up with the indexer database db when given."""
+        replicas = PoolReplicas(PoolReplica(self.state(address), self.block_number, self.log_index) for address in self.pools)
+        if db is not None:
+            for replica in replicas.replicas.values():
+                replica.catch_up(db)
+        return replicas
@@ -0,0 +1,86 @@
+# Array versions of the position math in tests/unimath.py and contracts/lib/Math.sol.
+# Every function takes NumPy arrays (or scalars, broadcast as usual) and returns arrays, so a
+# whole position book is valued with a few vector operations.
+#
+# exact=False works in float64, fast but only about 15 significant digits.
+# exact=True works on object arrays of Python ints and reproduces Math.calcAmount0Delta and
+# calcAmount1Delta to the wei (TickMath.getSqrtRatioAtTick for the tick prices); it is still
+# elementwise Python arithmetic underneath, so expect it to be much slower.
+import numpy as np
+
+from tickMath import get_sqrt_ratio_at_tick
+
+q96 = 2**96
+
+_sqrt_ratio_at_tick = np.frompyfunc(get_sqrt_ratio_at_tick, 1, 1)
+
+
+def _as_array(values, exact):
+    if exact:
+        return np.asarray(values).astype(object)
+    return np.asarray(values, dtype=np.float64)
+
+
+def sqrt_price_at_ticks(ticks, exact=False):
+    ticks = np.asarray(ticks)
+    if not exact:
+        return 1.0001 ** (ticks / 2) * q96
+    # positions share their ticks, compute each distinct one once
+    unique, inverse = np.unique(ticks, return_inverse=True)
+    return _sqrt_ratio_at_tick(unique.astype(object))[inverse].reshape(ticks.shape)
+
+
+def liquidity0(amount, pa, pb):
+    pa, pb = np.minimum(pa, pb), np.maximum(pa, pb)
+    return (amount * (pa * pb) / q96) / (pb - pa)
+
+
+def liquidity1(amount, pa, pb):
+    pa, pb = np.minimum(pa, pb), np.maximum(pa, pb)
+    return amount * q96 / (pb - pa)
+
+
+def calc_amount0(liq, pa, pb, exact=False, round_up=False):
+    liq = _as_array(liq, exact)
+    pa = _as_array(pa, exact)
+    pb = _as_array(pb, exact)
+    pa, pb = np.minimum(pa, pb), np.maximum(pa, pb)
+    if not exact:
+        return liq * q96 * (pb - pa) / pb / pa
+    numerator = liq * q96 * (pb - pa)
+    if round_up:
+        # divRoundingUp(mulDivRoundingUp(numerator1, numerator2, sqrtPriceBX96), sqrtPriceAX96)
+        return -(-(-(-numerator // pb)) // pa)
+    return numerator // pb // pa
+
+
+def calc_amount1(liq, pa, pb, exact=False, round_up=False):
+    liq = _as_array(liq, exact)
+    pa = _as_array(pa, exact)
+    pb = _as_array(pb, exact)
+    pa, pb = np.minimum(pa, pb), np.maximum(pa, pb)
+    if not exact:
+        return liq * (pb - pa) / q96
+    numerator = liq * (pb - pa)
+    if round_up:
+        return -(-numerator // q96)
+    return numerator // q96
+
+
+def position_amounts(lower_ticks, upper_ticks, liquidity, sqrt_price_x96, tick, exact=False, round_up=False):
+    """Token amounts held by positions, the three branches of Pool._modifyPosition at once.
+
+    Below the range (tick < lowerTick) a position is all token0, at or above upperTick all
+    token1, in between the price splits it. Rounding down gives what burning the positions
+    pays out; round_up gives what minting them costs.
+    """
+    sqrt_price_lower = sqrt_price_at_ticks(lower_ticks, exact)
+    sqrt_price_upper = sqrt_price_at_ticks(upper_ticks, exact)
+    sqrt_price = _as_array(sqrt_price_x96, exact)
+    tick = np.asarray(tick)
+
+    # the price a range is split at: its lower end below, its upper end above
+    split = np.where(tick < lower_ticks, sqrt_price_lower, np.where(tick < upper_ticks, sqrt_price, sqrt_price_upper))
+    amount0 = calc_amount0(liquidity, split, sqrt_price_upper, exact, round_up)
+    amount1 = calc_amount1(liquidity, sqrt_price_lower, split, exact, round_up)
+    return amount0, amount1
@@ -0,0 +1,62 @@
+# Off-chain Pool.getPosTokenBalances for many positions at once
+from swapMath import calc_position_amounts
+from tickMath import get_sqrt_ratio_at_tick
+
+
+class PositionValuer:
+    """Underlying token amounts of positions against one slot0.
+
+    Positions of a pool reuse a small set of bounds, so getSqrtRatioAtTick is computed once per
+    tick and kept in sqrt_ratios, a plain dict that can be shared between the valuers of
+    several pools (the ratio only depends on the tick).
+    """
+
+    def __init__(self, sqrt_price_x96, tick, sqrt_ratios=None):
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.tick = tick
+        self.sqrt_ratios = sqrt_ratios if sqrt_ratios is not None else {}
+
+    @classmethod
+    def from_state(cls, state, sqrt_ratios=None):
+        return cls(state.sqrt_price_x96, state.tick, sqrt_ratios)
+
+    @classmethod
+    def from_contract(cls, pool, sqrt_ratios=None):
+        sqrt_price_x96, tick = pool.slot0()[:2]
+        return cls(int(sqrt_price_x96), int(tick), sqrt_ratios)
+
+    def update_slot0(self, sqrt_price_x96, tick):
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.tick = tick
+
+    def on_swap(self, event):
+        # the Swap event carries the new slot0 price and tick
+        self.update_slot0(int(event["sqrtPriceX96"]), int(event["tick"]))
+
+    def sqrt_ratio(self, tick):
+        ratio = self.sqrt_ratios.get(tick)
+        if ratio is None:
+            ratio = self.sqrt_ratios[tick] = get_sqrt_ratio_at_tick(tick)
+        return ratio
+
+    def get_pos_token_balances(self, lower_tick, upper_tick, liquidity_delta):
+        # Pool.getPosTokenBalances, signed amounts rounded up for a positive delta and down for a negative one
+        return calc_position_amounts(
+            self.sqrt_price_x96, self.tick, lower_tick, upper_tick,
+            self.sqrt_ratio(lower_tick), self.sqrt_ratio(upper_tick), liquidity_delta,
+        )
+
+    def value_positions(self, positions):
+        """(amount0, amount1) for every (lowerTick, upperTick, liquidity) of positions, in order.
+
+        This is what NFT.userToAllPositionsTwo reads for each token with the liquidity of its pool
+        position; positions on the same bounds with the same liquidity are valued once.
+        """
+        cache = {}
+        balances = []
+        for position in positions:
+            amounts = cache.get(position)
+            if amounts is None:
+                amounts = cache[position] = self.get_pos_token_balances(*position)
+            balances.append(amounts)
+        return balances
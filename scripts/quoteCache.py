@@ -0,0 +1,157 @@
+# Cache in front of Quoter.quoteSingle / quoteMulti, invalidated by the events of the quoted pools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from pathCodec import decode_path
+
+INVALIDATING_EVENTS = ("Swap", "Mint", "Burn")
+ZERO_ADDRESS = "0x" + "0" * 40
+
+
+class QuoteCache:
+    """LRU cache of quotes keyed by their arguments and the state version of every pool they touch.
+
+    quote_single(tokenIn, tokenOut, fee, amountIn, sqrtPriceLimitX96) and quote_multi(path, amountIn)
+    compute the real quotes (the Quoter through eth_call, or a local PoolState), pool_address
+    resolves (tokenIn, tokenOut, fee) like factory.pools. A Swap, Mint or Burn of a pool bumps
+    its version and drops the entries that went through it; a quote that was being computed
+    while the event came in is returned but not stored. Concurrent requests for the same quote
+    wait for a single evaluation. Safe to use from several threads.
+    """
+
+    def __init__(self, quote_single, quote_multi, pool_address, max_entries=10000):
+        self.quote_single_ = quote_single
+        self.quote_multi_ = quote_multi
+        self.pool_address_ = pool_address
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.keys_by_pool = {}
+        self.pool_addresses = {}
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self.entries),
+            }
+
+    def pool_address(self, token_in, token_out, fee):
+        key = (token_in, token_out, fee)
+        with self.lock:
+            address = self.pool_addresses.get(key)
+        if address is None:
+            # lower case, like the addresses of the indexed events that invalidate it; the
+            # eth_call runs outside the lock, two threads may both make it
+            address = self.pool_address_(token_in, token_out, fee).lower()
+            # a pool that does not exist yet is looked up again, it may be created later
+            if address != ZERO_ADDRESS:
+                with self.lock:
+                    self.pool_addresses[key] = address
+        return address
+
+    def quote_single(self, token_in, token_out, fee, amount_in, sqrt_price_limit_x96=0):
+        pools = (self.pool_address(token_in, token_out, fee),)
+        key = ("single", token_in, token_out, fee, amount_in, sqrt_price_limit_x96)
+        return self._get(key, pools, lambda: self.quote_single_(token_in, token_out, fee, amount_in, sqrt_price_limit_x96))
+
+    def quote_multi(self, path, amount_in):
+        path = bytes.fromhex(path[2:] if path[:2] in ("0x", "0X") else path) if isinstance(path, str) else bytes(path)
+        pools = tuple(self.pool_address(*pool) for pool in decode_path(path))
+        key = ("multi", path, amount_in)
+        return self._get(key, pools, lambda: self.quote_multi_(path, amount_in))
+
+    def invalidate_pool(self, address):
+        address = address.lower()
+        with self.lock:
+            self.versions[address] = self.versions.get(address, 0) + 1
+            for key in self.keys_by_pool.pop(address, ()):
+                entry = self.entries.pop(key, None)
+                if entry is not None:
+                    self.invalidations += 1
+                    self._unindex(key, entry[1], address)
+
+    def on_event(self, event):
+        # brownie / web3 events of the pools, anything but Swap, Mint and Burn leaves the quotes valid
+        if event.name in INVALIDATING_EVENTS:
+            self.invalidate_pool(event.address)
+        elif event.name == "PoolCreated":
+            self.on_pool_created(event)
+
+    def on_pool_created(self, event):
+        # drops the address cached for the (token0, token1, fee) of the new pool, in either order
+        tokens = {event["token0"].lower(), event["token1"].lower()}
+        fee = int(event["fee"])
+        with self.lock:
+            for key in [key for key in self.pool_addresses if key[2] == fee and {key[0].lower(), key[1].lower()} == tokens]:
+                del self.pool_addresses[key]
+
+    def _get(self, key, pools, compute):
+        with self.lock:
+            versions = tuple(self.versions.get(pool, 0) for pool in pools)
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            future = self.in_flight.get(key)
+            if future is not None and future.versions == versions:
+                self.coalesced += 1
+                owner = False
+            else:
+                future = Future()
+                future.versions = versions
+                self.in_flight[key] = future
+                self.misses += 1
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = compute()
+        except BaseException as error:
+            with self.lock:
+                if self.in_flight.get(key) is future:
+                    del self.in_flight[key]
+            future.set_exception(error)
+            raise
+
+        with self.lock:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+            if versions == tuple(self.versions.get(pool, 0) for pool in pools):
+                self._store(key, pools, result)
+        future.set_result(result)
+        return result
+
+    def _store(self, key, pools, result):
+        self.entries[key] = (result, pools)
+        for pool in pools:
+            self.keys_by_pool.setdefault(pool, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            evicted_key, (_, evicted_pools) = self.entries.popitem(last=False)
+            self._unindex(evicted_key, evicted_pools)
+            self.evictions += 1
+
+    def _unindex(self, key, pools, skip=None):
+        for pool in pools:
+            if pool == skip:
+                continue
+            keys = self.keys_by_pool.get(pool)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.keys_by_pool[pool]
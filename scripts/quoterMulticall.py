@@ -0,0 +1,74 @@
+# Batches Quoter calls into one QuoterMulticall.aggregate eth_call
+from collections import namedtuple
+
+ERROR_SELECTOR = bytes.fromhex("08c379a0")  # Error(string)
+PANIC_SELECTOR = bytes.fromhex("4e487b71")  # Panic(uint256)
+
+# one entry per queued call: result is the decoded return value, error the revert reason
+QuoteCallResult = namedtuple("QuoteCallResult", ["success", "result", "error"])
+
+
+def decode_revert(data):
+    # the revert reason of a failed sub-call, as readable text
+    data = bytes(data)
+    if data[:4] == ERROR_SELECTOR and len(data) >= 68:
+        offset = int.from_bytes(data[4:36], "big")
+        length = int.from_bytes(data[4 + offset:36 + offset], "big")
+        return data[36 + offset:36 + offset + length].decode("utf-8", "replace")
+    if data[:4] == PANIC_SELECTOR and len(data) >= 36:
+        return "Panic(" + hex(int.from_bytes(data[4:36], "big")) + ")"
+    if not data:
+        return "reverted without a reason"
+    return "0x" + data.hex()
+
+
+class QuoterMulticall:
+    """Queues quoteSingle, quoteMulti and quoteLiqInputToken0/1 calls and runs them in one eth_call.
+
+    quoter and multicall are the brownie contracts of Quoter and of the QuoterMulticall
+    deployed next to it; every call is encoded with the Quoter ABI, executed by
+    QuoterMulticall.aggregate and decoded back with the same ABI. The Quoter already turns
+    the revert data of uniswapV3SwapCallback into return values, so a quote that fails shows
+    up as an unsuccessful entry with the reason it reverted with (e.g. 'NotEnoughLiquidity').
+    """
+
+    def __init__(self, multicall, quoter):
+        self.multicall = multicall
+        self.quoter = quoter
+        self.calls = []
+
+    def _queue(self, method_name, *args):
+        method = getattr(self.quoter, method_name)
+        self.calls.append((method, method.encode_input(*args)))
+        return len(self.calls) - 1
+
+    def quote_single(self, token_in, token_out, fee, amount_in, sqrt_price_limit_x96=0):
+        return self._queue("quoteSingle", token_in, token_out, fee, amount_in, sqrt_price_limit_x96)
+
+    def quote_multi(self, path, amount_in):
+        return self._queue("quoteMulti", path, amount_in)
+
+    def quote_liq_input_token0(self, token_in, token_out, fee, lower_tick, upper_tick, amount_in_desired):
+        return self._queue("quoteLiqInputToken0", token_in, token_out, fee, lower_tick, upper_tick, amount_in_desired)
+
+    def quote_liq_input_token1(self, token_in, token_out, fee, lower_tick, upper_tick, amount_in_desired):
+        return self._queue("quoteLiqInputToken1", token_in, token_out, fee, lower_tick, upper_tick, amount_in_desired)
+
+    def execute(self, tx_params=None):
+        # runs the queued calls, results are in the order of the indices the quote_* methods returned
+        calls, self.calls = self.calls, []
+        if not calls:
+            return []
+        args = [[data for _, data in calls]]
+        if tx_params is not None:
+            args.append(tx_params)
+        returned = self.multicall.aggregate.call(*args)
+
+        results = []
+        for (method, _), (success, return_data) in zip(calls, returned):
+            if not success:
+                results.append(QuoteCallResult(False, None, decode_revert(return_data)))
+                continue
+            result = method.decode_output(return_data)
+            results.append(QuoteCallResult(True, result, None))
+        return results
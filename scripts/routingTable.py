@@ -0,0 +1,123 @@
+import json
+import os
+
+from poolPathCreator import Route, TokenGraph, fee_cost
+
+ROUTING_TABLE_VERSION = 1
+
+
+class RoutingTable:
+    """Best route between every pair of tokens, up to max_hops pools.
+
+    Lookups are a dictionary hit. New pools (PoolCreated events) only recompute the
+    sources whose routes the pool can improve, and the table can be saved to disk
+    so a restart does not rebuild it from scratch.
+    """
+
+    def __init__(self, graph=None, max_hops=3):
+        self.graph = graph if graph is not None else TokenGraph()
+        self.max_hops = max_hops
+        # source token -> {target token: Route}
+        self.routes = {}
+
+    @classmethod
+    def build(cls, graph, max_hops=3):
+        table = cls(graph, max_hops)
+        for token in list(graph.tokens):
+            table.routes[token] = table._routes_from(token)
+        return table
+
+    def route(self, start_crypto, target_crypto):
+        return self.routes.get(self.graph.token(start_crypto), {}).get(self.graph.token(target_crypto))
+
+    def on_pool_created(self, event):
+        # event is the PoolCreated log: token0, token1, fee, pool
+        return self.add_pool(event["token0"], event["token1"], int(event["fee"]), event["pool"])
+
+    def add_pool(self, token_a, token_b, fee, address=None):
+        # Returns the source tokens whose routes were recomputed
+        pool = self.graph.add_pool(token_a, token_b, fee, address)
+        # the graph spelling of the tokens, whatever case the caller used
+        token_a, token_b = pool.token0, pool.token1
+
+        # A route through the new pool goes source ~> one pool token, the pool, the other
+        # token ~> target. Both ends only use the pools that already existed, so they cost at
+        # least the routes of the table to and from the pool tokens. Only the sources where
+        # that bound beats (or ties) one of their routes, or reaches a new target, can change.
+        pool_cost = fee_cost(pool.fee)
+        affected = {token_a, token_b}
+        for source, targets in self.routes.items():
+            if source in affected:
+                continue
+            for start, end in ((token_a, token_b), (token_b, token_a)):
+                to_start = targets.get(start)
+                if to_start is not None and self._improves(source, targets, to_start.cost + pool_cost, end):
+                    affected.add(source)
+                    break
+
+        for source in affected:
+            self.routes[source] = self._routes_from(source)
+        return affected
+
+    def _improves(self, source, targets, cost, token):
+        # whether reaching token at cost, then its routes, may beat a route of source
+        if _beats(cost, targets.get(token)):
+            return True
+        for target, route in self.routes.get(token, {}).items():
+            if target != source and _beats(cost + route.cost, targets.get(target)):
+                return True
+        return False
+
+    def _routes_from(self, source):
+        return self.graph.bounded_routes(source, self.max_hops)
+
+    def save(self, path):
+        pools = list(self.graph.pools.values())
+        pool_ids = {pool: index for index, pool in enumerate(pools)}
+        routes = {
+            source: {target: [route.cost, [pool_ids[pool] for pool in route.pools]] for target, route in targets.items()}
+            for source, targets in self.routes.items()
+        }
+        data = {
+            "version": ROUTING_TABLE_VERSION,
+            "max_hops": self.max_hops,
+            "pools": [list(pool) for pool in pools],
+            "routes": routes,
+        }
+        # write next to the target and swap it in, so a crash never leaves half a table on disk
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != ROUTING_TABLE_VERSION:
+            raise ValueError("Unsupported routing table version: " + str(data.get("version")))
+
+        graph = TokenGraph()
+        pools = [graph.add_pool(token0, token1, fee, address) for token0, token1, fee, address in data["pools"]]
+
+        table = cls(graph, data["max_hops"])
+        for source, targets in data["routes"].items():
+            table.routes[source] = {
+                target: _route_from_pools(source, [pools[index] for index in pool_ids], cost)
+                for target, (cost, pool_ids) in targets.items()
+            }
+        return table
+
+
+def _beats(cost, route):
+    # with some room for the rounding of summing the same fees in another order
+    return route is None or cost <= route.cost + 1e-12
+
+
+def _route_from_pools(source, pools, cost):
+    tokens = [source]
+    for pool in pools:
+        tokens.append(pool.other(tokens[-1]))
+    return Route(tokens, pools, cost)
@@ -0,0 +1,151 @@
+import heapq
+from collections import namedtuple
+
+q96 = 2**96
+
+# One part of a split order, ready for SwapManager.swapMulti([path, recipient, amount_in, minAmountOut])
+Leg = namedtuple("Leg", ["path", "amount_in", "amount_out"])
+
+
+def split_order(routes, amount_in, quote, steps=100, quote_legs=None):
+    """Split amount_in across routes to maximise the total amount out.
+
+    quote(route, amount_in) returns the amount out of the route (0 when it cannot fill it)
+    and has to be concave, like the output of a pool. The amount is handed out in `steps`
+    chunks, each one to the route with the best marginal output, which converges to equal
+    marginal prices on all the used routes. quote is called at most
+    2 * len(routes) + steps times.
+
+    Routes that go through the same pool (k_shortest_routes often share a first hop) cannot
+    be quoted one by one: each would see the whole depth of the shared pool. For those,
+    quote_legs(routes, amounts_in) has to return the amounts out of all the legs swapped one
+    after the other on the same pools (ConstantLiquidityCurves.legs does), and the legs are
+    meant to be sent in that order. Every chunk is then tried on every route, so quote_legs
+    is called steps * len(routes) + 1 times. Without quote_legs, a route sharing a pool with
+    an earlier (cheaper) one is left out.
+    """
+    if amount_in <= 0 or not routes:
+        return []
+    if _share_pools(routes):
+        if quote_legs is not None:
+            return _split_shared(routes, amount_in, quote_legs, steps)
+        used = set()
+        disjoint = []
+        for route in routes:
+            keys = {pool.key for pool in route.pools}
+            if not keys & used:
+                disjoint.append(route)
+                used |= keys
+        routes = disjoint
+    steps = max(1, min(steps, amount_in))
+    chunk, remainder = divmod(amount_in, steps)
+
+    allocated = [0] * len(routes)
+    outputs = [0] * len(routes)
+    heap = [(-quote(route, chunk), index) for index, route in enumerate(routes)]
+    heapq.heapify(heap)
+
+    for _ in range(steps):
+        gain, index = heapq.heappop(heap)
+        allocated[index] += chunk
+        outputs[index] -= gain
+        marginal = quote(routes[index], allocated[index] + chunk) - outputs[index]
+        heapq.heappush(heap, (-marginal, index))
+
+    # what is left after the equal chunks goes to the best marginal route
+    allocated[heap[0][1]] += remainder
+
+    legs = []
+    for route, amount in zip(routes, allocated):
+        if amount > 0:
+            # the route is quoted again for the whole leg, chunk gains can be off by rounding
+            legs.append(Leg(route.encode(), amount, quote(route, amount)))
+    return legs
+
+
+def _share_pools(routes):
+    keys = [pool.key for route in routes for pool in route.pools]
+    return len(keys) != len(set(keys))
+
+
+def _split_shared(routes, amount_in, quote_legs, steps):
+    # same greedy as split_order, but every chunk is tried against all the legs together,
+    # so the price impact of a leg on a shared pool is seen by the others
+    steps = max(1, min(steps, amount_in))
+    chunk, remainder = divmod(amount_in, steps)
+    allocated = [0] * len(routes)
+    best_index = 0
+    for _ in range(steps):
+        best_total = None
+        for index in range(len(routes)):
+            allocated[index] += chunk
+            total = sum(quote_legs(routes, allocated))
+            allocated[index] -= chunk
+            if best_total is None or total > best_total:
+                best_total, best_index = total, index
+        allocated[best_index] += chunk
+    allocated[best_index] += remainder
+
+    outputs = quote_legs(routes, allocated)
+    return [
+        Leg(route.encode(), amount, amount_out)
+        for route, amount, amount_out in zip(routes, allocated, outputs)
+        if amount > 0
+    ]
+
+
+class ConstantLiquidityCurves:
+    """Quotes routes on pools that are assumed to keep their current liquidity.
+
+    Every pool is (sqrtPriceX96, liquidity, fee), keyed like TokenGraph.pools. It is the
+    in-range step of SwapMath.computeSwapStep without tick crossings, so it is only exact
+    while the swap stays inside the current tick range.
+    """
+
+    def __init__(self, pools):
+        self.pools = pools
+
+    def __call__(self, route, amount_in):
+        amount = amount_in
+        for pool, token_in, token_out in zip(route.pools, route.tokens, route.tokens[1:]):
+            sqrt_price_x96, liquidity, fee = self.pools[pool.key]
+            amount = constant_liquidity_out(sqrt_price_x96, liquidity, fee, amount, token_in.lower() < token_out.lower())
+            if amount == 0:
+                break
+        return amount
+
+    def legs(self, routes, amounts_in):
+        # the legs swapped one after the other, each one moving the price of the pools it uses
+        prices = {}
+        outputs = []
+        for route, amount in zip(routes, amounts_in):
+            for pool, token_in, token_out in zip(route.pools, route.tokens, route.tokens[1:]):
+                if amount == 0:
+                    break
+                sqrt_price_x96, liquidity, fee = self.pools[pool.key]
+                sqrt_price_x96 = prices.get(pool.key, sqrt_price_x96)
+                amount, prices[pool.key] = constant_liquidity_swap(
+                    sqrt_price_x96, liquidity, fee, amount, token_in.lower() < token_out.lower()
+                )
+            outputs.append(amount)
+        return outputs
+
+
+def constant_liquidity_out(sqrt_price_x96, liquidity, fee, amount_in, zero_for_one):
+    return constant_liquidity_swap(sqrt_price_x96, liquidity, fee, amount_in, zero_for_one)[0]
+
+
+def constant_liquidity_swap(sqrt_price_x96, liquidity, fee, amount_in, zero_for_one):
+    # (amount out, sqrtPriceX96 after the swap)
+    if liquidity == 0 or amount_in == 0:
+        return 0, sqrt_price_x96
+    amount_less_fee = amount_in * (10**6 - fee) // 10**6
+    numerator = liquidity * q96
+    if zero_for_one:
+        # getNextSqrtPriceFromAmount0RoundingUp and calcAmount1Delta rounding down
+        denominator = numerator + amount_less_fee * sqrt_price_x96
+        sqrt_price_next = -(-numerator * sqrt_price_x96 // denominator)
+        return liquidity * (sqrt_price_x96 - sqrt_price_next) // q96, sqrt_price_next
+    # getNextSqrtPriceFromAmount1RoundingDown and calcAmount0Delta rounding down
+    sqrt_price_next = sqrt_price_x96 + amount_less_fee * q96 // liquidity
+    return numerator * (sqrt_price_next - sqrt_price_x96) // sqrt_price_next // sqrt_price_x96, sqrt_price_next
@@ -0,0 +1,148 @@
+# Python port of contracts/lib/Math.sol and contracts/lib/SwapMath.sol.
+# Solidity 0.8 checked arithmetic is kept: an overflow raises OverflowError and a division
+# by zero raises ZeroDivisionError, where the contracts would revert with a panic.
+
+q96 = 2**96
+MAX_UINT160 = 2**160 - 1
+MAX_UINT256 = 2**256 - 1
+
+
+def mul_div(a, b, denominator):
+    # PRBMath.mulDiv: floor(a * b / denominator) with full precision
+    if denominator == 0:
+        raise ZeroDivisionError("mulDiv by zero")
+    result = a * b // denominator
+    if result > MAX_UINT256:
+        raise OverflowError("mulDiv overflow")
+    return result
+
+
+def mul_div_rounding_up(a, b, denominator):
+    result = mul_div(a, b, denominator)
+    if a * b % denominator > 0:
+        if result >= MAX_UINT256:
+            raise OverflowError("mulDivRoundingUp overflow")
+        result += 1
+    return result
+
+
+def div_rounding_up(numerator, denominator):
+    # assembly in the contract, so dividing by zero gives 0 instead of reverting
+    if denominator == 0:
+        return 0
+    return numerator // denominator + (1 if numerator % denominator > 0 else 0)
+
+
+def calc_amount0_delta(sqrt_price_a_x96, sqrt_price_b_x96, liquidity, round_up):
+    if sqrt_price_a_x96 > sqrt_price_b_x96:
+        sqrt_price_a_x96, sqrt_price_b_x96 = sqrt_price_b_x96, sqrt_price_a_x96
+    if sqrt_price_a_x96 == 0:
+        raise ValueError("calcAmount0Delta with a zero price")
+
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_price_b_x96 - sqrt_price_a_x96
+    if round_up:
+        return div_rounding_up(mul_div_rounding_up(numerator1, numerator2, sqrt_price_b_x96), sqrt_price_a_x96)
+    return mul_div(numerator1, numerator2, sqrt_price_b_x96) // sqrt_price_a_x96
+
+
+def calc_amount1_delta(sqrt_price_a_x96, sqrt_price_b_x96, liquidity, round_up):
+    if sqrt_price_a_x96 > sqrt_price_b_x96:
+        sqrt_price_a_x96, sqrt_price_b_x96 = sqrt_price_b_x96, sqrt_price_a_x96
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_price_b_x96 - sqrt_price_a_x96, q96)
+    return mul_div(liquidity, sqrt_price_b_x96 - sqrt_price_a_x96, q96)
+
+
+def calc_amount0_delta_signed(sqrt_price_a_x96, sqrt_price_b_x96, liquidity_delta):
+    # the int128 overload: rounds up when adding liquidity, down when removing it
+    if liquidity_delta < 0:
+        return -calc_amount0_delta(sqrt_price_a_x96, sqrt_price_b_x96, -liquidity_delta, False)
+    return calc_amount0_delta(sqrt_price_a_x96, sqrt_price_b_x96, liquidity_delta, True)
+
+
+def calc_amount1_delta_signed(sqrt_price_a_x96, sqrt_price_b_x96, liquidity_delta):
+    if liquidity_delta < 0:
+        return -calc_amount1_delta(sqrt_price_a_x96, sqrt_price_b_x96, -liquidity_delta, False)
+    return calc_amount1_delta(sqrt_price_a_x96, sqrt_price_b_x96, liquidity_delta, True)
+
+
+def calc_position_amounts(sqrt_price_x96, tick, lower_tick, upper_tick, sqrt_price_lower_x96, sqrt_price_upper_x96, liquidity_delta):
+    # the signed amounts of Pool._modifyPosition: all token0 below the range, all token1 at or
+    # above it, split at the price in between
+    if tick < lower_tick:
+        split_x96 = sqrt_price_lower_x96
+    elif tick < upper_tick:
+        split_x96 = sqrt_price_x96
+    else:
+        split_x96 = sqrt_price_upper_x96
+    return (
+        calc_amount0_delta_signed(split_x96, sqrt_price_upper_x96, liquidity_delta),
+        calc_amount1_delta_signed(sqrt_price_lower_x96, split_x96, liquidity_delta),
+    )
+
+
+def get_next_sqrt_price_from_input(sqrt_price_x96, liquidity, amount_in, zero_for_one):
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96, liquidity, amount_in)
+    return get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96, liquidity, amount_in)
+
+
+def get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96, liquidity, amount_in):
+    numerator = liquidity << 96
+    product = amount_in * sqrt_price_x96
+    # checked in 0.8, so the "less precise formula" branch of the contract can never be reached
+    if product > MAX_UINT256:
+        raise OverflowError("getNextSqrtPriceFromAmount0RoundingUp overflow")
+    if amount_in == 0:
+        raise ZeroDivisionError("getNextSqrtPriceFromAmount0RoundingUp with no input")
+    denominator = numerator + product
+    if denominator > MAX_UINT256:
+        raise OverflowError("getNextSqrtPriceFromAmount0RoundingUp overflow")
+    return mul_div_rounding_up(numerator, sqrt_price_x96, denominator)
+
+
+def get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96, liquidity, amount_in):
+    sqrt_price_next_x96 = sqrt_price_x96 + mul_div(amount_in, q96, liquidity)
+    if sqrt_price_next_x96 > MAX_UINT256:
+        raise OverflowError("getNextSqrtPriceFromAmount1RoundingDown overflow")
+    # the uint160 downcast truncates silently
+    return sqrt_price_next_x96 & MAX_UINT160
+
+
+def compute_swap_step(sqrt_price_current_x96, sqrt_price_target_x96, liquidity, amount_remaining, fee):
+    """SwapMath.computeSwapStep, returns (sqrtPriceNextX96, amountIn, amountOut, feeAmount)."""
+    zero_for_one = sqrt_price_current_x96 >= sqrt_price_target_x96
+    amount_remaining_less_fee = mul_div(amount_remaining, 10**6 - fee, 10**6)
+
+    if zero_for_one:
+        amount_in = calc_amount0_delta(sqrt_price_current_x96, sqrt_price_target_x96, liquidity, True)
+    else:
+        amount_in = calc_amount1_delta(sqrt_price_current_x96, sqrt_price_target_x96, liquidity, True)
+
+    if amount_remaining_less_fee >= amount_in:
+        sqrt_price_next_x96 = sqrt_price_target_x96
+    else:
+        sqrt_price_next_x96 = get_next_sqrt_price_from_input(
+            sqrt_price_current_x96, liquidity, amount_remaining_less_fee, zero_for_one
+        )
+
+    max_reached = sqrt_price_next_x96 == sqrt_price_target_x96
+
+    if zero_for_one:
+        if not max_reached:
+            amount_in = calc_amount0_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity, True)
+        amount_out = calc_amount1_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity, False)
+    else:
+        if not max_reached:
+            amount_in = calc_amount1_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity, True)
+        amount_out = calc_amount0_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity, False)
+
+    if not max_reached:
+        fee_amount = amount_remaining - amount_in
+        if fee_amount < 0:
+            raise OverflowError("computeSwapStep underflow")
+    else:
+        fee_amount = mul_div_rounding_up(amount_in, fee, 10**6 - fee)
+
+    return sqrt_price_next_x96, amount_in, amount_out, fee_amount
@@ -0,0 +1,81 @@
+# Python port of contracts/lib/TickBitmap.sol on top of a dict of 256-bit words
+from tickMath import MAX_TICK, MIN_TICK
+
+
+def _compress(tick, tick_spacing):
+    # tick / tickSpacing rounded towards negative infinity
+    return tick // tick_spacing
+
+
+def position(tick):
+    # (wordPos, bitPos); Python's >> and % already match int16(tick >> 8) and uint8(tick % 256)
+    return tick >> 8, tick % 256
+
+
+def most_significant_bit(x):
+    if x <= 0:
+        raise ValueError("mostSignificantBit of zero")
+    return x.bit_length() - 1
+
+
+def least_significant_bit(x):
+    if x <= 0:
+        raise ValueError("leastSignificantBit of zero")
+    return (x & -x).bit_length() - 1
+
+
+class TickBitmap:
+    """Packed initialized state of the ticks, word position -> 256-bit word."""
+
+    def __init__(self, words=None):
+        self.words = dict(words) if words else {}
+
+    def copy(self):
+        return TickBitmap(self.words)
+
+    def is_initialized(self, tick, tick_spacing):
+        word_pos, bit_pos = position(tick // tick_spacing)
+        return bool(self.words.get(word_pos, 0) >> bit_pos & 1)
+
+    def flip_tick(self, tick, tick_spacing):
+        if tick % tick_spacing != 0:
+            raise ValueError("Tick is not correctly spaced")
+        word_pos, bit_pos = position(tick // tick_spacing)
+        word = self.words.get(word_pos, 0) ^ (1 << bit_pos)
+        if word:
+            self.words[word_pos] = word
+        else:
+            self.words.pop(word_pos, None)
+
+    def next_initialized_tick_within_one_word(self, tick, tick_spacing, lte):
+        """(next, initialized), the next initialized tick up to 256 compressed ticks away."""
+        compressed = _compress(tick, tick_spacing)
+
+        if lte:
+            word_pos, bit_pos = position(compressed)
+            # all the 1s at or to the right of the current bitPos
+            mask = (1 << bit_pos) - 1 + (1 << bit_pos)
+            masked = self.words.get(word_pos, 0) & mask
+
+            initialized = masked != 0
+            if initialized:
+                return (compressed - (bit_pos - most_significant_bit(masked))) * tick_spacing, True
+            return (compressed - bit_pos) * tick_spacing, False
+
+        # start from the word of the next tick, since the current tick state doesn't matter
+        word_pos, bit_pos = position(compressed + 1)
+        # all the 1s at or to the left of the bitPos
+        masked = self.words.get(word_pos, 0) >> bit_pos << bit_pos
+
+        initialized = masked != 0
+        if initialized:
+            return (compressed + 1 + (least_significant_bit(masked) - bit_pos)) * tick_spacing, True
+        return (compressed + 1 + (255 - bit_pos)) * tick_spacing, False
+
+    def next_initialized_tick(self, tick, tick_spacing, lte):
+        # word by word like the swap loop on chain, until a tick is found or the tick range ends
+        while True:
+            next_tick, initialized = self.next_initialized_tick_within_one_word(tick, tick_spacing, lte)
+            if initialized or (next_tick <= MIN_TICK if lte else next_tick >= MAX_TICK):
+                return next_tick, initialized
+            tick = next_tick - 1 if lte else next_tick
@@ -0,0 +1,94 @@
+# Sorted-array replacement for TickBitmap in the off-chain pool replica
+from bisect import bisect_left, bisect_right, insort
+
+from tickBitmap import position
+from tickMath import MAX_TICK, MIN_TICK
+
+
+class TickIndex:
+    """Initialized ticks kept as a sorted list of compressed ticks (tick / tickSpacing).
+
+    Answers the same queries as TickBitmap with a binary search instead of a word scan, and
+    next_initialized_tick looks past the 256 tick word limit, so a swap over a sparse range
+    does not have to step through every empty word. flip_tick is a bisect insort / delete,
+    cheap enough to follow Mint and Burn events.
+    """
+
+    def __init__(self, compressed_ticks=()):
+        self.compressed = sorted(compressed_ticks)
+
+    @classmethod
+    def from_words(cls, words):
+        # the tickBitmap words of a pool (or TickBitmap.words), word position -> 256-bit word
+        compressed = []
+        for word_pos, word in words.items():
+            while word:
+                bit_pos = (word & -word).bit_length() - 1
+                compressed.append((word_pos << 8) + bit_pos)
+                word &= word - 1
+        return cls(compressed)
+
+    def copy(self):
+        index = TickIndex()
+        index.compressed = list(self.compressed)
+        return index
+
+    def __len__(self):
+        return len(self.compressed)
+
+    def is_initialized(self, tick, tick_spacing):
+        compressed = tick // tick_spacing
+        i = bisect_left(self.compressed, compressed)
+        return i < len(self.compressed) and self.compressed[i] == compressed
+
+    def flip_tick(self, tick, tick_spacing):
+        if tick % tick_spacing != 0:
+            raise ValueError("Tick is not correctly spaced")
+        compressed = tick // tick_spacing
+        i = bisect_left(self.compressed, compressed)
+        if i < len(self.compressed) and self.compressed[i] == compressed:
+            del self.compressed[i]
+        else:
+            insort(self.compressed, compressed, lo=i)
+
+    def next_initialized_tick_within_one_word(self, tick, tick_spacing, lte):
+        # same (next, initialized) as TickBitmap.next_initialized_tick_within_one_word
+        compressed = tick // tick_spacing
+        if lte:
+            _, bit_pos = position(compressed)
+            word_start = compressed - bit_pos
+            i = bisect_right(self.compressed, compressed) - 1
+            if i >= 0 and self.compressed[i] >= word_start:
+                return self.compressed[i] * tick_spacing, True
+            return word_start * tick_spacing, False
+
+        _, bit_pos = position(compressed + 1)
+        word_end = compressed + 1 + (255 - bit_pos)
+        i = bisect_right(self.compressed, compressed)
+        if i < len(self.compressed) and self.compressed[i] <= word_end:
+            return self.compressed[i] * tick_spacing, True
+        return word_end * tick_spacing, False
+
+    def next_initialized_tick(self, tick, tick_spacing, lte):
+        """Next initialized tick at any distance, (next, True).
+
+        With no initialized tick left in that direction it returns the boundary the bitmap
+        search would end on, the edge of the word holding MIN_TICK / MAX_TICK, as (next, False).
+        """
+        compressed = tick // tick_spacing
+        if lte:
+            i = bisect_right(self.compressed, compressed) - 1
+            if i >= 0:
+                return self.compressed[i] * tick_spacing, True
+            last = MIN_TICK // tick_spacing
+            if last > compressed:
+                return self.next_initialized_tick_within_one_word(tick, tick_spacing, lte)
+            return (last - position(last)[1]) * tick_spacing, False
+
+        i = bisect_right(self.compressed, compressed)
+        if i < len(self.compressed):
+            return self.compressed[i] * tick_spacing, True
+        last = MAX_TICK // tick_spacing
+        if last <= compressed:
+            return self.next_initialized_tick_within_one_word(tick, tick_spacing, lte)
+        return (last + 255 - position(last)[1]) * tick_spacing, False
@@ -0,0 +1,100 @@
+# Bit-exact Python port of contracts/lib/TickMath.sol
+
+MIN_TICK = -887272
+MAX_TICK = -MIN_TICK
+
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+
+MAX_UINT256 = 2**256 - 1
+
+# the (bit of |tick|, multiplier) chain of getSqrtRatioAtTick, all Q128.128 numbers
+_RATIO_MULTIPLIERS = (
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+)
+
+
+def get_sqrt_ratio_at_tick(tick):
+    """sqrt(1.0001^tick) * 2^96, rounded exactly like TickMath.getSqrtRatioAtTick."""
+    abs_tick = -tick if tick < 0 else tick
+    if abs_tick > MAX_TICK:
+        raise ValueError("T")
+
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 0x100000000000000000000000000000000
+    for bit, multiplier in _RATIO_MULTIPLIERS:
+        if abs_tick & bit:
+            ratio = (ratio * multiplier) >> 128
+
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+
+    # Q128.128 to Q128.96, rounding up
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96):
+    """Greatest tick whose sqrt ratio is <= sqrt_price_x96, like TickMath.getTickAtSqrtRatio."""
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError("R")
+    ratio = sqrt_price_x96 << 32
+
+    msb = ratio.bit_length() - 1
+    if msb >= 128:
+        r = ratio >> (msb - 127)
+    else:
+        r = ratio << (127 - msb)
+
+    log_2 = (msb - 128) << 64
+    for shift in range(63, 49, -1):
+        r = (r * r) >> 127
+        f = r >> 128
+        log_2 |= f << shift
+        r >>= f
+
+    log_sqrt10001 = log_2 * 255738958999603826347141  # 128.128 number
+
+    tick_low = (log_sqrt10001 - 3402992956809132418596140100660247210) >> 128
+    tick_hi = (log_sqrt10001 + 291339464771989622907027621153398088495) >> 128
+
+    if tick_low == tick_hi:
+        return tick_low
+    return tick_hi if get_sqrt_ratio_at_tick(tick_hi) <= sqrt_price_x96 else tick_low
+
+
+class SqrtRatioTable:
+    """getSqrtRatioAtTick precomputed for every usable tick of a tickSpacing grid.
+
+    Lookups on the grid are a list index, other ticks fall back to the exact computation.
+    min_tick / max_tick narrow the table down to the range a simulation actually touches.
+    """
+
+    def __init__(self, tick_spacing, min_tick=MIN_TICK, max_tick=MAX_TICK):
+        self.tick_spacing = tick_spacing
+        # first and last multiples of tick_spacing inside the range
+        self.min_tick = -(-max(min_tick, MIN_TICK) // tick_spacing) * tick_spacing
+        self.max_tick = (min(max_tick, MAX_TICK) // tick_spacing) * tick_spacing
+        self.ratios = [get_sqrt_ratio_at_tick(tick) for tick in range(self.min_tick, self.max_tick + 1, tick_spacing)]
+
+    def __call__(self, tick):
+        offset = tick - self.min_tick
+        if offset % self.tick_spacing == 0 and self.min_tick <= tick <= self.max_tick:
+            return self.ratios[offset // self.tick_spacing]
+        return get_sqrt_ratio_at_tick(tick)
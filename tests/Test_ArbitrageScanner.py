@@ -0,0 +1,73 @@
+import math
+from arbitrageScanner import ArbitrageScanner
+from getMultiPoolPath import append_hex
+
+Atoken = "0x" + "a" * 40
+Btoken = "0x" + "b" * 40
+Xtoken = "0x" + "c" * 40
+q96 = 2**96
+
+
+class SwapEvent(dict):
+    def __init__(self, address, sqrt_price_x96):
+        super().__init__(sqrtPriceX96=sqrt_price_x96)
+        self.address = address
+
+
+def sqrtp(price):
+    return int(math.sqrt(price) * q96)
+
+
+def test_no_cycle_on_consistent_prices():
+    # A/B = 2, B/X = 3, A/X = 6
+    scanner = ArbitrageScanner.from_created_pools(
+        [Atoken, Btoken, Atoken], [Btoken, Xtoken, Xtoken], [500, 500, 3000],
+        ["0x01", "0x02", "0x03"], [sqrtp(2), sqrtp(3), sqrtp(6)],
+    )
+    assert scanner.scan() == []
+    # small moves are eaten by the fees
+    assert scanner.on_swaps([SwapEvent("0x03", sqrtp(6.01))]) == []
+
+
+def test_cycle_after_swap():
+    scanner = ArbitrageScanner.from_created_pools(
+        [Atoken, Btoken, Atoken], [Btoken, Xtoken, Xtoken], [500, 500, 3000],
+        ["0x01", "0x02", "0x03"], [sqrtp(2), sqrtp(3), sqrtp(6)],
+    )
+    assert scanner.scan() == []
+
+    # X got cheap in the A/X pool: buy X with A there, sell X for B and B for A
+    cycles = scanner.on_swaps([SwapEvent("0x03", sqrtp(6.6))])
+    assert len(cycles) == 1
+    cycle = cycles[0]
+    route = cycle.route
+    assert route.tokens[0] == route.tokens[-1]
+    assert set(route.tokens) == {Atoken, Btoken, Xtoken}
+    assert abs(cycle.profit - (6.6 / 6 * 0.9995 * 0.9995 * 0.997 - 1)) < 1e-9
+    assert cycle.path == append_hex(route.hops())
+
+    # still there on the next scan, gone once the price is back
+    assert len(scanner.scan()) == 1
+    assert scanner.on_swaps([SwapEvent("0x03", sqrtp(6))]) == []
+
+
+def test_lower_case_swaps_reach_checksummed_pools():
+    # the factory hands out checksummed addresses, the EventIndexer lower case ones
+    pool = "0x" + "Ab" * 20
+    scanner = ArbitrageScanner.from_created_pools(
+        [Atoken, Btoken, Atoken], [Btoken, Xtoken, Xtoken], [500, 500, 3000],
+        ["0x01", "0x02", pool], [sqrtp(2), sqrtp(3), sqrtp(6)],
+    )
+    assert scanner.scan() == []
+    assert len(scanner.on_swaps([SwapEvent(pool.lower(), sqrtp(6.6))])) == 1
+
+
+def test_parallel_fee_tiers_and_min_profit():
+    scanner = ArbitrageScanner(min_profit=0.05)
+    scanner.add_pool(Atoken, Btoken, 500, "0x01", sqrtp(2))
+    scanner.add_pool(Atoken, Btoken, 3000, "0x02", sqrtp(2.1))
+    assert scanner.scan() == []
+    scanner.update_price("0x02", sqrtp(2.5))
+    cycles = scanner.scan()
+    assert len(cycles) == 1
+    assert sorted(cycles[0].route.fees) == [500, 3000]
@@ -0,0 +1,69 @@
+import random
+from compactGraph import CompactTokenGraph
+from poolPathCreator import TokenGraph
+
+
+def random_pools(tokens, pools, seed):
+    rng = random.Random(seed)
+    names = ["0x%040x" % (i + 1) for i in range(tokens)]
+    created = set()
+    while len(created) < pools:
+        token_a, token_b = rng.sample(names, 2)
+        created.add((min(token_a, token_b), max(token_a, token_b), rng.choice([500, 3000, 10000])))
+    created = sorted(created)
+    return names, [pool[0] for pool in created], [pool[1] for pool in created], [pool[2] for pool in created]
+
+
+def test_same_routes_as_token_graph():
+    names, tokens0, tokens1, fees = random_pools(40, 90, seed=3)
+    addresses = ["0x%040x" % (0x1000 + i) for i in range(len(fees))]
+    compact = CompactTokenGraph.from_created_pools(tokens0, tokens1, fees, addresses)
+    graph = TokenGraph.from_created_pools(tokens0, tokens1, fees, addresses)
+
+    assert len(compact) == len(graph.tokens)
+    assert compact.pool_count == 90
+    for start in names[:5]:
+        bounded = graph.bounded_routes(start, 2)
+        for target in names:
+            route = compact.shortest_route(start, target)
+            expected = graph.shortest_route(start, target)
+            if expected is None:
+                assert route is None
+            else:
+                assert abs(route.cost - expected.cost) < 1e-12
+                assert route.tokens[0] == start and route.tokens[-1] == target
+
+            route = compact.bounded_route(start, target, 2)
+            if target == start:
+                continue
+            if target not in bounded:
+                assert route is None
+            else:
+                assert len(route) <= 2
+                assert abs(route.cost - bounded[target].cost) < 1e-12
+
+
+def test_edges_and_attributes():
+    compact = CompactTokenGraph.from_created_pools(["B", "A"], ["A", "C"], [3000, 500], liquidities=[2**128 - 1, 5])
+    token_a = compact.token_id("A")
+    edges = compact.adj_token[compact.indptr[token_a]:compact.indptr[token_a + 1]]
+    assert sorted(compact.tokens[token] for token in edges) == ["B", "C"]
+    assert compact.pool(0).key == ("A", "B", 3000)
+    # uint128 liquidity is kept exact
+    assert compact.liquidity(0) == 2**128 - 1 and compact.liquidity(1) == 5
+    assert compact.pool(0).address is None
+    assert compact.shortest_route("B", "C").hops() == ["B", 3000, "A", 500, "C"]
+    assert compact.shortest_route("B", "D") is None
+
+
+def test_addresses_and_token_case():
+    # checksummed and lower case spellings of a token are one node, pool addresses an index
+    Atoken, Btoken, Xtoken = "0x" + "Aa" * 20, "0x" + "Bb" * 20, "0x" + "cc" * 20
+    compact = CompactTokenGraph.from_created_pools(
+        [Atoken, Btoken.lower()], [Btoken, Xtoken], [3000, 500], ["0x" + "01" * 20, "0x" + "02" * 20],
+    )
+    assert len(compact) == 3 and compact.tokens[:2] == [Atoken, Btoken]
+    assert list(compact.pool_address) == [0, 1] and compact.address(1) == "0x" + "02" * 20
+    route = compact.shortest_route(Atoken.lower(), Xtoken.upper().replace("0X", "0x"))
+    assert route.tokens == [Atoken, Btoken, Xtoken]
+    assert [pool.address for pool in route.pools] == ["0x" + "01" * 20, "0x" + "02" * 20]
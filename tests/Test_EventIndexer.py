@@ -0,0 +1,150 @@
+import pytest
+
+from eventIndexer import EVENTS, EventIndexer, read_events
+
+FACTORY = "0x" + "f" * 40
+NFT = "0x" + "e" * 40
+POOL = "0x" + "1" * 40
+OTHER = "0x" + "2" * 40
+Atoken = "0x" + "a" * 40
+Btoken = "0x" + "b" * 40
+ZERO = "0x" + "0" * 40
+TOPICS = {name: bytes([index + 1]) * 32 for index, name in enumerate(EVENTS)}
+
+
+def word(value):
+    if isinstance(value, str):
+        return bytes(12) + bytes.fromhex(value[2:])
+    return (value % 2**256).to_bytes(32, "big")
+
+
+def make_log(name, address, block, log_index, **args):
+    topics = [TOPICS[name]]
+    data = b""
+    for argument, _, indexed in EVENTS[name][2]:
+        if indexed:
+            topics.append(word(args[argument]))
+        else:
+            data += word(args[argument])
+    # providers hand back hex strings or bytes, both are accepted
+    return {"address": address, "topics": topics, "data": "0x" + data.hex(), "blockNumber": block, "logIndex": log_index,
+            "transactionHash": bytes([block % 256]) * 32}
+
+
+class Node:
+    def __init__(self, logs, head, max_results=3):
+        self.logs = logs
+        self.head = head
+        self.max_results = max_results
+        self.queries = []
+        # blocks from this one on have the hashes of another fork
+        self.fork_block = None
+
+    def get_logs(self, params):
+        self.queries.append((params["fromBlock"], params["toBlock"]))
+        addresses = params["address"] if isinstance(params["address"], list) else [params["address"]]
+        logs = [
+            log for log in self.logs
+            if params["fromBlock"] <= log["blockNumber"] <= params["toBlock"]
+            and log["address"] in addresses and log["topics"][0] in params["topics"][0]
+        ]
+        if len(logs) > self.max_results:
+            raise ValueError("query returned more than " + str(self.max_results) + " results")
+        return logs
+
+    def block_number(self):
+        return self.head
+
+    def block_hash(self, number):
+        fork = 1 if self.fork_block is not None and number >= self.fork_block else 0
+        return number.to_bytes(31, "big") + bytes([fork])
+
+    def get_block(self, number):
+        return {"hash": self.block_hash(number), "parentHash": self.block_hash(number - 1)}
+
+
+def chain():
+    return [
+        make_log("PoolCreated", FACTORY, 3, 0, token0=Atoken, token1=Btoken, fee=3000, pool=POOL),
+        make_log("Mint", POOL, 3, 1, sender=NFT, owner=NFT, tickLower=-600, tickUpper=600, amount=10**21, amount0=2**200, amount1=5),
+        make_log("Transfer", NFT, 3, 2, **{"from": ZERO, "to": Atoken, "id": 1}),
+        # same event from an address that is not one of our pools
+        make_log("Swap", OTHER, 5, 0, sender=Atoken, recipient=Atoken, amount0=1, amount1=-1, sqrtPriceX96=1, liquidity=1, tick=0),
+        make_log("Swap", POOL, 7, 0, sender=Atoken, recipient=Btoken, amount0=10**18, amount1=-(10**18 - 3), sqrtPriceX96=2**96 - 5, liquidity=10**21, tick=-1),
+        make_log("Swap", POOL, 7, 1, sender=Atoken, recipient=Btoken, amount0=-7, amount1=9, sqrtPriceX96=2**96 - 4, liquidity=10**21, tick=-1),
+        make_log("Swap", POOL, 8, 0, sender=Atoken, recipient=Btoken, amount0=-7, amount1=9, sqrtPriceX96=2**96 - 3, liquidity=10**21, tick=-1),
+        make_log("Swap", POOL, 8, 1, sender=Atoken, recipient=Btoken, amount0=-7, amount1=9, sqrtPriceX96=2**96 - 2, liquidity=10**21, tick=-1),
+        make_log("Burn", POOL, 9, 0, owner=NFT, tickLower=-600, tickUpper=600, amount=10**20, amount0=1, amount1=2),
+        make_log("Collect", POOL, 9, 1, owner=NFT, recipient=Atoken, tickLower=-600, tickUpper=600, amount0=1, amount1=2),
+        make_log("Transfer", NFT, 9, 2, **{"from": Atoken, "to": ZERO, "id": 1}),
+    ]
+
+
+def test_backfill_decodes_and_resumes(tmp_path):
+    db_path = str(tmp_path / "events.db")
+    node = Node(chain()[:5], head=7)
+    indexer = EventIndexer(db_path, node.get_logs, node.block_number, FACTORY, NFT, chunk_size=4, confirmations=0, topics=TOPICS)
+    seen = []
+    indexer.subscribe(seen.append)
+    assert indexer.run() == 7
+    assert [event.name for event in seen] == ["PoolCreated", "Mint", "Transfer", "Swap"]
+    indexer.close()
+
+    # a restart picks up after the checkpoint and knows the pools created before
+    node.logs = chain()
+    node.head = 9
+    indexer = EventIndexer(db_path, node.get_logs, node.block_number, FACTORY, NFT, chunk_size=4, confirmations=0, topics=TOPICS)
+    assert indexer.next_block == 8 and indexer.pools == {POOL}
+    indexer.run()
+
+    events = list(read_events(indexer.db, ["Mint", "Burn", "Swap"], address=POOL))
+    assert [(event.name, event.block_number, event.log_index) for event in events] == [
+        ("Mint", 3, 1), ("Swap", 7, 0), ("Swap", 8, 0), ("Swap", 8, 1), ("Burn", 9, 0),
+    ]
+    mint = events[0]
+    assert mint == {"sender": NFT, "owner": NFT, "tickLower": -600, "tickUpper": 600, "amount": 10**21, "amount0": 2**200, "amount1": 5}
+    assert events[1]["amount1"] == -(10**18 - 3) and events[1].address == POOL
+    transfers = list(read_events(indexer.db, ["Transfer"], from_block=4))
+    assert [(event["from"], event["to"], event["id"]) for event in transfers] == [(Atoken, ZERO, 1)]
+    assert indexer.db.execute("SELECT count(*) FROM swap").fetchone()[0] == 3
+
+
+def test_chunks_shrink_on_errors_and_grow_back(tmp_path):
+    logs = chain()
+    logs += [make_log("Transfer", NFT, block, 0, **{"from": Atoken, "to": Btoken, "id": 1}) for block in range(20, 200)]
+    node = Node(logs, head=1000, max_results=3)
+    indexer = EventIndexer(str(tmp_path / "events.db"), node.get_logs, node.block_number, FACTORY, NFT, chunk_size=64,
+                           max_chunk_size=512, confirmations=0, topics=TOPICS)
+    assert indexer.run() == 1000
+    assert indexer.db.execute("SELECT count(*) FROM transfer").fetchone()[0] == 182
+    # small ranges through the busy blocks, then back to big ones
+    assert min(to - start for start, to in node.queries) < 4
+    assert node.queries[-1][1] - node.queries[-1][0] + 1 >= 256
+
+    # a single block that always fails is an error, not an endless loop
+    node.logs += [make_log("Transfer", NFT, 1005, index, **{"from": Atoken, "to": Btoken, "id": 2}) for index in range(4)]
+    node.head = 1010
+    with pytest.raises(ValueError):
+        indexer.run()
+    assert indexer.next_block == 1005
+
+
+def test_reorged_blocks_are_indexed_again(tmp_path):
+    node = Node(chain()[:6], head=7)
+    indexer = EventIndexer(str(tmp_path / "events.db"), node.get_logs, node.block_number, FACTORY, NFT, chunk_size=2,
+                           confirmations=0, topics=TOPICS, get_block=node.get_block)
+    dropped = []
+    indexer.subscribe_reorgs(dropped.append)
+    assert indexer.run() == 7
+    assert indexer.db.execute("SELECT count(*) FROM swap").fetchone()[0] == 2
+
+    # blocks 6 and 7 are replaced: the swaps of block 7 are gone, one lands in block 8
+    node.fork_block = 6
+    node.logs = chain()[:4] + [make_log("Swap", POOL, 8, 0, sender=Atoken, recipient=Btoken, amount0=-7, amount1=9,
+                                        sqrtPriceX96=2**96 - 3, liquidity=10**21, tick=-1)]
+    node.head = 9
+    assert indexer.run() == 9
+    assert dropped == [6]
+    swaps = list(read_events(indexer.db, ["Swap"], address=POOL))
+    assert [(event.block_number, event.log_index) for event in swaps] == [(8, 0)]
+    assert indexer.db.execute("SELECT count(*) FROM mint").fetchone()[0] == 1
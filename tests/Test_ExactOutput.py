@@ -0,0 +1,82 @@
+import pytest
+
+from exactOutput import estimate_amount_in, exact_output_amount_in, quote_exact_output, route_exact_output
+from pathCodec import encode_path
+from poolPathCreator import TokenGraph
+from poolSimulator import NotEnoughLiquidity, PoolState, quote_multi
+from tickMath import get_sqrt_ratio_at_tick
+
+Atoken = "0x" + "a" * 40
+Btoken = "0x" + "b" * 40
+Xtoken = "0x" + "c" * 40
+L = 10**21
+
+
+def make_pool(positions, tick=0, fee=3000, tick_spacing=60):
+    pool = PoolState(get_sqrt_ratio_at_tick(tick), tick, 0, fee, tick_spacing)
+    for lower_tick, upper_tick, liquidity in positions:
+        pool.modify_position(lower_tick, upper_tick, liquidity)
+    return pool
+
+
+def amount_out(pool, zero_for_one, amount_in):
+    try:
+        return pool.quote(zero_for_one, amount_in).amount_out
+    except (NotEnoughLiquidity, ArithmeticError):
+        return 0
+
+
+def test_smallest_input_across_ticks():
+    pool = make_pool([(-600, 600, L), (-1200, -600, 2 * L), (-1200, 1200, L), (600, 6000, L // 3)])
+    for zero_for_one in (True, False):
+        for wanted in (1, 10**6 + 7, 10**18, 3 * 10**19, 10**20 + 1):
+            amount_in = exact_output_amount_in(pool, zero_for_one, wanted)
+            assert amount_out(pool, zero_for_one, amount_in) >= wanted
+            assert amount_out(pool, zero_for_one, amount_in - 1) < wanted
+            # the backwards walk alone is already within a few wei
+            assert abs(estimate_amount_in(pool, zero_for_one, wanted) - amount_in) <= 2
+
+
+def test_not_enough_liquidity():
+    pool = make_pool([(-600, 600, L)])
+    with pytest.raises(NotEnoughLiquidity):
+        exact_output_amount_in(pool, True, 10**23)
+    with pytest.raises(ValueError):
+        exact_output_amount_in(pool, True, 0)
+
+
+def test_multi_hop_walks_backwards():
+    pools = {
+        (Atoken, Btoken, 3000): make_pool([(-600, 600, L), (-6000, 6000, L)]),
+        (Btoken, Xtoken, 500): make_pool([(-1200, 1200, L)], tick=-300, fee=500, tick_spacing=10),
+    }
+    path = encode_path([Xtoken, Btoken, Atoken], [500, 3000])
+    wanted = 5 * 10**19
+
+    quote = quote_exact_output(pools, path, wanted)
+    assert quote.amounts_in[0] == quote.amount_in and len(quote.amounts_in) == 2
+    assert quote_multi(pools, path, quote.amount_in)[0] == quote.amount_out >= wanted
+    assert quote_multi(pools, path, quote.amount_in - 1)[0] < wanted
+    # the second hop gets at least what it needs
+    assert pools[(Btoken, Xtoken, 500)].quote(False, quote.amount_in).amount_out >= quote.amounts_in[1]
+
+
+def test_router_picks_the_cheapest_route():
+    graph = TokenGraph()
+    graph.add_pool(Atoken, Btoken, 500)
+    graph.add_pool(Atoken, Btoken, 3000)
+    graph.add_pool(Atoken, Xtoken, 500)
+    graph.add_pool(Xtoken, Btoken, 500)
+    pools = {
+        # the low fee pool is too shallow for the order, the 0.3% one is deep
+        (Atoken, Btoken, 500): make_pool([(-60, 60, L // 100)], fee=500, tick_spacing=10),
+        (Atoken, Btoken, 3000): make_pool([(-6000, 6000, 100 * L)]),
+        (Atoken, Xtoken, 500): make_pool([(-600, 600, L)], fee=500, tick_spacing=10),
+    }
+    wanted = 10**20
+
+    route, quote = route_exact_output(graph, pools, Atoken, Btoken, wanted)
+    assert route.fees == [3000]
+    assert quote == quote_exact_output(pools, route.encode(), wanted)
+    # nothing can deliver more than the pools hold, and routes through unknown pools are skipped
+    assert route_exact_output(graph, pools, Atoken, Xtoken, 10**24) is None
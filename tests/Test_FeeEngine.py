@@ -0,0 +1,87 @@
+import random
+
+from feeEngine import FeeEngine
+from poolSimulator import PoolState
+from tickMath import get_sqrt_ratio_at_tick
+
+Alice = "0x" + "1" * 40
+Bob = "0x" + "2" * 40
+L = 10**21
+
+
+def swap_event(chain, zero_for_one, amount, sqrt_price_limit_x96=0):
+    result = chain.swap(zero_for_one, amount, sqrt_price_limit_x96, commit=True)
+    return {
+        "amount0": result.amount0,
+        "amount1": result.amount1,
+        "sqrtPriceX96": result.sqrt_price_x96,
+        "liquidity": result.liquidity,
+        "tick": result.tick,
+    }
+
+
+def mint_event(chain, owner, lower_tick, upper_tick, amount):
+    chain.modify_position(lower_tick, upper_tick, amount)
+    return {"owner": owner, "tickLower": lower_tick, "tickUpper": upper_tick, "amount": amount}
+
+
+def new_pool():
+    return PoolState(get_sqrt_ratio_at_tick(0), 0, 0, 3000, 60)
+
+
+def test_fees_split_by_liquidity():
+    chain = new_pool()
+    engine = FeeEngine(new_pool())
+    engine.on_mint(mint_event(chain, Alice, -600, 600, L))
+    engine.on_mint(mint_event(chain, Bob, -600, 600, 3 * L))
+    engine.on_mint(mint_event(chain, Alice, 1200, 2400, L))
+    assert engine.fees(Alice, -600, 600) == (0, 0)
+
+    engine.on_swap(swap_event(chain, True, 10**18))
+    alice0, alice1 = engine.fees(Alice, -600, 600)
+    bob0, bob1 = engine.fees(Bob, -600, 600)
+    # 0.3% of the input, split 1:3, rounded down per position
+    assert alice1 == bob1 == 0
+    assert 3 * 10**15 - 2 <= alice0 + bob0 <= 3 * 10**15
+    assert abs(3 * alice0 - bob0) <= 3
+    assert engine.fees(Alice, 1200, 2400) == (0, 0)
+
+    engine.on_swap(swap_event(chain, False, 10**18))
+    assert engine.fees(Alice, -600, 600)[0] == alice0
+    assert engine.fees(Alice, -600, 600)[1] > 0
+
+    # burning moves the fees and the liquidity into tokensOwed, collecting takes them out
+    engine.on_burn({"owner": Alice, "tickLower": -600, "tickUpper": 600, "amount": L})
+    chain.modify_position(-600, 600, -L)
+    info = engine.positions[(Alice, -600, 600)]
+    assert info.liquidity == 0 and info.tokens_owed0 > alice0
+    engine.on_collect({"owner": Alice, "tickLower": -600, "tickUpper": 600, "amount0": info.tokens_owed0, "amount1": info.tokens_owed1})
+    assert (info.tokens_owed0, info.tokens_owed1) == (0, 0)
+
+
+def test_cached_fee_growth_matches_a_fresh_engine():
+    rng = random.Random(11)
+    chain = new_pool()
+    engine = FeeEngine(new_pool())
+    owners = [Alice, Bob]
+    engine.on_mint(mint_event(chain, Bob, -60000, 60000, L))
+    for _ in range(20):
+        lower_tick = rng.randrange(-40, 40) * 60
+        engine.on_mint(mint_event(chain, rng.choice(owners), lower_tick, lower_tick + rng.randrange(1, 20) * 60, rng.randrange(1, 10) * L))
+
+    for _ in range(60):
+        zero_for_one = rng.random() < 0.5
+        if rng.random() < 0.2:
+            # a swap stopped by its price limit
+            limit = get_sqrt_ratio_at_tick(chain.tick + (-300 if zero_for_one else 300))
+            engine.on_swap(swap_event(chain, zero_for_one, 10**25, limit))
+        else:
+            engine.on_swap(swap_event(chain, zero_for_one, rng.randrange(10**6, 10**21)))
+        engine.all_fees()
+
+    assert (engine.state.sqrt_price_x96, engine.state.tick, engine.state.liquidity) == (chain.sqrt_price_x96, chain.tick, chain.liquidity)
+    assert (engine.state.fee_growth_global0_x128, engine.state.fee_growth_global1_x128) == (chain.fee_growth_global0_x128, chain.fee_growth_global1_x128)
+    assert engine.state.ticks == chain.ticks
+    fresh = FeeEngine(engine.state, engine.positions)
+    assert engine.all_fees() == fresh.all_fees()
+    assert any(fees != (0, 0) for fees in fresh.all_fees().values())
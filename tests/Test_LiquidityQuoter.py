@@ -0,0 +1,88 @@
+from liquidityMath import get_liquidity_for_amounts
+from liquidityQuoter import LiquidityQuoter, quote_liq_input_token0, quote_liq_input_token1
+from poolSimulator import PoolState
+from tickMath import get_sqrt_ratio_at_tick
+
+Atoken = "0x" + "a" * 40
+Btoken = "0x" + "b" * 40
+PoolAddress = "0x" + "9" * 40
+
+
+class SwapEvent(dict):
+    def __init__(self, address, sqrt_price_x96, tick):
+        super().__init__(sqrtPriceX96=sqrt_price_x96, tick=tick)
+        self.address = address
+
+
+class FakeFactory:
+    def __init__(self):
+        self.calls = 0
+
+    def pools(self, token_in, token_out, fee):
+        self.calls += 1
+        return PoolAddress
+
+
+class FakePool:
+    def __init__(self, sqrt_price_x96, tick):
+        self.calls = 0
+        self.slot0_ = (sqrt_price_x96, tick, 0, 1, 1)
+
+    def slot0(self):
+        self.calls += 1
+        return self.slot0_
+
+
+def test_quotes_match_the_amounts_a_mint_takes():
+    tick = 85176
+    sqrt_price_x96 = get_sqrt_ratio_at_tick(tick) + 10**20
+    amount1 = quote_liq_input_token0(sqrt_price_x96, tick, 84220, 86130, 10**18)
+    amount0 = quote_liq_input_token1(sqrt_price_x96, tick, 84220, 86130, 5000 * 10**18)
+    assert amount1 > 0 and amount0 > 0
+
+    # a position minted with the quoted pair needs at most the amounts given
+    for amount_token0, amount_token1 in ((10**18, amount1), (amount0, 5000 * 10**18)):
+        pool = PoolState(sqrt_price_x96, tick, 0, 500, 10)
+        liquidity = get_liquidity_for_amounts(
+            sqrt_price_x96, get_sqrt_ratio_at_tick(84220), get_sqrt_ratio_at_tick(86130), amount_token0, amount_token1
+        )
+        used0, used1 = pool.modify_position(84220, 86130, liquidity)
+        assert used0 <= amount_token0 + 1 and used1 <= amount_token1 + 1
+
+
+def test_strict_tick_bounds():
+    for tick in (84220, 86130, 80000):
+        sqrt_price_x96 = get_sqrt_ratio_at_tick(tick)
+        assert quote_liq_input_token0(sqrt_price_x96, tick, 84220, 86130, 10**18) == 0
+        assert quote_liq_input_token1(sqrt_price_x96, tick, 84220, 86130, 10**18) == 0
+    assert quote_liq_input_token0(get_sqrt_ratio_at_tick(84221), 84221, 84220, 86130, 10**18) > 0
+
+
+def test_slot0_is_cached_until_a_swap():
+    factory = FakeFactory()
+    pool = FakePool(get_sqrt_ratio_at_tick(85000), 85000)
+    quoter = LiquidityQuoter(factory, lambda address: pool)
+
+    requests = [(Atoken, Btoken, 500, 84220, 86130, amount) for amount in (10**16, 10**17, 10**18)]
+    quotes = quoter.quote_liq_input_token0_many(requests)
+    assert quotes == [quote_liq_input_token0(get_sqrt_ratio_at_tick(85000), 85000, 84220, 86130, request[-1]) for request in requests]
+    quoter.quote_liq_input_token1_many(requests)
+    assert factory.calls == 1 and pool.calls == 1
+
+    quoter.on_swap(SwapEvent(PoolAddress, get_sqrt_ratio_at_tick(86200), 86200))
+    assert quoter.quote_liq_input_token0_many(requests) == [0, 0, 0]
+    assert pool.calls == 1
+
+
+def test_indexed_swaps_refresh_checksummed_pools():
+    factory = FakeFactory()
+    factory.pools = lambda token_in, token_out, fee: "0x" + "Ab" * 20
+    pool = FakePool(get_sqrt_ratio_at_tick(85000), 85000)
+    quoter = LiquidityQuoter(factory, lambda address: pool)
+    request = (Atoken, Btoken, 500, 84220, 86130, 10**18)
+    assert quoter.quote_liq_input_token0(*request) > 0
+
+    # the indexer hands out lower case addresses
+    quoter.on_swap(SwapEvent("0x" + "ab" * 20, get_sqrt_ratio_at_tick(86200), 86200))
+    assert quoter.quote_liq_input_token0(*request) == 0
+    assert pool.calls == 1
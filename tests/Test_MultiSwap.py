@@ -2,6 +2,7 @@ import pytest
 import brownie
 from getError import encode_custom_error
 from getMultiPoolPath import append_hex
+from poolPathCreator import TokenGraph
 from brownie import (accounts, 
                     Contract, 
                     chain,
@@ -410,7 +411,7 @@ def init_setup_BXPool(Btoken, Xtoken, NFTContract, deployLibrary, BXPool,swapMan
 def test_MultipleSwapAB(Atoken, Btoken, ABPool,
                 BXPool,
                 Xtoken, Ytoken, XYPool,  
-                NFTContract, deployLibrary, swapManagerContract, 
+                factoryContract, NFTContract, deployLibrary, swapManagerContract, 
                 init_setup_ABPool, init_setup_XYPool, init_setup_BXPool):
     
     # fetch the accounts
@@ -436,7 +437,10 @@ def test_MultipleSwapAB(Atoken, Btoken, ABPool,
     #Check swap correctness
     Atoken.approve(swapManagerContract, 10*10**18, {"from": Bob})
     slippage = 0.03
-    path = append_hex([Atoken.address, 500, Btoken.address, 500, Xtoken.address, 500, Ytoken.address])
+    pools = TokenGraph.from_created_pools(*factoryContract.getCreatedPools({"from": account}))
+    route = pools.k_shortest_routes(Atoken.address, Ytoken.address, 1)[0]
+    assert route.hops() == [Atoken.address, 500, Btoken.address, 500, Xtoken.address, 500, Ytoken.address]
+    path = append_hex(route.hops())
 
     
     #Should revert because there is not enough liquidity
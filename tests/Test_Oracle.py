@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from oracle import Oracle, mean_tick, twaps
+
+
+def tick_cumulative(timeline, time):
+    # integral of the tick over time, timeline is [(since, tick)]
+    total = 0
+    for (start, tick), (end, _) in zip(timeline, timeline[1:] + [(time, None)]):
+        if start >= time:
+            break
+        total += tick * (min(end, time) - start)
+    return total
+
+
+def run(cardinality_next, swaps, seed):
+    rng = random.Random(seed)
+    time = 1000
+    oracle = Oracle.initialize(time, 0)
+    oracle.grow(cardinality_next)
+    timeline = [(time, 0)]
+    for _ in range(swaps):
+        time += rng.randrange(0, 30)
+        tick = rng.randrange(-5000, 5000) if rng.random() < 0.8 else oracle.tick
+        oracle.on_swap({"tick": tick}, time)
+        if tick != timeline[-1][1]:
+            timeline.append((time, tick))
+    return oracle, timeline, time + 7
+
+
+def test_observe_matches_the_tick_history():
+    oracle, timeline, now = run(100, 60, 1)
+    seconds_agos = list(range(0, now - 1000 + 1, 3))
+    assert oracle.observe(now, seconds_agos) == [tick_cumulative(timeline, now - ago) for ago in seconds_agos]
+    with pytest.raises(ValueError, match="OLD"):
+        oracle.observe_single(now, now - 999)
+
+
+def test_ring_buffer_wraps():
+    oracle, timeline, now = run(5, 80, 2)
+    assert oracle.cardinality == 5
+    oldest = min(observation.timestamp for observation in oracle.observations)
+    for ago in range(0, now - oldest + 1):
+        assert oracle.observe_single(now, ago) == tick_cumulative(timeline, now - ago)
+    with pytest.raises(ValueError, match="OLD"):
+        oracle.observe_single(now, now - oldest + 1)
+
+
+def test_batched_twaps():
+    oracles = [run(50, 40, seed)[0] for seed in range(3)]
+    now = 1000 + 40 * 30 + 7
+    windows = [1, 60, 600, 10**6]
+    rows = twaps(oracles, now, windows)
+    for oracle, row in zip(oracles, rows):
+        assert row[:3] == [oracle.twap(now, window) for window in windows[:3]]
+        assert row[3] is None
+    # rounded towards negative infinity
+    assert mean_tick(0, -7, 2) == -4
@@ -0,0 +1,72 @@
+import sqlite3
+
+from eventIndexer import Event, create_tables, store_events
+from ownerIndex import ZERO_ADDRESS, OwnerIndex
+
+NFT = "0x" + "e" * 40
+TOKEN = "0x" + "d" * 40
+POOL = "0x" + "1" * 40
+Alice = "0x" + "A" * 40
+Bob = "0x" + "B" * 40
+
+
+def transfer(block, sender, recipient, token_id, address=NFT):
+    return Event("Transfer", address, block, 0, None, {"from": sender, "to": recipient, "id": token_id})
+
+
+HISTORY = [
+    transfer(1, ZERO_ADDRESS, Alice, 0),
+    transfer(2, ZERO_ADDRESS, Alice, 1),
+    transfer(3, ZERO_ADDRESS, Bob, 2),
+    transfer(4, Alice, Bob, 0),
+    # an ERC20 Transfer has the same signature, it is not an NFT
+    transfer(5, Alice, Bob, 10**18, address=TOKEN),
+    transfer(6, ZERO_ADDRESS, Alice, 3),
+    transfer(7, Bob, ZERO_ADDRESS, 2),
+]
+
+
+class FakeNFT:
+    def __init__(self):
+        self.calls = 0
+
+    def positions(self, token_id):
+        self.calls += 1
+        return (POOL, -600 - token_id, 600 + token_id)
+
+
+def test_owners_follow_transfers_and_burns():
+    index = OwnerIndex(NFT)
+    for event in HISTORY:
+        index.on_event(event)
+    assert index.tokens_of_owner(Alice) == [1, 3]
+    assert index.tokens_of_owner(Bob.lower()) == [0]
+    assert index.balance_of(Bob) == 1
+    assert index.owner_of(2) is None and index.owner_of(0) == Bob.lower()
+    assert index.tokens_of_owner(ZERO_ADDRESS) == []
+
+    nft = FakeNFT()
+    assert index.positions_of_owner(Alice, nft) == [(1, POOL, -601, 601), (3, POOL, -603, 603)]
+    index.positions_of_owner(Alice, nft)
+    assert nft.calls == 2
+
+
+def test_from_the_indexer_database():
+    db = sqlite3.connect(":memory:")
+    create_tables(db)
+    events = [event for event in HISTORY if event.address == NFT]
+    store_events(db, events[:3])
+
+    index = OwnerIndex.from_db(db, NFT)
+    assert index.tokens_of_owner(Alice) == [0, 1]
+    store_events(db, events[3:])
+    index.catch_up(db)
+    assert index.tokens_of_owner(Alice) == [1, 3] and index.tokens_of_owner(Bob) == [0]
+
+
+def test_replaying_a_block_is_harmless():
+    index = OwnerIndex(NFT)
+    block = [transfer(9, ZERO_ADDRESS, Alice, 5), transfer(9, Alice, Bob, 5)]
+    for event in block + block:
+        index.on_event(event)
+    assert index.tokens_of_owner(Alice) == [] and index.tokens_of_owner(Bob) == [5]
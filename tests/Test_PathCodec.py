@@ -0,0 +1,54 @@
+import pytest
+from getMultiPoolPath import append_hex, makeFormattedHex
+from pathCodec import (decode_first_pool, decode_path, encode_hops, encode_paths, get_first_pool,
+                       has_multiple_pools, num_pools, skip_token)
+
+Atoken = "0x" + "a1" * 20
+Btoken = "0x" + "b2" * 20
+Xtoken = "0x" + "c3" * 20
+Ytoken = "0x" + "d4" * 20
+
+
+def old_append_hex(listOfHexs):
+    # the string concatenation append_hex used to do
+    final_hex = listOfHexs[0]
+    for hop in listOfHexs[1:]:
+        if type(hop) == int:
+            hop = makeFormattedHex(hop)
+        final_hex = final_hex + hop[2:]
+    return final_hex
+
+
+def test_encode_matches_append_hex():
+    hops = [Atoken, 500, Btoken, 3000, Xtoken, 10000, Ytoken]
+    assert append_hex(hops) == old_append_hex(hops)
+    assert encode_hops(hops).hex() == old_append_hex(hops)[2:]
+    assert len(encode_hops(hops)) == 20 + 3 * 23
+    # checksummed tokens keep their case, like before the codec
+    checksummed = ["0x" + "A1" * 20, 500, Btoken]
+    assert append_hex(checksummed) == old_append_hex(checksummed) == "0x" + "A1" * 20 + "0001f4" + "b2" * 20
+    assert append_hex(checksummed).lower()[2:] == encode_hops(checksummed).hex()
+
+
+def test_decode_like_path_sol():
+    path = encode_hops([Atoken, 500, Btoken, 3000, Xtoken])
+    assert num_pools(path) == 2
+    assert has_multiple_pools(path)
+    assert decode_first_pool(path) == (Atoken, Btoken, 500)
+    assert bytes(get_first_pool(path)) == encode_hops([Atoken, 500, Btoken])
+
+    rest = skip_token(path)
+    # no copy, the view still points into the original bytes
+    assert rest.obj is path
+    assert num_pools(rest) == 1
+    assert not has_multiple_pools(rest)
+    assert decode_first_pool(rest) == (Btoken, Xtoken, 3000)
+
+    assert decode_path(append_hex([Atoken, 500, Btoken, 3000, Xtoken])) == [(Atoken, Btoken, 500), (Btoken, Xtoken, 3000)]
+    with pytest.raises(ValueError):
+        decode_first_pool(path[:30])
+
+
+def test_batch_encoder():
+    routes = [[Atoken, 500, Btoken], [Atoken, 500, Xtoken, 3000, Btoken], [Atoken, 10000, Ytoken, 500, Btoken]]
+    assert encode_paths(routes) == [encode_hops(route) for route in routes]
@@ -0,0 +1,88 @@
+import pytest
+from poolPathCreator import TokenGraph, find_shortest_path
+
+trading_pairs = [
+    "ETH/USDT/3000",
+    "USDC/USDT/100",
+    "LINK/USDC/500",
+    "ETH/USDC/500",
+    "ETH/BCH/500",
+]
+
+
+def test_find_shortest_path():
+    assert find_shortest_path(trading_pairs, "ETH", "LINK") == ["ETH", "USDC", "LINK"]
+    assert find_shortest_path(trading_pairs, "ETH", "ETH") == ["ETH"]
+    assert find_shortest_path(trading_pairs, "ETH", "DOGE") is None
+
+
+def test_cheapest_path_beats_fewest_hops():
+    # direct pool is 1%, going through USDC costs 0.05% + 0.05%
+    graph = TokenGraph.from_trading_pairs(["ETH/LINK/10000", "ETH/USDC/500", "USDC/LINK/500"])
+    assert graph.shortest_path("ETH", "LINK") == ["ETH", "USDC", "LINK"]
+    assert graph.shortest_path("LINK", "ETH") == ["LINK", "USDC", "ETH"]
+
+    graph.add_pool("ETH", "LINK", 100)
+    assert graph.shortest_path("ETH", "LINK") == ["ETH", "LINK"]
+
+
+def test_parallel_fee_tiers():
+    Atoken = "0x" + "a" * 40
+    Btoken = "0x" + "b" * 40
+    Xtoken = "0x" + "c" * 40
+    graph = TokenGraph()
+    graph.add_pool(Btoken, Atoken, 10000, "0x01")
+    graph.add_pool(Atoken, Btoken, 3000, "0x02")
+    graph.add_pool(Atoken, Btoken, 500, "0x03")
+    graph.add_pool(Btoken, Xtoken, 3000, "0x04")
+
+    # later tiers must not overwrite the earlier ones
+    assert len(graph.pools) == 4
+    assert graph.get_pool(Btoken, Atoken, 10000).address == "0x01"
+
+    route = graph.shortest_route(Atoken, Xtoken)
+    assert route.tokens == [Atoken, Btoken, Xtoken]
+    assert route.fees == [500, 3000]
+    assert [pool.address for pool in route.pools] == ["0x03", "0x04"]
+    assert route.hops() == [Atoken, 500, Btoken, 3000, Xtoken]
+
+    # any cost function can pick among the tiers, e.g. avoid the 500 pool
+    route = graph.shortest_route(Atoken, Btoken, cost=lambda pool: 1e9 if pool.fee == 500 else pool.fee)
+    assert route.fees == [3000]
+
+
+def test_from_created_pools():
+    graph = TokenGraph.from_created_pools(["A", "A", "B"], ["B", "B", "C"], [500, 3000, 500])
+    assert sorted(pool.fee for pool in graph.edges("A")) == [500, 3000]
+    assert graph.shortest_route("C", "A").hops() == ["C", 500, "B", 500, "A"]
+
+
+def test_k_shortest_routes():
+    graph = TokenGraph.from_trading_pairs([
+        "A/B/500",
+        "A/B/3000",
+        "B/C/500",
+        "A/C/10000",
+        "A/D/500",
+        "D/C/10000",
+        "C/E/500",
+    ])
+    routes = graph.k_shortest_routes("A", "C", 10, max_hops=2)
+    assert [route.hops() for route in routes] == [
+        ["A", 500, "B", 500, "C"],
+        ["A", 3000, "B", 500, "C"],
+        ["A", 10000, "C"],
+        ["A", 500, "D", 10000, "C"],
+    ]
+    costs = [route.cost for route in routes]
+    assert costs == sorted(costs)
+
+    # loopless and within the hop bound
+    routes = graph.k_shortest_routes("A", "E", 10, max_hops=3)
+    assert len(routes) == 4
+    for route in routes:
+        assert len(route) <= 3
+        assert len(set(route.tokens)) == len(route.tokens)
+
+    assert graph.k_shortest_routes("A", "C", 2, max_hops=2) == graph.k_shortest_routes("A", "C", 10, max_hops=2)[:2]
+    assert graph.k_shortest_routes("A", "E", 3, max_hops=1) == []
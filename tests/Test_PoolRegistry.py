@@ -0,0 +1,151 @@
+import sqlite3
+
+import pytest
+
+from eventIndexer import Event, create_tables, store_events
+from liquidityQuoter import LiquidityQuoter
+from poolPathCreator import TokenGraph
+from poolRegistry import ZERO_ADDRESS, PoolRegistry
+from routingTable import RoutingTable
+
+FACTORY = "0x" + "f" * 40
+Atoken = "0x" + "A" * 40
+Btoken = "0x" + "B" * 40
+Xtoken = "0x" + "C" * 40
+
+
+class FakeFactory:
+    address = FACTORY
+
+    def __init__(self):
+        self.created = []
+        self.addresses = {}
+        self.calls = 0
+        # pools() calls left before the node fails
+        self.fail_after = None
+
+    def create_pool(self, token_a, token_b, fee):
+        token0, token1 = sorted((token_a, token_b), key=str.lower)
+        pool = "0x" + str(len(self.created) + 1) * 40
+        self.created.append((token0, token1, fee))
+        self.addresses[(token0, token1, fee)] = self.addresses[(token1, token0, fee)] = pool
+        return pool
+
+    def createdPools(self, index):
+        self.calls += 1
+        return self.created[index]
+
+    def pools(self, token_a, token_b, fee):
+        self.calls += 1
+        if self.fail_after is not None:
+            if self.fail_after == 0:
+                self.fail_after = None
+                raise ConnectionError("node went away")
+            self.fail_after -= 1
+        return self.addresses.get((token_a, token_b, fee), ZERO_ADDRESS)
+
+
+def test_sync_reads_only_new_pools():
+    factory = FakeFactory()
+    factory.create_pool(Atoken, Btoken, 3000)
+    registry = PoolRegistry(factory, reverts=(IndexError,))
+    seen = []
+    registry.subscribe(seen.append)
+
+    assert len(registry.sync()) == 1
+    assert registry.get(Btoken, Atoken, 3000) == "0x" + "1" * 40
+    assert registry.pools(Atoken, Xtoken, 3000) == ZERO_ADDRESS
+
+    factory.create_pool(Xtoken, Atoken, 500)
+    factory.create_pool(Btoken, Xtoken, 500)
+    factory.calls = 0
+    added = registry.sync()
+    # two entries, two addresses and the probe past the end
+    assert factory.calls == 5
+    assert [(event["token0"], event["token1"], event["fee"]) for event in added] == [
+        (Atoken.lower(), Xtoken.lower(), 500), (Btoken.lower(), Xtoken.lower(), 500),
+    ]
+    assert len(seen) == 3 and registry.sync() == []
+    assert len(registry) == 3 and len(registry.graph().pools) == 3
+
+
+def test_sync_resumes_after_a_node_error():
+    factory = FakeFactory()
+    for token in (Btoken, Xtoken):
+        factory.create_pool(Atoken, token, 3000)
+    registry = PoolRegistry(factory, reverts=(IndexError,))
+    factory.fail_after = 1
+    with pytest.raises(ConnectionError):
+        registry.sync()
+    # the first pool is in, the failed one is read again
+    assert len(registry) == 1 and registry.synced == 1
+    assert [event["pool"] for event in registry.sync()] == ["0x" + "2" * 40]
+    assert len(registry) == 2 and registry.synced == 2
+
+
+def test_notifications_reach_routing_and_quoting():
+    factory = FakeFactory()
+    registry = PoolRegistry(factory, reverts=(IndexError,))
+    table = RoutingTable()
+    quoter = LiquidityQuoter(registry, pool_at=None)
+    registry.subscribe(table.on_pool_created)
+    registry.subscribe(quoter.on_pool_created)
+
+    assert quoter.pool_address(Atoken, Btoken, 3000) == ZERO_ADDRESS
+    pool = factory.create_pool(Atoken, Btoken, 3000)
+    registry.sync()
+    assert table.route(Atoken.lower(), Btoken.lower()).pools[0].address == pool
+    assert quoter.pool_address(Atoken, Btoken, 3000) == pool
+
+
+def test_lower_case_pools_join_a_checksummed_graph():
+    # the table was built from getCreatedPools (checksummed), the registry announces lower case tokens
+    factory = FakeFactory()
+    factory.create_pool(Atoken, Btoken, 3000)
+    table = RoutingTable.build(TokenGraph.from_created_pools(*zip(*factory.created), ["0x" + "1" * 40]))
+    registry = PoolRegistry(factory, reverts=(IndexError,))
+    registry.subscribe(table.on_pool_created)
+
+    pool = factory.create_pool(Btoken, Xtoken, 500)
+    registry.sync()
+    # one node per token, under the spelling seen first
+    assert sorted(table.graph.tokens) == sorted([Atoken, Btoken, Xtoken.lower()])
+    assert len(table.graph.pools) == 2
+    assert [p.address for p in table.route(Atoken, Xtoken).pools] == ["0x" + "1" * 40, pool]
+    assert table.route(Atoken.lower(), Xtoken).tokens == [Atoken, Btoken, Xtoken.lower()]
+
+
+def test_follows_logs_and_the_indexer_database():
+    factory = FakeFactory()
+    pools = [factory.create_pool(Atoken, Btoken, 3000), factory.create_pool(Atoken, Xtoken, 500)]
+    events = [
+        Event("PoolCreated", FACTORY, block, 0, None, {"token0": token0.lower(), "token1": token1.lower(), "fee": fee, "pool": pool})
+        for block, ((token0, token1, fee), pool) in enumerate(zip(factory.created, pools))
+    ]
+    db = sqlite3.connect(":memory:")
+    create_tables(db)
+    store_events(db, events[:1])
+
+    registry = PoolRegistry.from_db(db, factory, reverts=(IndexError,))
+    assert len(registry) == 1
+    registry.on_event(events[1])
+    registry.on_event(events[1])
+    assert len(registry) == 2
+    # the first sync walks createdPools once, skipping the pools known from the logs
+    factory.calls = 0
+    assert registry.sync() == [] and factory.calls == 3
+    factory.calls = 0
+    assert registry.sync() == [] and factory.calls == 1
+
+
+def test_sync_finds_pools_created_before_the_logs():
+    # logs indexed from a start_block after the factory deployment miss the first pools
+    factory = FakeFactory()
+    first = factory.create_pool(Atoken, Btoken, 3000)
+    later = factory.create_pool(Atoken, Xtoken, 500)
+    registry = PoolRegistry(factory, reverts=(IndexError,))
+    registry.on_event(Event("PoolCreated", FACTORY, 10, 0, None, {"token0": Atoken, "token1": Xtoken, "fee": 500, "pool": later}))
+
+    added = registry.sync()
+    assert [event["pool"] for event in added] == [first]
+    assert registry.get(Atoken, Btoken, 3000) == first and len(registry) == 2
@@ -0,0 +1,69 @@
+import sqlite3
+
+from eventIndexer import create_tables, store_events
+from feeEngine import FeeEngine, PositionInfo
+from poolEvents import NFT, POOL, Atoken, Btoken, Chain, run, same_state
+from poolReplica import PoolReplica, PoolReplicas
+from poolSimulator import PoolState
+from tickMath import get_sqrt_ratio_at_tick
+
+
+def test_replica_follows_events():
+    chain = Chain()
+    seed, seed_block = run(chain)
+    replica = PoolReplica(seed, seed_block)
+    replicas = PoolReplicas([replica])
+
+    applied = [replicas.on_event(event) for event in chain.events]
+    # the first Mint is already in the snapshot
+    assert applied == [False] + [True] * 6
+    assert replica.in_sync and same_state(replica.state, chain.pool)
+    # events seen twice are not applied again
+    assert not replicas.on_event(chain.events[-1])
+    assert replicas.states() == {(Atoken, Btoken, 3000): replica.state}
+
+
+def test_replica_feeds_the_fee_engine():
+    chain = Chain()
+    run(chain)
+    # one replica follows the pool from its creation, the other one from a snapshot after the first Mint
+    full = PoolReplica(PoolState(get_sqrt_ratio_at_tick(0), 0, 0, 3000, 60, address=POOL), fee_engine=FeeEngine(None))
+    full.fee_engine.state = full.state
+    full.apply(chain.events[0])
+    seed = full.state.copy()
+    positions = {key: PositionInfo(*(getattr(info, name) for name in info.__slots__)) for key, info in full.fee_engine.positions.items()}
+    replica = PoolReplica(seed, chain.events[0].block_number, fee_engine=FeeEngine(seed, positions))
+
+    for event in chain.events:
+        full.apply(event)
+        replica.apply(event)
+    assert same_state(replica.state, chain.pool) and same_state(full.state, chain.pool)
+    fees = replica.fee_engine.all_fees()
+    assert fees == full.fee_engine.all_fees()
+    assert fees[(NFT, -6000, 6000)][0] > 0 and fees[(NFT, -600, 600)][1] > 0
+
+
+def test_swap_that_does_not_replay_takes_the_payload():
+    chain = Chain()
+    seed, seed_block = run(chain)
+    # a snapshot that misses the liquidity minted after it
+    replica = PoolReplica(seed, seed_block)
+    for event in chain.events:
+        if event.name == "Swap":
+            replica.apply(event)
+    assert not replica.in_sync
+    assert (replica.state.sqrt_price_x96, replica.state.tick, replica.state.liquidity) == (
+        chain.pool.sqrt_price_x96, chain.pool.tick, chain.pool.liquidity)
+
+
+def test_catch_up_from_the_indexer_database():
+    chain = Chain()
+    seed, seed_block = run(chain)
+    db = sqlite3.connect(":memory:")
+    create_tables(db)
+    store_events(db, chain.events)
+
+    replica = PoolReplica(seed, seed_block)
+    assert replica.catch_up(db) == 6
+    assert same_state(replica.state, chain.pool)
+    assert replica.catch_up(db) == 0
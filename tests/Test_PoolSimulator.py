@@ -0,0 +1,108 @@
+import pytest
+
+from pathCodec import encode_path
+from poolSimulator import InvalidPriceLimit, NotEnoughLiquidity, PoolState, quote_multi
+from splitOrder import constant_liquidity_out
+from tickMath import get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio
+
+Atoken = "0x" + "a" * 40
+Btoken = "0x" + "b" * 40
+Xtoken = "0x" + "c" * 40
+q96 = 2**96
+L = 10**21
+
+
+def make_pool(positions, tick=0, fee=3000, tick_spacing=60):
+    pool = PoolState(get_sqrt_ratio_at_tick(tick), tick, 0, fee, tick_spacing)
+    for lower_tick, upper_tick, liquidity in positions:
+        pool.modify_position(lower_tick, upper_tick, liquidity)
+    return pool
+
+
+def test_swap_inside_one_range_matches_constant_liquidity():
+    pool = make_pool([(-600, 600, L)])
+    for amount_in in (10**6, 10**15, 10**18):
+        for zero_for_one in (True, False):
+            result = pool.swap(zero_for_one, amount_in)
+            amount_out = -result.amount1 if zero_for_one else -result.amount0
+            assert amount_out == constant_liquidity_out(q96, L, 3000, amount_in, zero_for_one)
+            assert result.tick == get_tick_at_sqrt_ratio(result.sqrt_price_x96)
+            assert result.liquidity == L
+    # swap without commit leaves the snapshot alone
+    assert pool.sqrt_price_x96 == q96 and pool.tick == 0
+
+
+def test_swap_crosses_ticks_and_commits():
+    pool = make_pool([(-600, 600, L), (-1200, -600, 2 * L), (-1200, 1200, L)])
+    assert pool.liquidity == 2 * L
+
+    quote = pool.quote(True, 10**20)
+    result = pool.swap(True, 10**20, commit=True)
+    assert result.amount0 == 10**20
+    assert quote == (-result.amount1, result.sqrt_price_x96, result.tick)
+    assert -600 - 600 <= result.tick < -600
+    assert pool.liquidity == result.liquidity == 3 * L
+    assert pool.fee_growth_global0_x128 > 0 and pool.fee_growth_global1_x128 == 0
+    # Tick.cross flipped the outside fee growth of the crossed tick
+    assert 0 < pool.ticks[-600].fee_growth_outside0_x128 < pool.fee_growth_global0_x128
+
+    # swapping back over -600 brings the original liquidity back
+    pool.swap(False, 10**21, get_sqrt_ratio_at_tick(0), commit=True)
+    assert pool.sqrt_price_x96 == get_sqrt_ratio_at_tick(0)
+    assert pool.liquidity == 2 * L
+    assert pool.fee_growth_global1_x128 > 0
+
+
+def test_swap_reverts_like_the_pool():
+    pool = make_pool([(-600, 600, L)])
+    with pytest.raises(InvalidPriceLimit):
+        pool.swap(True, 10**18, get_sqrt_ratio_at_tick(60))
+    with pytest.raises(InvalidPriceLimit):
+        pool.swap(False, 10**18, get_sqrt_ratio_at_tick(-60))
+    with pytest.raises(NotEnoughLiquidity):
+        pool.swap(True, 10**24, commit=True)
+    assert pool.sqrt_price_x96 == q96 and pool.liquidity == L
+
+    # a price limit stops the swap early and keeps the rest of the input
+    limit = get_sqrt_ratio_at_tick(-300)
+    result = pool.swap(True, 10**24, limit)
+    assert result.sqrt_price_x96 == limit and result.amount0 < 10**24
+
+
+def test_quote_multi_chains_the_pools():
+    pools = {
+        (Atoken, Btoken, 3000): make_pool([(-600, 600, L)]),
+        (Btoken, Xtoken, 500): make_pool([(-600, 600, L)], fee=500, tick_spacing=10),
+    }
+    path = encode_path([Xtoken, Btoken, Atoken], [500, 3000])
+    amount_out, sqrt_prices, ticks = quote_multi(pools, path, 10**18)
+
+    first = pools[(Btoken, Xtoken, 500)].quote(False, 10**18)
+    second = pools[(Atoken, Btoken, 3000)].quote(False, first.amount_out)
+    assert amount_out == second.amount_out
+    assert sqrt_prices == [first.sqrt_price_x96_after, second.sqrt_price_x96_after]
+    assert ticks == [first.tick_after, second.tick_after]
+
+
+def test_quote_many_matches_single_quotes():
+    pool = make_pool([(-600, 600, L), (-1200, -600, 2 * L), (-1200, 1200, L), (540, 3000, L)])
+    amounts = [0, 1, 10**12] + [k * 10**19 for k in range(1, 40)] + [10**30]
+    for zero_for_one in (True, False):
+        curve = pool.quote_many(zero_for_one, amounts[::-1])[::-1]
+        for amount_in, point in zip(amounts, curve):
+            try:
+                expected = pool.quote(zero_for_one, amount_in)
+            except (NotEnoughLiquidity, ArithmeticError):
+                expected = None
+            assert point == expected
+        assert curve[-1] is None and curve[3] is not None
+
+
+def test_quote_many_panics_on_a_fee_growth_underflow():
+    pool = make_pool([(-600, 600, L), (-1200, -600, 2 * L)])
+    # a fee growth outside above the global one makes Tick.cross underflow
+    pool.ticks[-600].fee_growth_outside0_x128 = 2**255
+    small, large = 10**15, 10**20
+    with pytest.raises(ArithmeticError):
+        pool.quote(True, large)
+    assert pool.quote_many(True, [small, large]) == [pool.quote(True, small), None]
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+from eventIndexer import create_tables, store_events
+from poolEvents import POOL, Chain, run, same_state
+from poolSnapshot import PoolSnapshot, write_snapshot
+from tickIndex import TickIndex
+
+OTHER = "0x" + "2" * 40
+
+
+def test_round_trip(tmp_path):
+    chain = Chain()
+    run(chain)
+    other = chain.pool.copy()
+    other.address = OTHER
+    other.modify_position(-887220, 887220, 5)
+    path = str(tmp_path / "pools.snapshot")
+    write_snapshot(path, [chain.pool, other], 42, 3)
+
+    with PoolSnapshot(path) as snapshot:
+        assert (snapshot.block_number, snapshot.log_index, len(snapshot)) == (42, 3, 2)
+        assert snapshot.addresses() == [POOL, OTHER]
+        state = snapshot.state(POOL)
+        assert same_state(state, chain.pool)
+        assert (state.fee, state.tick_spacing, state.token0, state.token1) == (3000, 60, chain.pool.token0, chain.pool.token1)
+        assert same_state(snapshot.state(OTHER.upper().replace("0X", "0x")), other)
+        # swaps on the loaded state give what the original gives
+        assert state.quote(True, 10**20) == chain.pool.quote(True, 10**20)
+        indexed = snapshot.state(POOL, TickIndex())
+        assert indexed.quote(False, 10**20, exact=False) == chain.pool.quote(False, 10**20, exact=False)
+
+        start, end = snapshot.tick_range(POOL, -1200, 600)
+        assert sorted(chain.pool.ticks)[start:end] == [tick for tick in sorted(chain.pool.ticks) if -1200 <= tick <= 600]
+
+
+def test_catch_up_after_load(tmp_path):
+    chain = Chain()
+    seed, seed_block = run(chain)
+    db = sqlite3.connect(":memory:")
+    create_tables(db)
+    store_events(db, chain.events)
+    path = str(tmp_path / "pools.snapshot")
+    write_snapshot(path, [seed], seed_block)
+
+    with PoolSnapshot(path) as snapshot:
+        replicas = snapshot.replicas(db)
+    assert same_state(replicas[POOL].state, chain.pool)
+    assert replicas[POOL].block_number == chain.events[-1].block_number
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "pools.snapshot"
+    path.write_bytes(b"FSNP" + (99).to_bytes(4, "little") + bytes(24))
+    with pytest.raises(ValueError):
+        PoolSnapshot(str(path))
+    path.write_bytes(bytes(40))
+    with pytest.raises(ValueError):
+        PoolSnapshot(str(path))
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from positionMath import calc_amount0, calc_amount1, position_amounts, sqrt_price_at_ticks
+from poolSimulator import PoolState
+from swapMath import calc_amount0_delta, calc_amount1_delta
+from tickMath import get_sqrt_ratio_at_tick
+
+
+def random_book(rng, count):
+    lower = [rng.randrange(-3000, 3000) * 60 for _ in range(count)]
+    upper = [tick + rng.randrange(1, 400) * 60 for tick in lower]
+    liquidity = [rng.randrange(1, 10**24) for _ in range(count)]
+    return np.array(lower), np.array(upper), liquidity
+
+
+def test_exact_mode_matches_math_library():
+    rng = random.Random(3)
+    lower, upper, liquidity = random_book(rng, 300)
+    pa = sqrt_price_at_ticks(lower, exact=True)
+    pb = sqrt_price_at_ticks(upper, exact=True)
+    assert list(pa) == [get_sqrt_ratio_at_tick(int(tick)) for tick in lower]
+
+    for round_up in (False, True):
+        amount0 = calc_amount0(liquidity, pb, pa, exact=True, round_up=round_up)
+        amount1 = calc_amount1(liquidity, pa, pb, exact=True, round_up=round_up)
+        assert list(amount0) == [calc_amount0_delta(a, b, liq, round_up) for a, b, liq in zip(pa, pb, liquidity)]
+        assert list(amount1) == [calc_amount1_delta(a, b, liq, round_up) for a, b, liq in zip(pa, pb, liquidity)]
+
+    # the float path agrees to float precision
+    np.testing.assert_allclose(calc_amount0(liquidity, pa.astype(float), pb.astype(float)), amount0.astype(float), rtol=1e-9)
+    np.testing.assert_allclose(calc_amount1(liquidity, pa.astype(float), pb.astype(float)), amount1.astype(float), rtol=1e-9)
+
+
+def test_position_amounts_match_the_pool():
+    rng = random.Random(5)
+    lower, upper, liquidity = random_book(rng, 200)
+    tick = 1234
+    sqrt_price_x96 = get_sqrt_ratio_at_tick(tick) + 10**20
+
+    for round_up in (False, True):
+        amount0, amount1 = position_amounts(lower, upper, liquidity, sqrt_price_x96, tick, exact=True, round_up=round_up)
+        for i in range(len(liquidity)):
+            pool = PoolState(sqrt_price_x96, tick, 0, 3000, 60)
+            delta = liquidity[i] if round_up else -liquidity[i]
+            if not round_up:
+                pool.modify_position(int(lower[i]), int(upper[i]), liquidity[i])
+            expected = pool.modify_position(int(lower[i]), int(upper[i]), delta)
+            assert (amount0[i], amount1[i]) == tuple(abs(amount) for amount in expected)
+
+    amount0_float, amount1_float = position_amounts(lower, upper, liquidity, sqrt_price_x96, tick)
+    np.testing.assert_allclose(amount0_float, amount0.astype(float), rtol=1e-6)
+    np.testing.assert_allclose(amount1_float, amount1.astype(float), rtol=1e-6)
@@ -0,0 +1,34 @@
+import random
+
+from poolSimulator import PoolState
+from positionValuer import PositionValuer
+from tickMath import get_sqrt_ratio_at_tick
+
+
+def test_bulk_balances_match_the_pool():
+    rng = random.Random(2)
+    tick = -1234
+    sqrt_price_x96 = get_sqrt_ratio_at_tick(tick) + 12345
+    bounds = [(lower, lower + rng.randrange(1, 50) * 60) for lower in (rng.randrange(-60, 40) * 60 for _ in range(30))]
+    positions = [bounds[rng.randrange(len(bounds))] + (rng.choice((1, -1)) * rng.randrange(1, 10**24),) for _ in range(500)]
+
+    sqrt_ratios = {}
+    valuer = PositionValuer(sqrt_price_x96, tick, sqrt_ratios)
+    balances = valuer.value_positions(positions)
+    assert len(sqrt_ratios) <= 2 * len(bounds)
+
+    for (lower_tick, upper_tick, liquidity), amounts in zip(positions, balances):
+        # _modifyPosition runs the same three branches as getPosTokenBalances
+        pool = PoolState(sqrt_price_x96, tick, 0, 3000, 60)
+        if liquidity < 0:
+            pool.modify_position(lower_tick, upper_tick, -liquidity)
+        assert amounts == pool.modify_position(lower_tick, upper_tick, liquidity)
+
+
+def test_valuer_follows_swaps():
+    valuer = PositionValuer(get_sqrt_ratio_at_tick(0), 0)
+    assert valuer.get_pos_token_balances(-600, 600, 10**18)[1] > 0
+    valuer.on_swap({"sqrtPriceX96": get_sqrt_ratio_at_tick(600), "tick": 600})
+    assert valuer.get_pos_token_balances(-600, 600, 10**18)[0] == 0
+    valuer.on_swap({"sqrtPriceX96": get_sqrt_ratio_at_tick(-601), "tick": -601})
+    assert valuer.get_pos_token_balances(-600, 600, 10**18)[1] == 0
@@ -0,0 +1,119 @@
+import threading
+import time
+
+from eventIndexer import Event
+from pathCodec import encode_path
+from quoteCache import QuoteCache
+
+Atoken = "0x" + "a" * 40
+Btoken = "0x" + "b" * 40
+Xtoken = "0x" + "c" * 40
+
+
+class PoolEvent:
+    def __init__(self, name, address):
+        self.name = name
+        self.address = address
+
+
+def pool_address(token_in, token_out, fee):
+    return "pool-" + "-".join(sorted((token_in[-1], token_out[-1]))) + "-" + str(fee)
+
+
+class Quoter:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def quote_single(self, token_in, token_out, fee, amount_in, sqrt_price_limit_x96):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return (amount_in // 2, 2**96, 0)
+
+    def quote_multi(self, path, amount_in):
+        with self.lock:
+            self.calls += 1
+        return (amount_in // 4, [2**96, 2**96], [0, 0])
+
+
+def new_cache(quoter, max_entries=100):
+    return QuoteCache(quoter.quote_single, quoter.quote_multi, pool_address, max_entries)
+
+
+def test_hits_and_precise_invalidation():
+    quoter = Quoter()
+    cache = new_cache(quoter)
+    path = encode_path([Atoken, Btoken, Xtoken], [500, 3000])
+
+    assert cache.quote_single(Atoken, Btoken, 500, 10**18) == (10**18 // 2, 2**96, 0)
+    cache.quote_single(Atoken, Btoken, 500, 10**18)
+    cache.quote_single(Btoken, Xtoken, 3000, 10**18)
+    cache.quote_multi(path, 10**18)
+    cache.quote_multi("0x" + path.hex(), 10**18)
+    assert quoter.calls == 3
+    assert cache.stats()["hits"] == 2
+
+    # a Swap in the B/X pool only drops the quotes going through it
+    cache.on_event(PoolEvent("Collect", pool_address(Btoken, Xtoken, 3000)))
+    cache.on_event(PoolEvent("Swap", pool_address(Btoken, Xtoken, 3000)))
+    assert cache.stats()["invalidations"] == 2
+    cache.quote_single(Atoken, Btoken, 500, 10**18)
+    assert quoter.calls == 3
+    cache.quote_multi(path, 10**18)
+    cache.quote_single(Btoken, Xtoken, 3000, 10**18)
+    assert quoter.calls == 5
+
+
+def test_lru_eviction():
+    quoter = Quoter()
+    cache = new_cache(quoter, max_entries=2)
+    for amount in (1, 2, 1, 3):
+        cache.quote_single(Atoken, Btoken, 500, amount)
+    # 2 was the least recently used
+    assert cache.stats()["evictions"] == 1
+    cache.quote_single(Atoken, Btoken, 500, 1)
+    cache.quote_single(Atoken, Btoken, 500, 2)
+    assert quoter.calls == 4
+
+
+def test_concurrent_identical_quotes_are_coalesced():
+    quoter = Quoter(delay=0.05)
+    cache = new_cache(quoter)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.quote_single(Atoken, Btoken, 500, 10**18))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert quoter.calls == 1
+    assert results == [(10**18 // 2, 2**96, 0)] * 8
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["coalesced"] + stats["hits"] == 7
+
+
+def test_indexed_events_invalidate_checksummed_pools():
+    quoter = Quoter()
+    # factory.pools through brownie returns checksummed addresses, the indexer lower case ones
+    cache = QuoteCache(quoter.quote_single, quoter.quote_multi, lambda *pool: "0x" + "AbCd" * 10)
+    cache.quote_single(Atoken, Btoken, 500, 10**18)
+    cache.on_event(Event("Swap", "0x" + "abcd" * 10, 1, 0, None, {}))
+    assert cache.stats()["invalidations"] == 1
+    cache.quote_single(Atoken, Btoken, 500, 10**18)
+    assert quoter.calls == 2
+
+
+def test_pools_created_later_are_looked_up_again():
+    quoter = Quoter()
+    addresses = {}
+    cache = QuoteCache(quoter.quote_single, quoter.quote_multi, lambda *pool: addresses.get(pool, "0x" + "0" * 40))
+    assert cache.pool_address(Atoken, Btoken, 500) == "0x" + "0" * 40
+    addresses[(Atoken, Btoken, 500)] = "0x" + "1" * 40
+    assert cache.pool_address(Atoken, Btoken, 500) == "0x" + "1" * 40
+
+    # a changed address is only seen after the PoolCreated event
+    addresses[(Atoken, Btoken, 500)] = "0x" + "2" * 40
+    assert cache.pool_address(Atoken, Btoken, 500) == "0x" + "1" * 40
+    cache.on_event(Event("PoolCreated", "0x" + "f" * 40, 1, 0, None, {"token0": Atoken, "token1": Btoken, "fee": 500, "pool": "0x" + "2" * 40}))
+    assert cache.pool_address(Atoken, Btoken, 500) == "0x" + "2" * 40
@@ -3,10 +3,13 @@ import brownie
 import math
 from getError import encode_custom_error
 from getMultiPoolPath import append_hex
+from poolPathCreator import TokenGraph
+from poolSimulator import PoolState, quote_multi
+from quoterMulticall import QuoterMulticall as QuoterMulticallClient
 from brownie import (accounts, 
                     Contract, 
                     chain,
-                    MockToken, PoolFactory, Quoter, Pool, NFT, HelpFunctions)
+                    MockToken, PoolFactory, Quoter, QuoterMulticall, Pool, NFT, HelpFunctions)
 
 @pytest.fixture
 def deployLibrary():
@@ -460,4 +463,78 @@ def test_quoter(Atoken, Btoken, ABPool,
     amountInDesired=1*10**18
 
     quoteInput0 = quoterContract.quoteLiqInputToken0([tokenIn, tokenOut, fee, lowerTick, upperTick, amountInDesired], {"from":account})
-    print(quoteInput0)
\ No newline at end of file
+    print(quoteInput0)
+
+
+def test_quoterMulticall(Atoken, Btoken, ABPool,
+                BXPool,
+                Xtoken, Ytoken, XYPool,
+                quoterContract, factoryContract,
+                NFTContract, deployLibrary,
+                init_setup_ABPool, init_setup_XYPool, init_setup_BXPool):
+    # fetch the accounts
+    account = accounts[0]
+
+    multicall = QuoterMulticall.deploy(quoterContract, {"from":account})
+    client = QuoterMulticallClient(multicall, quoterContract)
+
+    amountIn = 0.00001*10**18
+    pools = TokenGraph.from_created_pools(*factoryContract.getCreatedPools({"from": account}))
+    route = pools.k_shortest_routes(Atoken.address, Ytoken.address, 1)[0]
+    assert route.hops() == [Atoken.address, 500, Btoken.address, 500, Xtoken.address, 500, Ytoken.address]
+    path = append_hex(route.hops())
+    single = client.quote_single(Atoken.address, Btoken.address, 500, amountIn)
+    multi = client.quote_multi(path, amountIn)
+    liquidity = client.quote_liq_input_token0(Atoken.address, Btoken.address, 500, 84220, 86130, 1*10**18)
+    #Price limit above the current price for a zeroForOne swap
+    failing = client.quote_single(Atoken.address, Btoken.address, 500, amountIn, 2**159)
+    results = client.execute({"from":account})
+
+    #Same results as one eth_call per quote
+    assert results[single].success
+    assert results[single].result == quoterContract.quoteSingle.call(Atoken.address, Btoken.address, 500, amountIn, 0, {"from":account})
+    assert results[multi].result == quoterContract.quoteMulti.call(path, amountIn, {"from":account})
+    assert results[liquidity].result == quoterContract.quoteLiqInputToken0(Atoken.address, Btoken.address, 500, 84220, 86130, 1*10**18, {"from":account})
+    assert not results[failing].success
+    assert results[failing].error == 'InvalidPriceLimit'
+
+
+def test_simulator_matches_the_quoter(Atoken, Btoken, ABPool,
+                BXPool,
+                Xtoken, Ytoken, XYPool,
+                quoterContract,
+                NFTContract, deployLibrary,
+                init_setup_ABPool, init_setup_XYPool, init_setup_BXPool):
+    # fetch the accounts
+    account = accounts[0]
+
+    #The pool as the simulator reads it from the chain
+    AB = PoolState.from_contract(ABPool)
+    pools = {(AB.token0.lower(), AB.token1.lower(), AB.fee): AB}
+    zeroForOne = Atoken.address.lower() < Btoken.address.lower()
+
+    #The first initialized tick the A -> B swap reaches
+    initialized = [tick for tick, info in AB.ticks.items() if info.liquidity_gross > 0]
+    if zeroForOne:
+        crossedTick = max(tick for tick in initialized if tick <= AB.tick)
+    else:
+        crossedTick = min(tick for tick in initialized if tick > AB.tick)
+
+    #Smallest power of two amount that goes past it
+    amountIn = 10**15
+    while True:
+        quote = AB.quote(zeroForOne, amountIn)
+        if (quote.tick_after < crossedTick) if zeroForOne else (quote.tick_after >= crossedTick):
+            break
+        amountIn *= 2
+
+    #Same amount out, price and tick as the contract
+    assert tuple(quote) == tuple(quoterContract.quoteSingle.call(Atoken.address, Btoken.address, 500, amountIn, 0, {"from":account}))
+
+    #quoteMulti over the same pool gives the same numbers
+    path = append_hex([Atoken.address, 500, Btoken.address])
+    amountOut, sqrtPricesAfter, ticksAfter = quote_multi(pools, path, amountIn)
+    quotedVals = quoterContract.quoteMulti.call(path, amountIn, {"from":account})
+    assert amountOut == quote.amount_out == quotedVals[0]
+    assert list(sqrtPricesAfter) == list(quotedVals[1]) == [quote.sqrt_price_x96_after]
+    assert list(ticksAfter) == list(quotedVals[2]) == [quote.tick_after]
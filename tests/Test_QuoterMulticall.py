@@ -0,0 +1,83 @@
+import ast
+
+from quoterMulticall import QuoterMulticall, decode_revert
+
+Atoken = "0x" + "a" * 40
+Btoken = "0x" + "b" * 40
+
+
+def encode_error(reason):
+    data = reason.encode()
+    padded = data + bytes(-len(data) % 32)
+    return bytes.fromhex("08c379a0") + (32).to_bytes(32, "big") + len(data).to_bytes(32, "big") + padded
+
+
+class FakeMethod:
+    # encode_input / decode_output of a brownie contract method, with repr() standing in for the ABI
+    def __init__(self, name, quote):
+        self.name = name
+        self.quote = quote
+
+    def encode_input(self, *args):
+        return repr((self.name, args)).encode()
+
+    def decode_output(self, data):
+        return ast.literal_eval(bytes(data).decode())
+
+
+class FakeQuoter:
+    def __init__(self):
+        self.quoteSingle = FakeMethod("quoteSingle", self.quote_single)
+        self.quoteLiqInputToken0 = FakeMethod("quoteLiqInputToken0", lambda *args: 42)
+
+    def quote_single(self, token_in, token_out, fee, amount_in, limit):
+        if amount_in > 10**18:
+            raise ValueError("NotEnoughLiquidity")
+        return (amount_in // 2, 2**96, 0)
+
+
+class FakeAggregate:
+    def __init__(self, quoter):
+        self.quoter = quoter
+        self.batches = []
+
+    def call(self, calls):
+        self.batches.append(calls)
+        results = []
+        for data in calls:
+            name, args = ast.literal_eval(data.decode())
+            try:
+                value = getattr(self.quoter, name).quote(*args)
+            except ValueError as error:
+                results.append((False, encode_error(str(error))))
+                continue
+            results.append((True, repr(value).encode()))
+        return results
+
+
+class FakeMulticall:
+    def __init__(self, quoter):
+        self.aggregate = FakeAggregate(quoter)
+
+
+def test_batch_in_one_call():
+    quoter = FakeQuoter()
+    multicall = FakeMulticall(quoter)
+    client = QuoterMulticall(multicall, quoter)
+
+    first = client.quote_single(Atoken, Btoken, 500, 10**18)
+    failing = client.quote_single(Atoken, Btoken, 500, 10**19)
+    liquidity = client.quote_liq_input_token0(Atoken, Btoken, 500, -600, 600, 10**18)
+    results = client.execute()
+
+    assert len(multicall.aggregate.batches) == 1
+    assert results[first] == (True, (10**18 // 2, 2**96, 0), None)
+    assert results[failing] == (False, None, "NotEnoughLiquidity")
+    assert results[liquidity].result == 42
+    assert client.execute() == []
+
+
+def test_decode_revert():
+    assert decode_revert(encode_error("InvalidPriceLimit")) == "InvalidPriceLimit"
+    assert decode_revert(bytes.fromhex("4e487b71") + (0x11).to_bytes(32, "big")) == "Panic(0x11)"
+    assert decode_revert(b"") == "reverted without a reason"
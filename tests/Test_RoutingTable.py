@@ -0,0 +1,63 @@
+import pytest
+from poolPathCreator import TokenGraph
+from routingTable import RoutingTable
+
+
+@pytest.fixture
+def graph():
+    return TokenGraph.from_created_pools(
+        ["A", "A", "B", "C", "D"],
+        ["B", "B", "C", "D", "E"],
+        [3000, 500, 500, 10000, 500],
+        ["0x01", "0x02", "0x03", "0x04", "0x05"],
+    )
+
+
+def assert_same_routes(table, other):
+    assert table.routes.keys() == other.routes.keys()
+    for source in table.routes:
+        assert table.routes[source] == other.routes[source]
+
+
+def test_build_and_lookup(graph):
+    table = RoutingTable.build(graph, max_hops=3)
+    assert table.route("A", "D").hops() == ["A", 500, "B", 500, "C", 10000, "D"]
+    # E is four pools away from A
+    assert table.route("A", "E") is None
+    assert table.route("B", "E").tokens == ["B", "C", "D", "E"]
+
+
+def test_pool_created_updates_only_affected_sources(graph):
+    table = RoutingTable.build(graph, max_hops=3)
+    table.add_pool("X", "Y", 500, "0x10")
+    xy_routes = table.routes["X"]
+
+    affected = table.on_pool_created({"token0": "A", "token1": "E", "fee": 500, "pool": "0x06"})
+    assert affected == {"A", "B", "C", "D", "E"}
+    assert table.routes["X"] is xy_routes
+    assert table.route("A", "E").hops() == ["A", 500, "E"]
+    assert table.route("B", "E").tokens == ["B", "A", "E"]
+
+    assert_same_routes(table, RoutingTable.build(table.graph, max_hops=3))
+
+
+def test_pool_that_improves_nothing_keeps_the_routes(graph):
+    table = RoutingTable.build(graph, max_hops=3)
+    c_routes, d_routes = table.routes["C"], table.routes["D"]
+    # a third A/B pool, dearer than the two there already: C and D reach A and B cheaper without it
+    affected = table.add_pool("A", "B", 10000, "0x07")
+    assert "C" not in affected and "D" not in affected
+    assert table.routes["C"] is c_routes and table.routes["D"] is d_routes
+    assert table.route("A", "B").pools[0].address == "0x02"
+    assert_same_routes(table, RoutingTable.build(table.graph, max_hops=3))
+
+
+def test_save_and_load(graph, tmp_path):
+    table = RoutingTable.build(graph, max_hops=2)
+    path = str(tmp_path / "routes.json")
+    table.save(path)
+
+    loaded = RoutingTable.load(path)
+    assert loaded.max_hops == 2
+    assert_same_routes(table, loaded)
+    assert loaded.route("A", "C").pools[0].address == "0x02"
@@ -0,0 +1,75 @@
+from getMultiPoolPath import append_hex
+from poolPathCreator import TokenGraph
+from splitOrder import ConstantLiquidityCurves, split_order
+
+Atoken = "0x" + "a" * 40
+Btoken = "0x" + "b" * 40
+Xtoken = "0x" + "c" * 40
+q96 = 2**96
+
+
+def test_split_order_across_fee_tiers_and_routes():
+    graph = TokenGraph()
+    graph.add_pool(Atoken, Btoken, 500)
+    graph.add_pool(Atoken, Btoken, 3000)
+    graph.add_pool(Atoken, Xtoken, 500)
+    graph.add_pool(Xtoken, Btoken, 500)
+    curves = ConstantLiquidityCurves({
+        (Atoken, Btoken, 500): (q96, 10**21, 500),
+        (Atoken, Btoken, 3000): (q96, 10**22, 3000),
+        (Atoken, Xtoken, 500): (q96, 10**20, 500),
+        (Btoken, Xtoken, 500): (q96, 10**20, 500),
+    })
+    routes = graph.k_shortest_routes(Atoken, Btoken, 3, max_hops=2)
+    amount_in = 50 * 10**18
+
+    legs = split_order(routes, amount_in, curves, steps=200)
+    assert sum(leg.amount_in for leg in legs) == amount_in
+    assert len(legs) == 3
+
+    best_single = max(curves(route, amount_in) for route in routes)
+    assert sum(leg.amount_out for leg in legs) > best_single
+
+    # every leg is a path for swapMulti
+    assert sorted(leg.path for leg in legs) == sorted(append_hex(route.hops()) for route in routes)
+
+
+def test_split_order_small_amounts():
+    graph = TokenGraph()
+    graph.add_pool(Atoken, Btoken, 500)
+    curves = ConstantLiquidityCurves({(Atoken, Btoken, 500): (q96, 10**21, 500)})
+    route = graph.shortest_route(Atoken, Btoken)
+
+    legs = split_order([route], 7, curves, steps=100)
+    assert [leg.amount_in for leg in legs] == [7]
+    assert split_order([route], 0, curves) == []
+
+
+def test_routes_sharing_a_pool():
+    graph = TokenGraph()
+    graph.add_pool(Atoken, Xtoken, 500)
+    graph.add_pool(Xtoken, Btoken, 500)
+    graph.add_pool(Xtoken, Btoken, 3000)
+    curves = ConstantLiquidityCurves({
+        (Atoken, Xtoken, 500): (q96, 10**20, 500),
+        (Btoken, Xtoken, 500): (q96, 10**21, 500),
+        (Btoken, Xtoken, 3000): (q96, 10**21, 3000),
+    })
+    # both routes go through the same A/X pool first
+    routes = graph.k_shortest_routes(Atoken, Btoken, 2, max_hops=2)
+    assert len(routes) == 2 and routes[0].pools[0] == routes[1].pools[0]
+    amount_in = 20 * 10**18
+
+    legs = split_order(routes, amount_in, curves, steps=50, quote_legs=curves.legs)
+    assert sum(leg.amount_in for leg in legs) == amount_in
+    # splitting the second hop still pays off, but less than quoting each leg on its own claims
+    assert len(legs) == 2
+    total = sum(leg.amount_out for leg in legs)
+    assert total > max(curves(route, amount_in) for route in routes)
+    assert total < sum(curves(route, leg.amount_in) for route, leg in zip(routes, legs))
+    assert [leg.amount_out for leg in legs] == curves.legs(
+        [route for route in routes if route.encode() in [leg.path for leg in legs]], [leg.amount_in for leg in legs])
+
+    # quoted route by route, the second route is left out instead of double counting the pool
+    legs = split_order(routes, amount_in, curves, steps=50)
+    assert [leg.path for leg in legs] == [routes[0].encode()]
@@ -0,0 +1,64 @@
+import random
+
+from poolSimulator import PoolState
+from tickBitmap import TickBitmap
+from tickIndex import TickIndex
+from tickMath import MAX_TICK, MIN_TICK, get_sqrt_ratio_at_tick
+
+
+def random_ticks(rng, tick_spacing, count):
+    return {rng.randrange(MIN_TICK // tick_spacing + 1, MAX_TICK // tick_spacing) * tick_spacing for _ in range(count)}
+
+
+def test_tick_index_matches_bitmap():
+    rng = random.Random(7)
+    for tick_spacing in (1, 10, 60):
+        bitmap = TickBitmap()
+        index = TickIndex()
+        ticks = random_ticks(rng, tick_spacing, 200) | {0, -tick_spacing, 256 * tick_spacing, -256 * tick_spacing}
+        for tick in ticks:
+            bitmap.flip_tick(tick, tick_spacing)
+            index.flip_tick(tick, tick_spacing)
+        # remove some again, like a Burn of the whole position
+        for tick in sorted(ticks)[::3]:
+            bitmap.flip_tick(tick, tick_spacing)
+            index.flip_tick(tick, tick_spacing)
+        assert TickIndex.from_words(bitmap.words).compressed == index.compressed
+
+        queries = [rng.randrange(MIN_TICK, MAX_TICK) for _ in range(500)]
+        queries += [tick + delta for tick in ticks for delta in (-1, 0, 1)]
+        for tick in queries:
+            for lte in (True, False):
+                expected = bitmap.next_initialized_tick_within_one_word(tick, tick_spacing, lte)
+                assert index.next_initialized_tick_within_one_word(tick, tick_spacing, lte) == expected
+                assert index.next_initialized_tick(tick, tick_spacing, lte) == bitmap.next_initialized_tick(tick, tick_spacing, lte)
+            assert index.is_initialized(tick, tick_spacing) == bitmap.is_initialized(tick, tick_spacing)
+
+
+def test_next_initialized_tick_without_ticks_left():
+    index = TickIndex()
+    index.flip_tick(600, 60)
+    assert index.next_initialized_tick(0, 60, False) == (600, True)
+    next_tick, initialized = index.next_initialized_tick(600, 60, False)
+    assert not initialized and next_tick >= MAX_TICK
+    next_tick, initialized = index.next_initialized_tick(0, 60, True)
+    assert not initialized and next_tick <= MIN_TICK
+
+
+def test_simulator_with_tick_index():
+    positions = [(-60000, 60000, 10**20), (-120000, -60000, 10**21), (59940, 120000, 10**19)]
+    pool = PoolState(get_sqrt_ratio_at_tick(0), 0, 0, 3000, 60)
+    for lower_tick, upper_tick, liquidity in positions:
+        pool.modify_position(lower_tick, upper_tick, liquidity)
+    indexed = pool.copy()
+    indexed.tick_bitmap = TickIndex.from_words(pool.tick_bitmap.words)
+
+    for zero_for_one in (True, False):
+        for amount_in in (10**18, 10**20, 10**21):
+            expected = pool.swap(zero_for_one, amount_in)
+            assert indexed.swap(zero_for_one, amount_in) == expected
+            # skipping the empty words only changes the per step rounding
+            fast = indexed.swap(zero_for_one, amount_in, exact=False)
+            assert fast.tick == expected.tick and fast.liquidity == expected.liquidity
+            assert abs(fast.amount0 - expected.amount0) <= 100
+            assert abs(fast.amount1 - expected.amount1) <= 100
@@ -0,0 +1,38 @@
+import random
+import pytest
+from tickMath import (MAX_SQRT_RATIO, MAX_TICK, MIN_SQRT_RATIO, MIN_TICK, SqrtRatioTable,
+                      get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio)
+
+
+def test_sqrt_ratio_at_tick():
+    assert get_sqrt_ratio_at_tick(MIN_TICK) == MIN_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(MAX_TICK) == MAX_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(0) == 2**96
+    assert get_sqrt_ratio_at_tick(1) == 79232123823359799118286999568
+    assert get_sqrt_ratio_at_tick(-1) == 79224201403219477170569942574
+    assert get_sqrt_ratio_at_tick(50) == 79426470787362580746886972461
+    with pytest.raises(ValueError):
+        get_sqrt_ratio_at_tick(MAX_TICK + 1)
+
+
+def test_tick_at_sqrt_ratio():
+    assert get_tick_at_sqrt_ratio(MIN_SQRT_RATIO) == MIN_TICK
+    assert get_tick_at_sqrt_ratio(MAX_SQRT_RATIO - 1) == MAX_TICK - 1
+    assert get_tick_at_sqrt_ratio(2**96) == 0
+    with pytest.raises(ValueError):
+        get_tick_at_sqrt_ratio(MAX_SQRT_RATIO)
+
+    rng = random.Random(7)
+    for tick in [rng.randint(MIN_TICK, MAX_TICK - 1) for _ in range(300)] + [84222, -84222]:
+        ratio = get_sqrt_ratio_at_tick(tick)
+        assert get_tick_at_sqrt_ratio(ratio) == tick
+        assert get_tick_at_sqrt_ratio(ratio - 1) == tick - 1 or ratio - 1 < MIN_SQRT_RATIO
+        assert get_tick_at_sqrt_ratio(get_sqrt_ratio_at_tick(tick + 1) - 1) == tick
+
+
+def test_sqrt_ratio_table():
+    table = SqrtRatioTable(10, min_tick=80000, max_tick=90005)
+    assert table.min_tick == 80000 and table.max_tick == 90000
+    for tick in (80000, 84220, 90000, 84221, 79990, 90010):
+        assert table(tick) == get_sqrt_ratio_at_tick(tick)
+    assert SqrtRatioTable(200)(MIN_TICK // 200 * 200 + 200) == get_sqrt_ratio_at_tick(MIN_TICK // 200 * 200 + 200)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The off-chain helpers live in scripts/, make them importable from the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
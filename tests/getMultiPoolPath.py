@@ -3,13 +3,7 @@ def makeFormattedHex(num):
     return val
 
 def append_hex(listOfHexs):
-    
-    for ind, hex in enumerate(listOfHexs):
-        if type(hex)==int:
-            hex = makeFormattedHex(hex)
-
-        if ind==0:
-            final_hex = listOfHexs[0]
-        else:
-            final_hex = final_hex + hex[2:]
-    return final_hex
\ No newline at end of file
+    # [tokenIn, fee, token, ..., tokenOut] -> hex path in the Path.sol layout, the tokens spelled
+    # as given (pathCodec.encode_hops gives the same bytes, Route.encode the lower case string)
+    hexs = [makeFormattedHex(hop) if type(hop) == int else hop for hop in listOfHexs]
+    return hexs[0] + "".join(hop[2:] for hop in hexs[1:])
\ No newline at end of file
@@ -0,0 +1,58 @@
+# A pool simulator driven like the chain, emitting the events of its calls, for the
+# replica and snapshot tests
+from eventIndexer import Event
+from poolSimulator import PoolState
+from tickMath import get_sqrt_ratio_at_tick
+
+POOL = "0x" + "1" * 40
+NFT = "0x" + "e" * 40
+Atoken = "0x" + "a" * 40
+Btoken = "0x" + "b" * 40
+L = 10**21
+
+
+class Chain:
+    """A pool plus the events its calls emit, numbered like logs."""
+
+    def __init__(self):
+        self.pool = PoolState(get_sqrt_ratio_at_tick(0), 0, 0, 3000, 60, token0=Atoken, token1=Btoken, address=POOL)
+        self.block_number = 1
+        self.events = []
+
+    def emit(self, name, **args):
+        self.events.append(Event(name, POOL, self.block_number, len(self.events), None, args))
+        self.block_number += 1
+
+    def mint(self, lower_tick, upper_tick, amount):
+        amount0, amount1 = self.pool.modify_position(lower_tick, upper_tick, amount)
+        self.emit("Mint", sender=NFT, owner=NFT, tickLower=lower_tick, tickUpper=upper_tick, amount=amount, amount0=amount0, amount1=amount1)
+
+    def burn(self, lower_tick, upper_tick, amount):
+        amount0, amount1 = self.pool.modify_position(lower_tick, upper_tick, -amount)
+        self.emit("Burn", owner=NFT, tickLower=lower_tick, tickUpper=upper_tick, amount=amount, amount0=-amount0, amount1=-amount1)
+
+    def swap(self, zero_for_one, amount_in):
+        result = self.pool.swap(zero_for_one, amount_in, commit=True)
+        self.emit("Swap", sender=Atoken, recipient=Atoken, amount0=result.amount0, amount1=result.amount1,
+                  sqrtPriceX96=result.sqrt_price_x96, liquidity=result.liquidity, tick=result.tick)
+
+
+def same_state(a, b):
+    return (
+        (a.sqrt_price_x96, a.tick, a.liquidity, a.fee_growth_global0_x128, a.fee_growth_global1_x128) ==
+        (b.sqrt_price_x96, b.tick, b.liquidity, b.fee_growth_global0_x128, b.fee_growth_global1_x128)
+        and a.ticks == b.ticks and a.tick_bitmap.words == b.tick_bitmap.words
+    )
+
+
+def run(chain):
+    chain.mint(-6000, 6000, L)
+    seed = chain.pool.copy()
+    seed_block = chain.block_number - 1
+    chain.mint(-600, 600, 2 * L)
+    chain.swap(True, 10**20)
+    chain.mint(-1800, -1200, L)
+    chain.swap(False, 3 * 10**20)
+    chain.burn(-600, 600, L)
+    chain.swap(True, 2 * 10**20)
+    return seed, seed_block
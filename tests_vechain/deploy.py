@@ -57,6 +57,13 @@ time.sleep(30)
 _QuoterAddress = _connector.get_tx_receipt(TX_HASH['id'])['outputs'][0]['contractAddress']
 print("Quoter contract deployed at", _QuoterAddress)
 
+#Quoter Multicall
+_contract_QuoterMulticall = Contract.fromFile("./build/contracts/QuoterMulticall.json")
+TX_HASH = _connector.deploy(_wallet, _contract_QuoterMulticall, ["address"], [_QuoterAddress])
+time.sleep(30)
+_QuoterMulticallAddress = _connector.get_tx_receipt(TX_HASH['id'])['outputs'][0]['contractAddress']
+print("Quoter Multicall contract deployed at", _QuoterMulticallAddress)
+
 
 # #Swap Manager
 _contract_SwapManager = Contract.fromFile("./build/contracts/SwapManager.json")